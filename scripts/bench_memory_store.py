@@ -0,0 +1,84 @@
+"""
+Compares recall latency of the Chroma store and the NumPy memory-mapped
+store on synthetic MiniLM-sized vectors (384-d, unit length).
+
+Usage:
+    python scripts/bench_memory_store.py [--sizes 1000 10000 100000] [--queries 200]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from modules.vector_store import NumpyStore
+
+DIM = 384
+BATCH = 5000
+
+def random_unit(rng, n):
+    x = rng.standard_normal((n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def fill(collection, vectors):
+    for start in range(0, len(vectors), BATCH):
+        chunk = vectors[start:start + BATCH]
+        ids = [str(start + i) for i in range(len(chunk))]
+        collection.add(ids=ids, embeddings=chunk,
+                       documents=[f"doc {i}" for i in ids],
+                       metadatas=[{"timestamp": float(i)} for i in ids])
+
+def time_queries(collection, queries, n_results):
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        collection.query(query_embeddings=[q.tolist()], n_results=n_results)
+        latencies.append(time.perf_counter() - t0)
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-results", type=int, default=3)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_unit(rng, args.queries)
+    print(f"{'backend':<16}{'size':>10}{'p50 ms':>10}{'p95 ms':>10}{'insert s':>10}")
+
+    for size in args.sizes:
+        vectors = random_unit(rng, size)
+        backends = [("numpy-f32", "float32"), ("numpy-f16", "float16")]
+        if not args.skip_chroma:
+            backends.append(("chroma", None))
+
+        for label, dtype in backends:
+            workdir = tempfile.mkdtemp(prefix="cherry_bench_")
+            try:
+                if dtype is None:
+                    import chromadb
+                    client = chromadb.PersistentClient(path=workdir)
+                else:
+                    client = NumpyStore(workdir, dtype=dtype)
+                collection = client.get_or_create_collection("bench")
+
+                t0 = time.perf_counter()
+                fill(collection, vectors)
+                insert_s = time.perf_counter() - t0
+
+                p50, p95 = time_queries(collection, queries, args.n_results)
+                print(f"{label:<16}{size:>10}{p50:>10.2f}{p95:>10.2f}{insert_s:>10.1f}")
+            finally:
+                del client
+                shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
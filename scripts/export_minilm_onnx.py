@@ -0,0 +1,112 @@
+"""
+Exports all-MiniLM-L6-v2 to ONNX for the lightweight embedding backend,
+optionally quantizes it to int8, and checks the outputs against the
+sentence-transformers reference so existing Chroma vectors stay valid.
+
+Usage:
+    python scripts/export_minilm_onnx.py [--out assets/models/minilm] [--no-quantize]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+
+SAMPLE_TEXTS = [
+    "The user is a software engineer using Python.",
+    "What does the user do?",
+    "User likes sushi",
+    "Turn the volume up",
+    "Remind me what my favourite colour is.",
+    "User: open spotify | Cherry: Attempting to open spotify.",
+    "A considerably longer sentence that talks about GPUs, CUDA drivers and "
+    "why the microphone keeps reporting silence on the laptop array input.",
+]
+
+def export(out_dir):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+    model = AutoModel.from_pretrained(MODEL_ID).eval()
+    tokenizer.save_pretrained(out_dir) # writes tokenizer.json
+
+    dummy = tokenizer(["hello world"], return_tensors="pt")
+    model_path = os.path.join(out_dir, "model.onnx")
+    dynamic = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model,
+        (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        model_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": dynamic,
+            "attention_mask": dynamic,
+            "token_type_ids": dynamic,
+            "last_hidden_state": dynamic,
+        },
+        opset_version=17,
+    )
+    print(f"Exported: {model_path}")
+    return model_path
+
+def quantize(model_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    out_path = model_path.replace(".onnx", "_int8.onnx")
+    quantize_dynamic(model_path, out_path, weight_type=QuantType.QInt8)
+    print(f"Quantized: {out_path}")
+    return out_path
+
+def verify(model_path, tokenizer_path, tolerance, threads):
+    from modules.embeddings import OnnxEmbeddingBackend, SentenceTransformerBackend
+
+    reference = SentenceTransformerBackend("all-MiniLM-L6-v2")
+    candidate = OnnxEmbeddingBackend(model_path, tokenizer_path, threads=threads)
+
+    ref = reference.encode(SAMPLE_TEXTS)
+    got = candidate.encode(SAMPLE_TEXTS)
+    cosine = np.sum(ref * got, axis=1) / (
+        np.linalg.norm(ref, axis=1) * np.linalg.norm(got, axis=1)
+    )
+    print(f"{os.path.basename(model_path)}: min cosine vs reference = {cosine.min():.5f}")
+
+    for name, backend in (("sentence-transformers", reference), ("onnx", candidate)):
+        t0 = time.perf_counter()
+        for text in SAMPLE_TEXTS * 10:
+            backend.encode([text])
+        per_call = (time.perf_counter() - t0) / (len(SAMPLE_TEXTS) * 10)
+        print(f"  {name:<22} {per_call * 1000:.2f} ms / single encode")
+
+    return cosine.min() >= tolerance
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="assets/models/minilm")
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--threads", type=int, default=2)
+    args = parser.parse_args()
+
+    model_path = export(args.out)
+    tokenizer_path = os.path.join(args.out, "tokenizer.json")
+
+    ok = verify(model_path, tokenizer_path, tolerance=0.9999, threads=args.threads)
+    if not args.no_quantize:
+        int8_path = quantize(model_path)
+        # int8 weights cost a little precision; still well within what retrieval cares about
+        ok = verify(int8_path, tokenizer_path, tolerance=0.99, threads=args.threads) and ok
+
+    if not ok:
+        print("FAILURE: ONNX outputs diverge from the sentence-transformers reference.")
+        sys.exit(1)
+    print("SUCCESS: ONNX embeddings match the reference backend.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Downloads the dashboard's third-party JavaScript into src/server/static/vendor,
+so the server serves it itself and the dashboard works on a LAN without
+internet. Run once at setup (and again after bumping a version below).
+
+Usage:
+    python scripts/fetch_web_assets.py [--force]
+"""
+import argparse
+import hashlib
+import os
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+VENDOR_DIR = os.path.join(ROOT, 'src', 'server', 'static', 'vendor')
+
+# file name -> pinned URL (keep the client in step with the server's python-socketio)
+ASSETS = {
+    "socket.io.min.js": "https://cdn.socket.io/4.7.5/socket.io.min.js",
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Download even if the file exists")
+    args = parser.parse_args()
+
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for name, url in ASSETS.items():
+        path = os.path.join(VENDOR_DIR, name)
+        if os.path.exists(path) and not args.force:
+            print(f"{name}: already present")
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"{name}: {len(data)} bytes from {url} (sha256 {hashlib.sha256(data).hexdigest()})")
+
+if __name__ == "__main__":
+    main()
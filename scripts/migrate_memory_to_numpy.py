@@ -0,0 +1,60 @@
+"""
+Copies the Chroma vector memory (data/memory_db) into the NumPy
+memory-mapped store. Embeddings are copied as-is, so nothing is re-encoded.
+Afterwards set `memory.store: "numpy"` in config/settings.yaml.
+
+Usage:
+    python scripts/migrate_memory_to_numpy.py [--src data/memory_db] [--dst data/memory_np] [--dtype float16]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from modules.vector_store import NumpyStore
+
+COLLECTIONS = ["user_facts", "interactions"]
+PAGE_SIZE = 1000
+
+def migrate(src, dst, dtype):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=src)
+    store = NumpyStore(dst, dtype=dtype)
+    existing = {c.name if hasattr(c, "name") else c for c in client.list_collections()}
+
+    for name in COLLECTIONS:
+        if name not in existing:
+            print(f"{name}: not present in {src}, skipping.")
+            continue
+
+        source = client.get_collection(name)
+        target = store.get_or_create_collection(name)
+        total = source.count()
+        copied = 0
+        while copied < total:
+            page = source.get(limit=PAGE_SIZE, offset=copied,
+                              include=["embeddings", "documents", "metadatas"])
+            if not page["ids"]:
+                break
+            target.upsert(ids=page["ids"], embeddings=page["embeddings"],
+                          documents=page["documents"], metadatas=page["metadatas"])
+            copied += len(page["ids"])
+            print(f"{name}: {copied}/{total}", end="\r")
+        print(f"{name}: migrated {target.count()} records.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--src", default="data/memory_db")
+    parser.add_argument("--dst", default="data/memory_np")
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = parser.parse_args()
+
+    if not os.path.exists(args.src):
+        print(f"Source store not found: {args.src}")
+        sys.exit(1)
+    migrate(args.src, args.dst, args.dtype)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Measures cold-start cost: how long each entry module takes to import
+(fresh interpreter, `python -X importtime`, with the heaviest packages
+it pulls in) and how long the main classes take to construct.
+Optionally saves a baseline and fails when a later run regresses.
+
+Usage:
+    python scripts/profile_startup.py [--top 8] [--skip-constructors]
+    python scripts/profile_startup.py --save data/startup_baseline.json
+    python scripts/profile_startup.py --check data/startup_baseline.json [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+SRC = os.path.join(ROOT, 'src')
+
+# Entry points whose import should stay cheap
+IMPORTS = [
+    "modules.stt", "modules.wake_word", "modules.synthesizer", "modules.tts",
+    "modules.actions", "modules.llm", "server.app", "main",
+]
+
+# name -> (setup, timed statement); each runs in its own interpreter
+CONSTRUCTORS = {
+    "STT()": ("from modules.stt import STT", "STT()"),
+    "STT().warmup()": ("from modules.stt import STT", "STT().warmup()"),
+    "WakeWord()": ("from modules.wake_word import WakeWord", "WakeWord()"),
+    "Actions()": ("from modules.actions import Actions", "Actions()"),
+    "LLM()": ("from modules.llm import LLM", "LLM()"),
+    "create_synthesizer()": ("from modules.synthesizer import create_synthesizer", "create_synthesizer()"),
+}
+
+_CHILD = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+{setup}
+start = time.perf_counter()
+{stmt}
+print("__PROFILE__" + json.dumps(time.perf_counter() - start))
+"""
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+def run_child(code, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+
+def last_error(stderr):
+    lines = [line for line in stderr.strip().splitlines() if not line.startswith("import time:")]
+    return lines[-1] if lines else "failed"
+
+def profile_import(module, top):
+    """(seconds, [(package, seconds), ...]) or raises RuntimeError."""
+    proc = run_child(f"import sys; sys.path.insert(0, {SRC!r}); import {module}", importtime=True)
+    if proc.returncode != 0:
+        raise RuntimeError(last_error(proc.stderr))
+
+    total = None
+    packages = {}
+    for match in _IMPORTTIME.finditer(proc.stderr):
+        cumulative = int(match.group(2)) / 1e6
+        name = match.group(4)
+        if name == module:
+            total = cumulative
+        root = name.split(".")[0]
+        packages[root] = max(packages.get(root, 0.0), cumulative)
+    packages.pop(module.split(".")[0], None)
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    return total or 0.0, heaviest
+
+def profile_constructor(setup, stmt):
+    proc = run_child(_CHILD.format(src=SRC, setup=setup, stmt=stmt))
+    for line in proc.stdout.splitlines():
+        if line.startswith("__PROFILE__"):
+            return json.loads(line[len("__PROFILE__"):])
+    raise RuntimeError(last_error(proc.stderr))
+
+def check(results, baseline, tolerance, slack):
+    """Names whose time grew beyond baseline * (1 + tolerance) + slack."""
+    regressions = []
+    for section in ("imports", "constructors"):
+        for name, seconds in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before is not None and seconds > before * (1 + tolerance) + slack:
+                regressions.append(f"{section[:-1]} {name}: {before:.2f}s -> {seconds:.2f}s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages shown per module")
+    parser.add_argument("--skip-constructors", action="store_true")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a baseline")
+    parser.add_argument("--check", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth")
+    parser.add_argument("--slack", type=float, default=0.1, help="Allowed absolute growth (s)")
+    args = parser.parse_args()
+
+    results = {"imports": {}, "constructors": {}}
+
+    print(f"{'import':<24}{'seconds':>10}   heaviest packages")
+    for module in IMPORTS:
+        try:
+            seconds, heaviest = profile_import(module, args.top)
+        except RuntimeError as e:
+            print(f"{module:<24}{'-':>10}   skipped ({e})")
+            continue
+        results["imports"][module] = seconds
+        detail = ", ".join(f"{name} {sec:.2f}" for name, sec in heaviest if sec >= 0.01)
+        print(f"{module:<24}{seconds:>10.2f}   {detail}")
+
+    if not args.skip_constructors:
+        print(f"\n{'constructor':<24}{'seconds':>10}")
+        for name, (setup, stmt) in CONSTRUCTORS.items():
+            try:
+                seconds = profile_constructor(setup, stmt)
+            except RuntimeError as e:
+                print(f"{name:<24}{'-':>10}   skipped ({e})")
+                continue
+            results["constructors"][name] = seconds
+            print(f"{name:<24}{seconds:>10.2f}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        regressions = check(results, baseline, args.tolerance, args.slack)
+        if regressions:
+            print("\nStartup regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo startup regressions.")
+
+if __name__ == "__main__":
+    main()
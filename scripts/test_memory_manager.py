@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from modules.memory_manager import MemoryManager
+
+class TestJournalReplay(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.memory_file = os.path.join(self.dir, "memory.json")
+        self.journal_file = os.path.join(self.dir, "memory.journal.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write_journal(self, data):
+        with open(self.journal_file, "wb") as f:
+            f.write(data)
+
+    def test_torn_tail_without_newline(self):
+        """A last record missing its newline is torn, even if it parses."""
+        self.write_journal(b'{"k":"a","v":"1"}\n{"k":"b","v":"2"}')
+        memory = MemoryManager(self.memory_file)
+        self.assertEqual(memory.long_term_memory, {"a": "1"})
+        with open(self.journal_file, "rb") as f:
+            self.assertEqual(f.read(), b'{"k":"a","v":"1"}\n')
+
+        # The next append starts on its own line and survives a reload
+        memory.remember_fact("c", "3")
+        memory.flush()
+        reloaded = MemoryManager(self.memory_file)
+        self.assertEqual(reloaded.long_term_memory, {"a": "1", "c": "3"})
+
+    def test_malformed_record_cuts_journal(self):
+        self.write_journal(b'{"k":"a","v":"1"}\n["not","a","record"]\n{"k":"b","v":"2"}\n')
+        memory = MemoryManager(self.memory_file)
+        self.assertEqual(memory.long_term_memory, {"a": "1"})
+        self.assertEqual(os.path.getsize(self.journal_file), len(b'{"k":"a","v":"1"}\n'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import weakref
+from unittest import mock
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from modules import vector_store
+from modules.vector_store import NumpyCollection
+
+class TestCompaction(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((200, 8)).astype(np.float32)
+        self.ids = [f"id{i}" for i in range(200)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def make(self, dtype="float32"):
+        col = NumpyCollection(self.dir, "test", dtype=dtype)
+        col.add(self.ids, self.vectors, documents=self.ids)
+        # Deleting fewer than COMPACT_MIN_DEAD rows keeps auto-compaction out of the way
+        col.delete(self.ids[:50])
+        return col
+
+    def test_map_released_before_replace(self):
+        """Windows refuses os.replace on a mapped file, so compact must unmap first."""
+        col = self.make()
+        col.query(self.vectors[:1], n_results=1) # Goes through the memmap
+        mapped = weakref.ref(col._mapped())
+        real_replace = os.replace
+
+        def replace(src, dst):
+            if dst == col._vectors_file:
+                self.assertIsNone(mapped(), "vectors.bin still mapped during replace")
+            real_replace(src, dst)
+
+        with mock.patch.object(vector_store.os, "replace", side_effect=replace):
+            col.compact()
+
+    def test_compact_keeps_live_rows(self):
+        for dtype in ("float32", "float16"):
+            with self.subTest(dtype=dtype):
+                shutil.rmtree(self.dir, ignore_errors=True)
+                col = self.make(dtype)
+                before = col.query(self.vectors[100:101], n_results=3)
+                col.compact()
+
+                self.assertEqual(col.count(), 150)
+                self.assertEqual(os.path.getsize(col._vectors_file),
+                                 150 * 8 * np.dtype(dtype).itemsize)
+                after = col.query(self.vectors[100:101], n_results=3)
+                self.assertEqual(before["ids"], after["ids"])
+                self.assertEqual(after["ids"][0][0], "id100")
+
+                reopened = NumpyCollection(self.dir, "test")
+                self.assertEqual(reopened.count(), 150)
+                self.assertEqual(reopened.get(ids=["id10", "id60"])["ids"], ["id60"])
+                self.assertEqual(reopened.query(self.vectors[100:101], n_results=3)["ids"], after["ids"])
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_empty_collection_one_row_per_query(self):
+        col = NumpyCollection(self.dir, "test")
+        self.assertEqual(col.query(np.ones(384, dtype=np.float32), n_results=3)["ids"], [[]])
+        self.assertEqual(col.query(np.ones((2, 384), dtype=np.float32), n_results=3)["ids"], [[], []])
+
+    def test_dimension_mismatch(self):
+        col = NumpyCollection(self.dir, "test")
+        col.add(["a"], np.ones((1, 8), dtype=np.float32), documents=["a"])
+        self.assertEqual(col.query(np.ones(8, dtype=np.float32), n_results=1)["ids"], [["a"]])
+        with self.assertRaises(ValueError):
+            col.query(np.ones(4, dtype=np.float32))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,60 +1,173 @@
 import sys
 import os
 import subprocess
+import tempfile
+import threading
 import time
-import psutil
+import requests
 from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
 from PyQt6.QtGui import QIcon, QAction
-from PyQt6.QtCore import QThread
+from PyQt6.QtCore import QThread, pyqtSignal
+from config import settings
 
 # Path to python interpreter
 PYTHON_EXE = sys.executable
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-class ProcessManager(QThread):
+boot_cfg = settings.get('boot', {})
+SERVER_URL = settings.get('client', {}).get('server_url', "http://localhost:5001").rstrip("/")
+
+class Child:
+    """One supervised process and its restart bookkeeping."""
+    def __init__(self, name, script, ready, health=None, env=None):
+        self.name = name
+        self.script = os.path.join(BASE_DIR, "src", *script.split("/"))
+        self.ready = ready # () -> bool, the readiness handshake
+        self.health = health # () -> bool, polled while running (None: alive is enough)
+        self.env = env or {}
+        self.process = None
+        self.started_at = 0.0
+        self.backoff = boot_cfg.get('restart_backoff', 1)
+        self.health_failures = 0
+        self.next_health = 0.0
+        self.ready_deadline = None # Set while waiting for the readiness handshake
+        self.restart_at = None # Set while a restart is scheduled
+
+    def start(self):
+        print(f"[Boot] Starting {self.name}: {self.script}")
+        # CREATE_NO_WINDOW = 0x08000000 hides the console, kept visible for debugging
+        self.process = subprocess.Popen(
+            [PYTHON_EXE, self.script],
+            cwd=BASE_DIR,
+            env={**os.environ, **self.env}
+        )
+        self.started_at = time.monotonic()
+        self.health_failures = 0
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self, grace=1.0):
+        if not self.alive():
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+def server_answers(path, timeout=1):
+    try:
+        return requests.get(SERVER_URL + path, timeout=timeout).ok
+    except requests.RequestException:
+        return False
+
+class Supervisor(QThread):
+    """
+    Starts the server and client, waits for each one's readiness handshake
+    instead of sleeping, then keeps them running: crashed children are
+    restarted with exponential backoff and a server that stops answering
+    /api/status is restarted too.
+
+    Handshakes: the server's /api/ready returns 200 once its models are
+    loaded; the client writes CHERRY_READY_FILE once its mic is open.
+    The client only needs the server *started*, it waits for /api/ready
+    itself, so its own wake word/TTS loading overlaps the server's.
+    """
+    sig_status = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
-        self.server_process = None
-        self.client_process = None
+        self._stop = threading.Event()
+        self.ready_file = os.path.join(tempfile.gettempdir(), f"cherry-client-{os.getpid()}.ready")
+        self.server = Child("server", "server/app.py",
+                            ready=lambda: server_answers("/api/ready"),
+                            health=lambda: server_answers("/api/status", timeout=3))
+        self.client = Child("client", "client_desktop.py",
+                            ready=lambda: os.path.exists(self.ready_file),
+                            env={"CHERRY_READY_FILE": self.ready_file})
+        self.children = [self.server, self.client]
 
     def run(self):
-        # 1. Start Server
-        server_script = os.path.join(BASE_DIR, "src", "server", "app.py")
-        print(f"Booting Server: {server_script}")
-        # Use pythonw.exe (or creationflags) to hide console if desired, 
-        # but for now we keep it visible for debugging or hide via CREATE_NO_WINDOW
-        
-        # CREATE_NO_WINDOW = 0x08000000
-        self.server_process = subprocess.Popen(
-            [PYTHON_EXE, server_script],
-            cwd=BASE_DIR
-            # creationflags=subprocess.CREATE_NO_WINDOW 
-        )
-        
-        # Wait for server to warm up
-        time.sleep(2)
-        
-        # 2. Start Client
-        client_script = os.path.join(BASE_DIR, "src", "client_desktop.py")
-        print(f"Booting Client: {client_script}")
-        self.client_process = subprocess.Popen(
-            [PYTHON_EXE, client_script],
-            cwd=BASE_DIR
-            # creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        
+        self.boot_start = time.monotonic()
+        self.booted = False
+        self.sig_status.emit("Cherry is starting...")
+        for child in self.children:
+            self.start_child(child)
+        self.monitor()
+
+    def start_child(self, child):
+        if child is self.client and os.path.exists(self.ready_file):
+            os.remove(self.ready_file) # A restarted client must signal again
+        child.start()
+        child.ready_deadline = time.monotonic() + boot_cfg.get('ready_timeout', 180)
+
+    def monitor(self):
+        """
+        One non-blocking pass over every child per tick: due restarts,
+        crash detection, readiness polling and health checks. Nothing here
+        waits on a single child, so one restarting doesn't pause the other.
+        """
+        interval = boot_cfg.get('health_interval', 10)
+        max_failures = boot_cfg.get('health_failures', 3)
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for child in self.children:
+                if child.restart_at is not None:
+                    if now >= child.restart_at:
+                        child.restart_at = None
+                        self.start_child(child)
+                elif not child.alive():
+                    print(f"[Boot] {child.name} exited (code {child.process.returncode})")
+                    self.schedule_restart(child, now)
+                elif child.ready_deadline is not None:
+                    self.check_ready(child, now)
+                elif child.health and now >= child.next_health:
+                    child.next_health = now + interval
+                    if child.health():
+                        child.health_failures = 0
+                        continue
+                    child.health_failures += 1
+                    print(f"[Boot] {child.name} health check failed ({child.health_failures}/{max_failures})")
+                    if child.health_failures >= max_failures:
+                        child.stop()
+                        self.schedule_restart(child, now)
+            # Poll fast while a handshake or restart is pending
+            busy = any(c.ready_deadline is not None or c.restart_at is not None for c in self.children)
+            self._stop.wait(0.1 if busy else 0.5)
+
+    def check_ready(self, child, now):
+        if child.ready():
+            child.ready_deadline = None
+            child.next_health = now + boot_cfg.get('health_interval', 10)
+            print(f"[Boot] {child.name} ready after {now - child.started_at:.1f}s")
+            if all(c.alive() and c.ready_deadline is None and c.restart_at is None for c in self.children):
+                if not self.booted:
+                    self.booted = True
+                    print(f"[Boot] Cherry ready in {now - self.boot_start:.1f}s")
+                self.sig_status.emit("Cherry is Active")
+        elif now >= child.ready_deadline:
+            child.ready_deadline = None # Health checks take over from here
+            print(f"[Boot] {child.name} not ready after {boot_cfg.get('ready_timeout', 180)}s")
+
+    def schedule_restart(self, child, now):
+        # Backoff grows while a child keeps dying young, resets once it stays up
+        if now - child.started_at >= boot_cfg.get('stable_seconds', 60):
+            child.backoff = boot_cfg.get('restart_backoff', 1)
+        self.sig_status.emit(f"Restarting {child.name}...")
+        print(f"[Boot] Restarting {child.name} in {child.backoff}s")
+        child.ready_deadline = None
+        child.restart_at = now + child.backoff
+        child.backoff = min(child.backoff * 2, boot_cfg.get('restart_backoff_max', 60))
+
     def stop_all(self):
-        if self.client_process:
-            self.client_process.terminate()
-        if self.server_process:
-            self.server_process.terminate()
-        
-        # Force kill if needed
-        time.sleep(1)
-        if self.client_process and self.client_process.poll() is None:
-            self.client_process.kill()
-        if self.server_process and self.server_process.poll() is None:
-            self.server_process.kill()
+        self._stop.set()
+        # Client first, so it doesn't report the server going away
+        for child in reversed(self.children):
+            child.stop()
+        self.wait(2000)
+        if os.path.exists(self.ready_file):
+            os.remove(self.ready_file)
 
 def main():
     app = QApplication(sys.argv)
@@ -72,7 +185,7 @@ def main():
     
     menu = QMenu()
     
-    action_status = QAction("Cherry is Active")
+    action_status = QAction("Cherry is starting...")
     action_status.setEnabled(False)
     menu.addAction(action_status)
     
@@ -87,11 +200,12 @@ def main():
     tray_icon.show()
 
     # Start Processes
-    manager = ProcessManager()
-    manager.start()
+    supervisor = Supervisor()
+    supervisor.sig_status.connect(action_status.setText)
+    supervisor.start()
     
     # Handle Exit
-    app.aboutToQuit.connect(manager.stop_all)
+    app.aboutToQuit.connect(supervisor.stop_all)
     
     sys.exit(app.exec())
 
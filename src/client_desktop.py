@@ -1,10 +1,12 @@
 import sys
-import requests
 import sounddevice as sd
 import numpy as np
 import queue
 import time
 import os
+import socket
+import uuid
+import socketio
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QThread, pyqtSignal
 
@@ -14,9 +16,25 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from modules.wake_word import WakeWord
 from modules.vad import VAD
 from modules.tts import TTS
+from modules.echo import EchoCanceller
+from modules.brain_client import BrainClient
+from modules.local_ipc import IPCClient, default_address, is_local_url
+from config import settings
 from gui import ModernHUD
 
-SERVER_URL = "http://localhost:5001"
+client_cfg = settings.get('client', {})
+SERVER_URL = client_cfg.get('server_url', "http://localhost:5001")
+# Keeps this desktop's conversation separate from phones and dashboard tabs
+SESSION_ID = f"desktop-{socket.gethostname()}"
+
+def local_ipc_client():
+    """Socket/pipe transport when the server runs on this machine, else None (HTTP only)."""
+    ipc_cfg = settings.get('ipc', {})
+    if not ipc_cfg.get('enabled', True) or not is_local_url(SERVER_URL):
+        return None
+    return IPCClient(ipc_cfg.get('address') or default_address(),
+                     ipc_cfg.get('key_path', "data/ipc.key"),
+                     timeout=client_cfg.get('read_timeout', 60))
 
 class CherryClient(QThread):
     # Updated Signals for ModernHUD
@@ -27,6 +45,19 @@ class CherryClient(QThread):
         super().__init__()
         self.running = True
         self.audio_queue = queue.Queue()
+        self.sio = None
+        self.brain = BrainClient(
+            SERVER_URL, SESSION_ID,
+            connect_timeout=client_cfg.get('connect_timeout', 3.05),
+            read_timeout=client_cfg.get('read_timeout', 60),
+            retries=client_cfg.get('retries', 2),
+            backoff=client_cfg.get('backoff_seconds', 0.5),
+            breaker_failures=client_cfg.get('breaker_failures', 3),
+            breaker_reset=client_cfg.get('breaker_reset_seconds', 15),
+            ipc=local_ipc_client()
+        )
+        self.stream_id = None # Utterance currently being streamed to the server
+        self.utterance = 0 # Bumped on every wake word; older replies are dropped
         
     def run(self):
         print("--- Initializing Cherry Client ---")
@@ -37,6 +68,12 @@ class CherryClient(QThread):
         
         # Local Voice Output
         self.tts = TTS()
+
+        # Barge-in: keep the wake word live while Cherry talks, minus her own voice
+        audio_cfg = settings.get('audio', {})
+        self.barge_in = audio_cfg.get('barge_in', True)
+        self.echo_delay = audio_cfg.get('echo_delay_ms', 10) / 1000.0
+        self.echo = EchoCanceller(partitions=audio_cfg.get('aec_partitions', 8))
         
         self.is_listening = False
         self.audio_buffer = []
@@ -45,47 +82,57 @@ class CherryClient(QThread):
         print(f"Connecting to Brain at {SERVER_URL}...")
         self.sig_state.emit("IDLE")
         
-        # Retry Loop for Server Connection
-        connected = False
-        for i in range(1, 16): # Try 15 times (30 seconds)
-            try:
-                self.sig_text.emit("System Initializing...", f"Connecting... ({i}/15)")
-                requests.get(f"{SERVER_URL}/api/status", timeout=2)
-                print("Brain is Online.")
-                self.sig_text.emit("System Online", "Ready. Say 'Jarvis'")
-                connected = True
-                break
-            except Exception as e:
-                print(f"Waiting for Brain... ({i}/15) - {e}")
-                time.sleep(2)
-        
-        if not connected:
-            print(f"WARNING: Brain (Server) appears offline after multiple attempts.")
+        # Readiness handshake: returns as soon as the server has its models loaded
+        self.sig_text.emit("System Initializing...", "Waiting for the brain to load...")
+        if self.brain.wait_ready(timeout=client_cfg.get('ready_timeout', 120)):
+            print("Brain is Online.")
+            self.sig_text.emit("System Online", "Ready. Say 'Jarvis'")
+        else:
+            print(f"WARNING: Brain (Server) did not report ready.")
             self.sig_text.emit("Connection Failed", "Brain is offline.")
             self.tts.speak("I cannot connect to my brain. Please check the server.")
+        self.connect_stream()
 
         device_info = sd.query_devices(kind='input')
         print(f"Using Input Device: {device_info['name']}")
 
         with sd.InputStream(samplerate=16000, blocksize=1024, channels=1, callback=self.audio_callback):
+            self.signal_ready()
             while self.running:
                 try:
-                    audio_data = self.audio_queue.get(timeout=1)
-                    self.process_stream(audio_data)
+                    audio_data, adc_time = self.audio_queue.get(timeout=1)
+                    self.process_stream(audio_data, adc_time)
                 except queue.Empty:
                     continue
 
+    def signal_ready(self):
+        """Tells boot.py's supervisor we're listening (it passes the file path in)."""
+        ready_file = os.environ.get("CHERRY_READY_FILE")
+        if ready_file:
+            with open(ready_file, "w") as f:
+                f.write(str(os.getpid()))
+
     def audio_callback(self, indata, frames, time, status):
         if status: 
             print(f"Audio Error: {status}", file=sys.stderr)
-        self.audio_queue.put(indata.copy().squeeze())
+        self.audio_queue.put((indata.copy().squeeze(), time.inputBufferAdcTime))
+
+    def cancel_echo(self, audio_data, adc_time):
+        """Removes what the speaker was playing from a mic chunk."""
+        if not adc_time: # Some host APIs don't report capture times
+            adc_time = self.tts.output_time() - len(audio_data) / 16000
+        reference = self.tts.reference(adc_time - self.echo_delay, len(audio_data), 16000)
+        return self.echo.process(audio_data, reference)
 
-    def process_stream(self, audio_data):
-        # Prevent hearing itself
+    def process_stream(self, audio_data, adc_time=None):
         if self.tts.is_busy():
-            self.wake_buffer = []
-            self.audio_buffer = []
-            return
+            if self.is_listening or not self.barge_in:
+                # Prevent hearing itself
+                self.wake_buffer = []
+                self.audio_buffer = []
+                return
+            # Only the wake word runs during playback, on the echo-cancelled signal
+            audio_data = self.cancel_echo(audio_data, adc_time)
 
         # Calculate volume level
         rms = np.sqrt(np.mean(audio_data**2))
@@ -103,6 +150,9 @@ class CherryClient(QThread):
                 combined = np.concatenate(self.wake_buffer)
                 if self.wake_word.detect(combined):
                     print("Wake Word Detected!")
+                    if self.tts.is_busy():
+                        self.tts.stop() # Barge-in: the user gets the floor immediately
+                    self.utterance += 1
                     self.is_listening = True
                     self.audio_buffer = []
                     self.wake_buffer = []
@@ -110,67 +160,116 @@ class CherryClient(QThread):
                     self.sig_state.emit("LISTENING")
                     self.sig_text.emit("Listening...", "")
                     self.tts.speak("Yes?")
+                    self.start_stream()
         else:
             # VAD / Recording
             self.audio_buffer.append(audio_data)
+            if self.stream_id and self.sio.connected:
+                # Streamed as we go; the server's VAD says when we're done
+                pcm = (np.clip(audio_data, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+                self.sio.emit('voice_frame', {"id": self.stream_id, "audio": pcm})
+                return
+            self.stream_id = None # Socket dropped mid-utterance: finish over HTTP
             status = self.vad.process_chunk(audio_data)
             if status == 1: # Silence detected
                 self.is_listening = False
                 self.sig_state.emit("THINKING")
                 
-                # Send to Server
+                # Send to Server (background dispatcher; capture keeps running)
                 full_audio = np.concatenate(self.audio_buffer)
-                self.send_to_brain(full_audio)
-                
-                # CRITICAL FIX: Flush the audio queue to remove 'stale' audio 
-                # recorded while the AI was thinking/speaking.
-                with self.audio_queue.mutex:
-                    self.audio_queue.queue.clear()
+                self.audio_buffer = []
+                utterance = self.utterance
+                self.brain.submit_voice(
+                    full_audio, 16000,
+                    lambda text, reply: utterance == self.utterance and self.reply(text, reply),
+                    lambda kind, message: utterance == self.utterance and self.brain_error(kind, message)
+                )
                 
                 print("--- Cycle Complete. Listening for 'Jarvis' ---")
-                self.sig_state.emit("IDLE")
-
-    def send_to_brain(self, audio_data):
-        """
-        Sends raw audio data to the server for processing.
-        """
-        import soundfile as sf
-        import io
-        
-        # Convert numpy array to WAV in memory
-        mem_file = io.BytesIO()
-        sf.write(mem_file, audio_data, 16000, format='WAV')
-        mem_file.seek(0)
-        
+                # IDLE is emitted by speech_finished once the reply has played
+
+    def connect_stream(self):
+        """Socket for streaming voice; without it we fall back to one POST per utterance."""
+        self.sio = socketio.Client(reconnection=True)
+        self.sio.on('voice_status', self.on_voice_status)
+        self.sio.on('partial_transcript', self.on_partial_transcript)
+        self.sio.on('voice_response', self.on_voice_response)
+        self.sio.on('tool_result', self.on_tool_result)
         try:
-            print("Sending audio to Brain...")
-            files = {'audio': ('command.wav', mem_file, 'audio/wav')}
-            response = requests.post(f"{SERVER_URL}/api/voice", files=files)
-            
-            if response.status_code == 200:
-                data = response.json()
-                reply = data.get('response', '')
-                transcription = data.get('transcription', '(Unknown)')
-                
-                print(f"Brain: {reply}")
-                
-                self.sig_text.emit(transcription, reply)
-                self.sig_state.emit("SPEAKING")
-                
-                self.tts.speak(reply)
-            elif response.status_code == 400:
-                print(f"Server (400): {response.text}")
-                self.sig_text.emit("...", "I didn't catch that.")
-                self.tts.speak("I didn't catch that.")
-            else:
-                print(f"Server Error ({response.status_code}): {response.text}")
-                self.sig_text.emit("Error", "Server Error")
-                self.tts.speak("I'm having trouble connecting to my brain.")
-                
+            self.sio.connect(SERVER_URL, transports=['websocket'])
+            print("Voice streaming connected.")
         except Exception as e:
-            print(f"Network Error: {e}")
-            self.sig_text.emit("Network Error", str(e))
-            self.tts.speak("Network error.")
+            print(f"Voice streaming unavailable ({e}); using uploads.")
+
+    def start_stream(self):
+        if self.sio is None or not self.sio.connected:
+            self.stream_id = None
+            return
+        self.stream_id = uuid.uuid4().hex
+        self.sio.emit('voice_start', {
+            "id": self.stream_id,
+            "sample_rate": 16000,
+            "session_id": SESSION_ID
+        })
+
+    def on_voice_status(self, data):
+        if data.get('id') != self.stream_id:
+            return
+        state = data.get('state')
+        if state == "processing":
+            self.is_listening = False
+            self.audio_buffer = []
+            self.sig_state.emit("THINKING")
+            print("--- Utterance streamed. Listening for 'Jarvis' ---")
+        elif state == "error":
+            self.stream_id = None
+            self.is_listening = False
+            print(f"Server: {data.get('error')}")
+            self.sig_text.emit("...", "I didn't catch that.")
+            self.tts.speak("I didn't catch that.", on_done=self.speech_finished)
+
+    def on_partial_transcript(self, data):
+        if data.get('id') == self.stream_id:
+            self.sig_text.emit(data.get('text', ''), "...")
+
+    def on_voice_response(self, data):
+        if data.get('id') != self.stream_id:
+            return
+        self.stream_id = None
+        self.reply(data.get('transcription', '(Unknown)'), data.get('response', ''))
+
+    def on_tool_result(self, data):
+        """A slow tool (app launch, YouTube) finished after its "Working on it." ack."""
+        result = data.get('result', '')
+        print(f"[Tools] {data.get('tool')}: {result}")
+        if not result or self.is_listening:
+            return # Don't talk over the user's next command
+        self.sig_text.emit("", result)
+        self.sig_state.emit("SPEAKING")
+        self.tts.speak(result, on_done=self.speech_finished)
+
+    def reply(self, transcription, reply):
+        print(f"Brain: {reply}")
+        self.sig_text.emit(transcription, reply)
+        self.sig_state.emit("SPEAKING")
+        self.tts.speak(reply, on_done=self.speech_finished)
+
+    def speech_finished(self):
+        # Runs on the audio notifier thread; Qt queues the signal to the GUI thread
+        if not self.is_listening:
+            self.sig_state.emit("IDLE")
+
+    def brain_error(self, kind, message):
+        """Called on the dispatcher thread when an upload fails."""
+        if kind == "not_understood":
+            self.sig_text.emit("...", "I didn't catch that.")
+            self.tts.speak("I didn't catch that.", on_done=self.speech_finished)
+        elif kind == "offline":
+            self.sig_text.emit("Network Error", "Brain is offline.")
+            self.tts.speak("I can't reach my brain right now.", on_done=self.speech_finished)
+        else:
+            self.sig_text.emit("Error", "Server Error")
+            self.tts.speak("I'm having trouble connecting to my brain.", on_done=self.speech_finished)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
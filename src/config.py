@@ -15,7 +15,108 @@ def load_config():
             "tts": {
                 "model_path": "assets/models/kokoro-v1.0.onnx",
                 "voices_path": "assets/models/voices-v1.0.bin",
-                "voice_name": "af_heart"
+                "voice_name": "af_heart",
+                "synth_workers": 1,
+                "cache": {
+                    "enabled": True,
+                    "path": "data/tts_cache.sqlite3",
+                    "max_entries": 128,
+                    "max_disk_entries": 512,
+                    "max_chars": 80,
+                    "prewarm": ["Yes?", "I didn't catch that.", "Network error."]
+                }
+            },
+            "audio": {
+                "output_rate": 24000,
+                "output_blocksize": 480,
+                "duck_gain": 0.25,
+                "barge_in": True,
+                "echo_delay_ms": 10,
+                "aec_partitions": 8
+            },
+            "hud": {"active_fps": 60, "idle_fps": 8},
+            "sampler": {"interval_seconds": 2, "history_minutes": 60},
+            "pulse": {"max_sleep_seconds": 600}, # rules: modules.pulse_rules.DEFAULT_RULES
+            "apps": {"catalog_path": "data/app_catalog.json", "min_score": 0.5, "rescan_seconds": 30, "aliases": {}},
+            "tools": {"workers": 4, "ack": "Working on it."},
+            "client": {
+                "server_url": "http://localhost:5001",
+                "connect_timeout": 3.05,
+                "read_timeout": 60,
+                "retries": 2,
+                "backoff_seconds": 0.5,
+                "breaker_failures": 3,
+                "breaker_reset_seconds": 15,
+                "ready_timeout": 120
+            },
+            "ipc": {
+                "enabled": True,
+                "address": "",
+                "key_path": "data/ipc.key"
+            },
+            "boot": {
+                "ready_timeout": 180,
+                "health_interval": 10,
+                "health_failures": 3,
+                "restart_backoff": 1,
+                "restart_backoff_max": 60,
+                "stable_seconds": 60
+            },
+            "server": {
+                "context_limit": 10,
+                "max_sessions": 64,
+                "session_idle_minutes": 30,
+                "warmup": True,
+                "warmup_retries": 2,
+                "ingest": {"max_seconds": 30, "min_seconds": 0.2},
+                "stream": {
+                    "vad_threshold": 0.01,
+                    "silence_seconds": 0.6,
+                    "max_seconds": 30,
+                    "partial_seconds": 1.0,
+                    "partial_timeout_seconds": 2
+                }
+            },
+            "scheduler": {
+                "stt": {"concurrency": 1, "max_queue": 8, "timeout_seconds": 30},
+                "llm": {"concurrency": 1, "max_queue": 8, "timeout_seconds": 120},
+                "tts": {"concurrency": 1, "max_queue": 16, "timeout_seconds": 30}
+            },
+            "memory": {
+                "store": "chroma",
+                "db_path": "data/memory_db",
+                "numpy_path": "data/memory_np",
+                "numpy_dtype": "float32",
+                "embedding_model": "all-MiniLM-L6-v2",
+                "embedding_backend": "sentence_transformers",
+                "onnx": {
+                    "model_path": "assets/models/minilm/model_int8.onnx",
+                    "tokenizer_path": "assets/models/minilm/tokenizer.json",
+                    "threads": 2,
+                    "batch_size": 32
+                },
+                "embedding_cache_size": 2048,
+                "embedding_cache_path": "data/embedding_cache.sqlite3",
+                "embedding_cache_disk_entries": 20000,
+                "dedup_distance": 0.1,
+                "retention": {
+                    "enabled": True,
+                    "max_age_days": 180,
+                    "max_interactions": 5000,
+                    "compact_after_hours": 24,
+                    "compact_group_size": 20,
+                    "interval_minutes": 30,
+                    "half_life_days": 14,
+                    "recall_min_age_minutes": 15,
+                    "summarizer": "llm"
+                },
+                "recall": {
+                    "enabled": True,
+                    "max_distance": 1.2,
+                    "interaction_max_distance": 1.1,
+                    "token_budget": 200,
+                    "log_every": 20
+                }
             }
         }
     with open(CONFIG_PATH, 'r') as f:
@@ -1,13 +1,29 @@
 import sys
 import math
 import random
-import psutil
 import time
 from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt, QTimer, QRectF, QPointF, QSize
-from PyQt6.QtGui import QColor, QPainter, QBrush, QPen, QRadialGradient, QFont, QPainterPath, QConicalGradient
+from PyQt6.QtGui import QColor, QPainter, QBrush, QPen, QRadialGradient, QFont, QPainterPath, QConicalGradient, QPixmap
+from config import settings
+from modules.system_sampler import get_sampler
+
+# States that animate at full frame rate; anything else is "idle"
+ACTIVE_STATES = ("LISTENING", "THINKING", "SPEAKING")
+STATE_COLORS = {"LISTENING": (255, 50, 50), "THINKING": (255, 255, 0)}
+DEFAULT_COLOR = (0, 255, 255)
+
+# (radius, width, darker) of the three tech rings
+RINGS = ((100, 3, None), (120, 2, 150), (140, 1, None))
 
 class ModernHUD(QWidget):
+    """
+    The orb overlay. Glow, core and rings are drawn once per state into
+    pixmaps and only blitted (scaled/rotated) each frame; the text is
+    re-rendered only when it changes. The animation runs at full rate
+    while Cherry is active, drops to hud.idle_fps when idle (0 = static)
+    and stops completely while the window is hidden.
+    """
     def __init__(self):
         super().__init__()
         # Window Setup
@@ -41,51 +57,174 @@ class ModernHUD(QWidget):
         self.pulse = 0
         self.pulse_dir = 1
         self.glow_intensity = 0
-        
+        self.last_frame = time.monotonic()
+
+        # Render caches (built lazily: pixmaps need the screen's pixel ratio)
+        self.ai_font = QFont("Segoe UI", 12, QFont.Weight.Bold)
+        self.user_font = QFont("Segoe UI", 10)
+        self.layers = {}  # (state color, pixel ratio) -> orb pixmaps
+        self.text_layer = None
+
+        hud_cfg = settings.get('hud', {})
+        self.active_fps = hud_cfg.get('active_fps', 60)
+        self.idle_fps = hud_cfg.get('idle_fps', 8)
+
         # Timers
         self.anim_timer = QTimer()
         self.anim_timer.timeout.connect(self.animate)
-        self.anim_timer.start(16)
+        self.schedule_animation()
         
+        self.sampler = get_sampler()
         self.stats_timer = QTimer()
         self.stats_timer.timeout.connect(self.update_stats)
         self.stats_timer.start(2000)
 
     def update_stats(self):
-        self.cpu_percent = psutil.cpu_percent()
-        self.ram_percent = psutil.virtual_memory().percent
+        # Reads the shared sampler's last row; never touches psutil on the GUI thread
+        stats = self.sampler.latest()
+        if stats:
+            self.cpu_percent = stats['cpu']
+            self.ram_percent = stats['ram']
 
     def set_state(self, state):
+        if state == self.state:
+            return
         self.state = state
+        self.schedule_animation()
+        self.update()
         
     def set_text(self, user, ai):
+        if (user, ai) == (self.user_text, self.ai_text):
+            return
         self.user_text = user
         self.ai_text = ai
+        self.text_layer = None
+        self.update()
+
+    def schedule_animation(self):
+        """Picks the frame rate for the current state/visibility (0 = no timer)."""
+        fps = self.active_fps if self.state in ACTIVE_STATES else self.idle_fps
+        if not self.isVisible() or fps <= 0:
+            self.anim_timer.stop()
+            return
+        interval = max(1, int(1000 / fps))
+        if not self.anim_timer.isActive() or self.anim_timer.interval() != interval:
+            self.last_frame = time.monotonic()
+            self.anim_timer.start(interval)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.schedule_animation()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.anim_timer.stop()
 
     def animate(self):
+        # Time-based so a lower idle frame rate doesn't slow the motion down
+        now = time.monotonic()
+        steps = min(now - self.last_frame, 0.25) * 60 # In 60 fps frames
+        self.last_frame = now
+
         # Rotation speeds based on state
         speed_mult = 1.0
         if self.state == "THINKING": speed_mult = 4.0
         elif self.state == "LISTENING": speed_mult = 2.0
         
-        self.angle_1 = (self.angle_1 + 1 * speed_mult) % 360
-        self.angle_2 = (self.angle_2 - 1.5 * speed_mult) % 360
-        self.angle_3 = (self.angle_3 + 0.5 * speed_mult) % 360
+        self.angle_1 = (self.angle_1 + 1 * speed_mult * steps) % 360
+        self.angle_2 = (self.angle_2 - 1.5 * speed_mult * steps) % 360
+        self.angle_3 = (self.angle_3 + 0.5 * speed_mult * steps) % 360
         
         # Pulse Logic
         if self.state in ["LISTENING", "SPEAKING"]:
             p_speed = 0.05 if self.state == "LISTENING" else 0.08
-            self.pulse += p_speed * self.pulse_dir
+            self.pulse += p_speed * self.pulse_dir * steps
             if self.pulse > 1 or self.pulse < 0:
                 self.pulse_dir *= -1
+                self.pulse = min(max(self.pulse, 0.0), 1.0)
         else:
             self.pulse = math.sin(time.time() * 2) * 0.5 + 0.5
             
         self.update()
 
+    def new_pixmap(self, width, height, ratio):
+        pixmap = QPixmap(math.ceil(width * ratio), math.ceil(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap
+
+    def orb_layers(self):
+        """Aura, core and ring pixmaps for the current state's colour (cached)."""
+        rgb = STATE_COLORS.get(self.state, DEFAULT_COLOR)
+        ratio = self.devicePixelRatioF()
+        layers = self.layers.get((rgb, ratio))
+        if layers is not None:
+            return layers
+
+        base = QColor(*rgb)
+        # Aura and core are drawn at their largest pulse size and scaled down
+        aura_radius = (self.orb_size / 2) * 1.3
+        aura = self.new_pixmap(aura_radius * 2, aura_radius * 2, ratio)
+        gradient = QRadialGradient(aura_radius, aura_radius, aura_radius)
+        gradient.setColorAt(0, QColor(base.red(), base.green(), base.blue(), 100))
+        gradient.setColorAt(0.5, QColor(base.red(), base.green(), base.blue(), 30))
+        gradient.setColorAt(1, QColor(0, 0, 0, 0))
+        self.paint_disc(aura, aura_radius, gradient)
+
+        core_radius = 65
+        core = self.new_pixmap(core_radius * 2, core_radius * 2, ratio)
+        gradient = QRadialGradient(core_radius - 10, core_radius - 10, core_radius)
+        gradient.setColorAt(0, QColor(255, 255, 255, 255))
+        gradient.setColorAt(0.2, base)
+        gradient.setColorAt(1, base.darker(300))
+        self.paint_disc(core, core_radius, gradient)
+
+        rings = []
+        for radius, width, darker in RINGS:
+            color = base.darker(darker) if darker else base
+            rings.append(self.render_ring(radius, width, color, ratio))
+
+        layers = {"aura": aura, "core": core, "rings": rings}
+        self.layers[(rgb, ratio)] = layers
+        return layers
+
+    def paint_disc(self, pixmap, radius, gradient):
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(QBrush(gradient))
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawEllipse(QPointF(radius, radius), radius, radius)
+        painter.end()
+
+    def render_ring(self, radius, width, color, ratio):
+        """One tech ring at angle 0; painted rotated each frame."""
+        half = radius + width
+        pixmap = self.new_pixmap(half * 2, half * 2, ratio)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.draw_tech_ring(painter, half, half, radius, 0, color, width)
+        painter.end()
+        return pixmap, half
+
+    def render_text(self):
+        """Text strip below the orb; rebuilt only after set_text."""
+        ratio = self.devicePixelRatioF()
+        pixmap = self.new_pixmap(self.width, self.height - self.text_top(), ratio)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(0, -self.text_top())
+        self.draw_floating_text(painter)
+        painter.end()
+        return pixmap
+
+    def text_top(self):
+        return self.orb_size + 40
+
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        layers = self.orb_layers()
         
         # Center of the orb area
         cx = self.width / 2
@@ -93,39 +232,28 @@ class ModernHUD(QWidget):
         
         # 1. Background Glow (The 'Aura')
         glow_radius = (self.orb_size / 2) * (1.2 + 0.1 * self.pulse)
-        aura = QRadialGradient(cx, cy, glow_radius)
-        
-        base_cyan = QColor(0, 255, 255)
-        if self.state == "LISTENING":
-            base_cyan = QColor(255, 50, 50)
-        elif self.state == "THINKING":
-            base_cyan = QColor(255, 255, 0)
-        
-        aura.setColorAt(0, QColor(base_cyan.red(), base_cyan.green(), base_cyan.blue(), 100))
-        aura.setColorAt(0.5, QColor(base_cyan.red(), base_cyan.green(), base_cyan.blue(), 30))
-        aura.setColorAt(1, QColor(0, 0, 0, 0))
-        
-        painter.setBrush(QBrush(aura))
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawEllipse(QPointF(cx, cy), glow_radius, glow_radius)
+        self.blit_scaled(painter, layers["aura"], cx, cy, glow_radius)
         
         # 2. Tech Rings
-        self.draw_tech_ring(painter, cx, cy, 100, self.angle_1, base_cyan, 3)
-        self.draw_tech_ring(painter, cx, cy, 120, self.angle_2, base_cyan.darker(150), 2)
-        self.draw_tech_ring(painter, cx, cy, 140, self.angle_3, base_cyan, 1)
+        for (pixmap, half), angle in zip(layers["rings"], (self.angle_1, self.angle_2, self.angle_3)):
+            painter.save()
+            painter.translate(cx, cy)
+            painter.rotate(-angle) # drawArc angles run counter-clockwise
+            painter.drawPixmap(QPointF(-half, -half), pixmap)
+            painter.restore()
         
         # 3. The Core Orb
         core_radius = 60 + (5 * self.pulse)
-        core_grad = QRadialGradient(cx - 10, cy - 10, core_radius)
-        core_grad.setColorAt(0, QColor(255, 255, 255, 255))
-        core_grad.setColorAt(0.2, base_cyan)
-        core_grad.setColorAt(1, base_cyan.darker(300))
-        
-        painter.setBrush(QBrush(core_grad))
-        painter.drawEllipse(QPointF(cx, cy), core_radius, core_radius)
+        self.blit_scaled(painter, layers["core"], cx, cy, core_radius)
         
         # 4. Floating Text
-        self.draw_floating_text(painter)
+        if self.text_layer is None:
+            self.text_layer = self.render_text()
+        painter.drawPixmap(QPointF(0, self.text_top()), self.text_layer)
+
+    def blit_scaled(self, painter, pixmap, cx, cy, radius):
+        source = QRectF(0, 0, pixmap.width(), pixmap.height())
+        painter.drawPixmap(QRectF(cx - radius, cy - radius, radius * 2, radius * 2), pixmap, source)
 
     def draw_tech_ring(self, painter, cx, cy, radius, angle, color, width):
         pen = QPen(color)
@@ -141,7 +269,7 @@ class ModernHUD(QWidget):
 
     def draw_floating_text(self, painter):
         # AI Response below orb
-        painter.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
+        painter.setFont(self.ai_font)
         painter.setPen(QColor(0, 255, 255))
         
         # Wrap text logic or just simple clip
@@ -150,7 +278,7 @@ class ModernHUD(QWidget):
         
         # User input above or small
         if self.user_text:
-            painter.setFont(QFont("Segoe UI", 10))
+            painter.setFont(self.user_font)
             painter.setPen(QColor(200, 200, 200))
             user_rect = QRectF(50, self.orb_size + 100, self.width - 100, 30)
             painter.drawText(user_rect, Qt.AlignmentFlag.AlignCenter, f"\"{self.user_text}\"")
@@ -159,4 +287,4 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     hud = ModernHUD()
     hud.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
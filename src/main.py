@@ -1,26 +1,21 @@
 import sys
 import time
 import queue
+import threading
 import numpy as np
 import scipy.signal
 import sounddevice as sd
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QThread, pyqtSignal, QObject
 
-# Fix for ctranslate2/faster-whisper not finding CUDA libs on Windows
-import os
-import torch
-if os.name == 'nt' and torch.cuda.is_available():
-    libs_path = os.path.join(os.path.dirname(torch.__file__), 'lib')
-    if os.path.exists(libs_path):
-        os.add_dll_directory(libs_path)
-
 from modules.stt import STT
 from modules.llm import LLM
 from modules.tts import TTS
 from modules.wake_word import WakeWord
 from modules.vad import VAD
+from modules.echo import EchoCanceller
 from modules.actions import Actions
+from modules.tool_executor import ToolExecutor
 from modules.vision import Vision
 from modules.pulse import PulseWorker
 from config import settings
@@ -35,6 +30,10 @@ class CherryWorker(QThread):
         super().__init__()
         self.running = True
         self.actions = Actions()
+        # Tools run off the audio loop; slow ones report back via deliver_tool_result
+        tools_cfg = settings.get('tools', {})
+        self.tools = ToolExecutor(self.actions, max_workers=tools_cfg.get('workers', 4),
+                                  ack=tools_cfg.get('ack', "Working on it."))
         self.vision = Vision()
         self.pulse = PulseWorker()
         self.audio_queue = queue.Queue()
@@ -59,9 +58,17 @@ class CherryWorker(QThread):
         # Modules
         self.wake_word = WakeWord(keyword=settings['wake_word']['keyword'])
         self.stt = STT()
+        # Whisper loads while the rest starts up; nobody talks in the first seconds
+        threading.Thread(target=self.stt.warmup, daemon=True).start()
         self.llm = LLM()
         self.tts = TTS()
         self.vad = VAD(threshold=settings['vad']['threshold'])
+
+        # Barge-in: keep the wake word live while Cherry talks, minus her own voice
+        audio_cfg = settings.get('audio', {})
+        self.barge_in = audio_cfg.get('barge_in', True)
+        self.echo_delay = audio_cfg.get('echo_delay_ms', 10) / 1000.0
+        self.echo = EchoCanceller(partitions=audio_cfg.get('aec_partitions', 8))
         
         self.is_listening = False
         self.audio_buffer = []
@@ -96,8 +103,8 @@ class CherryWorker(QThread):
             while self.running:
                 # Process audio from the queue
                 try:
-                    audio_data = self.audio_queue.get(timeout=1)
-                    self.process_audio(audio_data)
+                    audio_data, adc_time = self.audio_queue.get(timeout=1)
+                    self.process_audio(audio_data, adc_time)
                 except queue.Empty:
                     continue
 
@@ -114,13 +121,24 @@ class CherryWorker(QThread):
         downsampled = downsampled.astype(np.float32)
         
         # Push to queue to avoid blocking the audio thread
-        self.audio_queue.put(downsampled.squeeze())
+        # (with the capture time, so the echo canceller can line up the speaker signal)
+        self.audio_queue.put((downsampled.squeeze(), time.inputBufferAdcTime))
 
-    def process_audio(self, audio_data):
-        # Prevent hearing itself
+    def cancel_echo(self, audio_data, adc_time):
+        """Removes what the speaker was playing from a mic chunk."""
+        if not adc_time: # Some host APIs don't report capture times
+            adc_time = self.tts.output_time() - len(audio_data) / self.target_rate
+        reference = self.tts.reference(adc_time - self.echo_delay, len(audio_data), self.target_rate)
+        return self.echo.process(audio_data, reference)
+
+    def process_audio(self, audio_data, adc_time=None):
         if self.tts.is_busy():
-            self.audio_buffer = []
-            return
+            if self.is_listening or not self.barge_in:
+                # Prevent hearing itself
+                self.audio_buffer = []
+                return
+            # Only the wake word runs during playback, on the echo-cancelled signal
+            audio_data = self.cancel_echo(audio_data, adc_time)
 
         # Debug: Show volume level periodically (every ~20 chunks) to verify mic
         rms = np.sqrt(np.mean(audio_data**2))
@@ -136,6 +154,9 @@ class CherryWorker(QThread):
             
             if self.wake_word.detect(audio_data):
                 print("\n[!] Wake Word Detected!")
+                if self.tts.is_busy():
+                    self.tts.stop() # Barge-in: the user gets the floor immediately
+                    self.tools.cancel_all() # ...and late tool results won't talk over them
                 self.is_listening = True
                 self.audio_buffer = [] 
                 
@@ -154,24 +175,37 @@ class CherryWorker(QThread):
                 
                 # Capture full audio
                 full_audio = np.concatenate(self.audio_buffer)
-                self.process_command(full_audio)
-                
-                self.sig_state.emit("IDLE") 
+                if not self.process_command(full_audio):
+                    self.sig_state.emit("IDLE")
+                # Otherwise IDLE is emitted once the reply has finished playing
 
     def handle_proactive_speech(self, text):
         self.sig_state.emit("SPEAKING")
         self.sig_text.emit("System Alert", text)
-        self.tts.speak(text)
-        # Return to IDLE after a delay? TTS handles speaking, but GUI might get stuck.
-        # Ideally, TTS should emit a 'finished' signal. For now, this is okay.
+        self.tts.speak(text, channel="alert", on_done=self.speech_finished)
+
+    def speech_finished(self):
+        # Runs on the audio notifier thread; Qt queues the signal to the GUI thread
+        if not self.is_listening:
+            self.sig_state.emit("IDLE")
+
+    def deliver_tool_result(self, name, result):
+        """Speaks the result of a slow tool once it's done (runs on a tool thread)."""
+        print(f"[Tools] {name}: {result}")
+        if self.is_listening:
+            return # Playback now would make process_audio drop the user's next command
+        self.sig_text.emit(f"[{name}]", str(result))
+        self.sig_state.emit("SPEAKING")
+        self.tts.speak(str(result), on_done=self.speech_finished)
 
     def process_command(self, audio_data):
+        """Handles one utterance. Returns True if a reply is being spoken."""
         self.pulse.reset_idle_timer() # Reset idle timer on activity
         text = self.stt.transcribe(audio_data)
         if not text or len(text) < 2:
             print("No speech recognized.")
             self.sig_text.emit("...", "I didn't catch that.")
-            return
+            return False
 
         print(f"User: {text}")
         
@@ -194,8 +228,10 @@ class CherryWorker(QThread):
                 func_name = tool.function.name
                 args = tool.function.arguments
                 
-                # Execute Tool
-                result = self.actions.execute_tool_call(func_name, args)
+                # Execute Tool (slow ones answer with an acknowledgement now, the result later)
+                result = self.tools.run(func_name, args, on_result=self.deliver_tool_result)
+                if result == self.tools.ack and result in final_output:
+                    continue # One "working on it" is enough
                 
                 # Generate a natural language confirmation
                 # In a full agent loop, we would feed this 'result' back to the LLM
@@ -204,7 +240,8 @@ class CherryWorker(QThread):
                 
             self.sig_text.emit(text, final_output)
             self.sig_state.emit("SPEAKING")
-            self.tts.speak(final_output)
+            self.tts.speak(final_output, on_done=self.speech_finished)
+            return True
             
         else:
             # Fallback for Text / Regex
@@ -214,11 +251,12 @@ class CherryWorker(QThread):
             else:
                 response_text = str(response)
                 
-            clean_response = self.actions.parse_and_execute(response_text)
+            clean_response = self.actions.parse_and_execute(response_text, background=self.tools.spawn)
             
             self.sig_text.emit(text, clean_response)
             self.sig_state.emit("SPEAKING")
-            self.tts.speak(clean_response)
+            self.tts.speak(clean_response, on_done=self.speech_finished)
+            return True
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
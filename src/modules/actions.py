@@ -1,13 +1,41 @@
 import os
 import subprocess
 import webbrowser
-import psutil
-import pyautogui
 import datetime
 import re
 import time
-from pytubefix import Search
 from modules.memory_vector import MemoryVector
+from modules.tool_registry import tool, ToolRegistry
+from modules.app_catalog import get_app_catalog
+from modules.system_sampler import get_sampler
+from modules.lazy import lazy_import
+
+# GUI automation and YouTube search load on first use, not at startup
+pyautogui = lazy_import("pyautogui")
+pytubefix = lazy_import("pytubefix")
+
+# Legacy inline tags the LLM may emit: tag -> (method, append its result to the reply?)
+TAG_ACTIONS = {
+    "STATS": ("get_system_stats", True),
+    "TIME": ("get_time", True),
+    "DATE": ("get_date", True),
+    "MINIMIZE": ("minimize_all", False),
+    "SCREENSHOT": ("take_screenshot", True),
+    "OPEN": ("open_app", False),
+    "SEARCH": ("search_web", False),
+    "PLAY": ("play_youtube", False),
+    "VOLUME": ("adjust_volume", False),
+    "MEDIA": ("control_media", False),
+    "LIGHTS": ("set_lights", False),
+}
+_ARG_TAGS = ("OPEN", "SEARCH", "PLAY", "VOLUME", "MEDIA", "LIGHTS")
+# One combined pattern: [TAG] or [TAG: argument]
+_TAG_PATTERN = re.compile(
+    r"\[(%s)\]|\[(%s):\s*(.*?)\]" % (
+        "|".join(tag for tag in TAG_ACTIONS if tag not in _ARG_TAGS),
+        "|".join(_ARG_TAGS)
+    )
+)
 
 class Actions:
     def __init__(self):
@@ -19,89 +47,71 @@ class Actions:
         # Initialize memory for the 'save_memory' tool
         self.memory = MemoryVector()
 
+        # Everything decorated with @tool below, keyed by name
+        self.tools = ToolRegistry(self)
+
+        # Installed apps (Start Menu / .desktop / PATH), refreshed in the background
+        self.apps = get_app_catalog()
+        # Shared CPU/RAM/battery history (also feeds the HUD and Pulse)
+        self.sampler = get_sampler()
+
     def execute_tool_call(self, tool_name, args):
         """
         Executes a function call decided by the LLM.
         """
         print(f"[Agent] Executing Tool: {tool_name} with args: {args}")
         
+        if tool_name not in self.tools:
+            return f"Error: Unknown tool '{tool_name}'"
         try:
-            if tool_name == "open_app":
-                return self.open_app(args.get("app_name"))
-            elif tool_name == "search_web":
-                return self.search_web(args.get("query"))
-            elif tool_name == "play_youtube":
-                return self.play_youtube(args.get("query"))
-            elif tool_name == "control_media":
-                return self.control_media(args.get("command"))
-            elif tool_name == "get_system_stats":
-                return self.get_system_stats()
-            elif tool_name == "save_memory":
-                self.memory.remember_fact(args.get("fact"))
-                return f"I've saved that to my long-term memory: {args.get('fact')}"
-            else:
-                return f"Error: Unknown tool '{tool_name}'"
+            return self.tools.call(tool_name, args)
         except Exception as e:
             return f"Error executing {tool_name}: {str(e)}"
 
-    def parse_and_execute(self, text):
+    def parse_and_execute(self, text, background=None):
         """
         Legacy/Fallback: Parses the LLM response, executes actions, and returns clean text.
+        All tags are handled in one regex pass, every occurrence included.
+        `background(func, *args)` runs the actions whose result isn't spoken
+        (e.g. ToolExecutor.spawn) instead of blocking here.
         """
-        if "[STATS]" in text:
-            stats = self.get_system_stats()
-            text = text.replace("[STATS]", "") + f" {stats}"
-        
-        if "[TIME]" in text:
-            text = text.replace("[TIME]", "") + f" {self.get_time()}"
-
-        if "[DATE]" in text:
-            text = text.replace("[DATE]", "") + f" {self.get_date()}"
-            
-        if "[MINIMIZE]" in text:
-            self.minimize_all()
-            text = text.replace("[MINIMIZE]", "")
-            
-        if "[SCREENSHOT]" in text:
-            result = self.take_screenshot()
-            text = text.replace("[SCREENSHOT]", "") + f" {result}"
-
-        # Regex Actions
-        match = re.search(r"\[OPEN:\s*(.*?)\]", text)
-        if match:
-            self.open_app(match.group(1))
-            text = text.replace(match.group(0), "")
-            
-        match = re.search(r"\[SEARCH:\s*(.*?)\]", text)
-        if match:
-            self.search_web(match.group(1))
-            text = text.replace(match.group(0), "")
-            
-        match = re.search(r"\[PLAY:\s*(.*?)\]", text)
-        if match:
-            self.play_youtube(match.group(1))
-            text = text.replace(match.group(0), "")
-
-        match = re.search(r"\[VOLUME:\s*(.*?)\]", text)
-        if match:
-            self.adjust_volume(match.group(1))
-            text = text.replace(match.group(0), "")
-
-        match = re.search(r"\[MEDIA:\s*(.*?)\]", text)
-        if match:
-            self.control_media(match.group(1))
-            text = text.replace(match.group(0), "")
-
-        match = re.search(r"\[LIGHTS:\s*(.*?)\]", text)
-        if match:
-            # TODO: Integrate with Phillips Hue / Home Assistant
-            print(f"[Smart Home] Executing Light Command: {match.group(1)}")
-            text = text.replace(match.group(0), "")
-            
-        return text.strip()
-
-    def open_app(self, app_name):
+        appended = []
+
+        def run_tag(match):
+            tag = match.group(1) or match.group(2)
+            method_name, speak_result = TAG_ACTIONS[tag]
+            method = getattr(self, method_name)
+            args = (match.group(3),) if match.group(2) else ()
+            if background and not speak_result:
+                background(method, *args)
+                return ""
+            try:
+                result = method(*args)
+            except Exception as e:
+                print(f"[Agent] Tag [{tag}] failed: {e}")
+                return ""
+            if speak_result:
+                appended.append(str(result))
+            return ""
+
+        text = _TAG_PATTERN.sub(run_tag, text).strip()
+        if appended:
+            text = f"{text} {' '.join(appended)}".strip()
+        return text
+
+    @tool("Opens a desktop application on the user's PC.",
+          params={"app_name": "The name of the application (e.g., 'Chrome', 'Calculator', 'Discord')."},
+          slow=True)
+    def open_app(self, app_name: str):
         """Attempts to open a common application."""
+        # Installed apps launch directly
+        try:
+            entry = self.apps.launch(app_name)
+            if entry:
+                return f"Opening {entry['name']}."
+        except Exception as e:
+            print(f"[Apps] Launch failed for '{app_name}': {e}")
+
         app_name = app_name.lower()
         if "chrome" in app_name:
             os.startfile("chrome.exe")
@@ -134,7 +144,11 @@ class Actions:
             pyautogui.press('enter')
         return f"Attempting to open {app_name}."
 
-    def control_media(self, command):
+    @tool("Controls system media playback (Play, Pause, Next, Previous).",
+          params={"command": "The media control command."},
+          enums={"command": ["play", "pause", "next", "previous", "stop"]},
+          timeout=3.0)
+    def control_media(self, command: str):
         """Controls system media playback."""
         command = command.lower()
         if "pause" in command or "play" in command:
@@ -148,29 +162,38 @@ class Actions:
             return "Going back to previous track."
         return "I couldn't understand the media command."
 
+    @tool("Checks current CPU, RAM, and Battery levels.", timeout=3.0)
     def get_system_stats(self):
-        """Returns CPU, RAM, and Battery info."""
-        cpu = psutil.cpu_percent()
-        ram = psutil.virtual_memory().percent
-        battery = psutil.sensors_battery()
+        """Returns CPU, RAM, and Battery info (CPU averaged over the last 10 seconds)."""
+        if not self.sampler.seq:
+            self.sampler.wait_for_sample(0, timeout=self.sampler.interval + 1)
+        stats = self.sampler.window_mean(10) or self.sampler.latest()
+        if stats is None:
+            return "System stats aren't available yet."
         
-        status = f"CPU usage is at {cpu}%. RAM usage is at {ram}%."
-        if battery:
-            status += f" Battery is at {battery.percent}%."
+        status = f"CPU usage is at {stats['cpu']:.0f}%. RAM usage is at {stats['ram']:.0f}%."
+        latest = self.sampler.latest()
+        if latest and latest['battery'] is not None:
+            status += f" Battery is at {latest['battery']:.0f}%."
         return status
 
-    def search_web(self, query):
+    @tool("Performs a Google search in the default browser.",
+          params={"query": "The search query."})
+    def search_web(self, query: str):
         """Opens a web browser and searches."""
         url = f"https://www.google.com/search?q={query}"
         webbrowser.open(url)
         return f"Searching for {query} on the web."
         
-    def play_youtube(self, query):
+    @tool("Searches and plays a video on YouTube.",
+          params={"query": "The video title or search term."},
+          timeout=20.0, slow=True)
+    def play_youtube(self, query: str):
         """Plays a video on YouTube."""
         try:
             print(f"Searching YouTube for: {query}")
             # Try to get the first video result
-            s = Search(query)
+            s = pytubefix.Search(query)
             results = s.videos
             if results:
                 first_video = results[0]
@@ -185,6 +208,12 @@ class Actions:
             webbrowser.open(url)
             return f"Opening YouTube search for {query}."
 
+    @tool("Saves a new fact about the user to long-term memory.",
+          params={"fact": "The fact to remember (e.g., 'User likes sushi')."})
+    def save_memory(self, fact: str):
+        self.memory.remember_fact(fact)
+        return f"I've saved that to my long-term memory: {fact}"
+
     def get_time(self):
         now = datetime.datetime.now()
         return f"It is currently {now.strftime('%I:%M %p')}."
@@ -216,6 +245,11 @@ class Actions:
             return "Muting volume."
         return "I couldn't understand the volume command."
 
+    def set_lights(self, command):
+        # TODO: Integrate with Phillips Hue / Home Assistant
+        print(f"[Smart Home] Executing Light Command: {command}")
+        return f"Setting lights: {command}."
+
 if __name__ == "__main__":
     actions = Actions()
     print(actions.get_system_stats())
@@ -0,0 +1,274 @@
+import json
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from collections import Counter
+from config import settings
+
+_NON_ALNUM = re.compile(r"[^a-z0-9+]+")
+_FIELD_CODES = re.compile(r"%[fFuUdDnNickvm]")
+_FILLER = re.compile(r"^(the|my)\s+|\s+(app|application|program)$")
+_SKIP_NAMES = re.compile(r"uninstall|readme|help|documentation|release notes", re.I)
+
+# Launcher entries beat bare executables with a similar name
+_KIND_BONUS = {"lnk": 0.05, "url": 0.05, "desktop": 0.05, "path": 0.0}
+
+def normalize_name(name):
+    name = _NON_ALNUM.sub(" ", name.lower()).strip()
+    return _FILLER.sub("", name).strip()
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def default_sources():
+    """(directory, kind, recursive) triples to index on this platform."""
+    if os.name == "nt":
+        roots = [
+            os.path.join(os.environ.get("APPDATA", ""), "Microsoft", "Windows", "Start Menu", "Programs"),
+            os.path.join(os.environ.get("PROGRAMDATA", r"C:\ProgramData"), "Microsoft", "Windows", "Start Menu", "Programs"),
+        ]
+        return [(root, "startmenu", True) for root in roots]
+
+    data_home = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    data_dirs = os.environ.get("XDG_DATA_DIRS", "/usr/local/share:/usr/share").split(":")
+    app_dirs = [os.path.join(d, "applications") for d in [data_home] + data_dirs if d]
+    app_dirs += ["/var/lib/flatpak/exports/share/applications", "/var/lib/snapd/desktop/applications"]
+    sources = [(d, "desktop", True) for d in app_dirs]
+    sources += [(d, "path", False) for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+    return sources
+
+def parse_desktop_file(path):
+    """Name/Exec of a launchable .desktop entry, or None."""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    if in_entry:
+                        break # Only the main section; actions follow it
+                    in_entry = line == "[Desktop Entry]"
+                elif in_entry and "=" in line:
+                    key, value = line.split("=", 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+
+    if fields.get("Type", "Application") != "Application":
+        return None
+    if fields.get("NoDisplay") == "true" or fields.get("Hidden") == "true":
+        return None
+    if not fields.get("Name") or not fields.get("Exec"):
+        return None
+    command = _FIELD_CODES.sub("", fields["Exec"]).replace("%%", "%").strip()
+    return {"name": fields["Name"], "kind": "desktop", "target": command}
+
+class AppCatalog:
+    """
+    Index of launchable applications: Start Menu shortcuts on Windows,
+    .desktop files and $PATH elsewhere.
+
+    The index is persisted per directory together with that directory's
+    mtime, so a refresh only re-reads directories that changed. Spoken
+    names are resolved with a trigram index (plus configured aliases) and
+    launched directly.
+    """
+    def __init__(self, path="data/app_catalog.json", aliases=None, min_score=0.5, sources=None,
+                 rescan_seconds=30):
+        self.path = path
+        self.aliases = {normalize_name(k): normalize_name(v) for k, v in (aliases or {}).items()}
+        self.min_score = min_score
+        self.rescan_seconds = rescan_seconds # Min gap between rescans triggered by a failed lookup
+        self._last_refresh = float("-inf")
+        self.sources = sources if sources is not None else default_sources()
+        self._dirs = {}  # dir -> {"mtime", "subdirs", "apps"}
+        self._lock = threading.Lock()
+        self._index = ([], {}, {}, [])  # entries, by_name, grams, gram_counts
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._dirs = json.load(f).get("dirs", {})
+            self._build_index()
+        except (OSError, ValueError):
+            self._dirs = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "dirs": self._dirs}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Apps] Could not save catalog: {e}")
+
+    def refresh(self):
+        """Rescans directories whose mtime changed. Returns how many were re-read."""
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            old = self._dirs
+            new = {}
+            rescanned = 0
+            for root, kind, recursive in self.sources:
+                stack = [root]
+                while stack:
+                    directory = stack.pop()
+                    if directory in new:
+                        continue
+                    try:
+                        mtime = os.stat(directory).st_mtime
+                    except OSError:
+                        continue
+                    entry = old.get(directory)
+                    if entry is None or entry["mtime"] != mtime:
+                        entry = self._scan_dir(directory, kind, mtime)
+                        rescanned += 1
+                    new[directory] = entry
+                    if recursive:
+                        stack.extend(entry["subdirs"])
+
+            if rescanned or new.keys() != old.keys():
+                self._dirs = new
+                self._build_index()
+                self._save()
+            entries = len(self._index[0])
+        print(f"[Apps] Catalog: {entries} apps ({rescanned} directories rescanned).")
+        return rescanned
+
+    def refresh_async(self):
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def _scan_dir(self, directory, kind, mtime):
+        apps, subdirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                for item in it:
+                    try:
+                        if item.is_dir():
+                            subdirs.append(item.path)
+                            continue
+                        app = self._read_launcher(item, kind)
+                    except OSError:
+                        continue
+                    if app and not _SKIP_NAMES.search(app["name"]):
+                        apps.append(app)
+        except OSError:
+            pass
+        return {"mtime": mtime, "subdirs": subdirs, "apps": apps}
+
+    @staticmethod
+    def _read_launcher(item, kind):
+        stem, ext = os.path.splitext(item.name)
+        ext = ext.lower()
+        if kind == "startmenu" and ext in (".lnk", ".url"):
+            return {"name": stem, "kind": ext[1:], "target": item.path}
+        if kind == "desktop" and ext == ".desktop":
+            return parse_desktop_file(item.path)
+        if kind == "path" and item.is_file() and os.access(item.path, os.X_OK):
+            return {"name": item.name, "kind": "path", "target": item.path}
+        return None
+
+    def _build_index(self):
+        entries, by_name, grams, gram_counts = [], {}, {}, []
+        for directory in self._dirs.values():
+            for app in directory["apps"]:
+                key = normalize_name(app["name"])
+                if not key:
+                    continue
+                existing = by_name.get(key)
+                if existing is not None:
+                    # Same name twice: keep the launcher over a bare executable
+                    if _KIND_BONUS[app["kind"]] > _KIND_BONUS[entries[existing]["kind"]]:
+                        entries[existing] = dict(app, key=key)
+                    continue
+                idx = len(entries)
+                entries.append(dict(app, key=key))
+                by_name[key] = idx
+                trigrams = _trigrams(key)
+                gram_counts.append(len(trigrams))
+                for gram in trigrams:
+                    grams.setdefault(gram, []).append(idx)
+        self._index = (entries, by_name, grams, gram_counts) # Swapped in one assignment
+
+    def find(self, spoken, rescan=True):
+        """
+        Best catalog entry for a spoken app name, or None. On a miss the
+        catalog is refreshed (at most every rescan_seconds; only changed
+        directories are re-read), so apps installed since startup resolve.
+        """
+        query = normalize_name(spoken)
+        query = self.aliases.get(query, query)
+        if not query:
+            return None
+        entry = self._match(query)
+        if entry is None and rescan and time.monotonic() - self._last_refresh >= self.rescan_seconds:
+            if self.refresh():
+                entry = self._match(query)
+        return entry
+
+    def _match(self, query):
+        entries, by_name, grams, gram_counts = self._index
+
+        idx = by_name.get(query)
+        if idx is not None:
+            return entries[idx]
+
+        query_grams = _trigrams(query)
+        hits = Counter()
+        for gram in query_grams:
+            hits.update(grams.get(gram, ()))
+
+        best, best_score = None, self.min_score
+        for idx, common in hits.items():
+            entry = entries[idx]
+            dice = 2 * common / (len(query_grams) + gram_counts[idx])
+            containment = common / len(query_grams)
+            score = 0.5 * dice + 0.5 * containment + _KIND_BONUS[entry["kind"]]
+            if entry["key"].startswith(query + " ") or entry["key"].endswith(" " + query):
+                score += 0.1 # "chrome" -> "google chrome"
+            if score > best_score:
+                best, best_score = entry, score
+        return best
+
+    def launch(self, spoken):
+        """Starts the best match directly. Returns the entry launched, or None."""
+        entry = self.find(spoken)
+        if entry is None:
+            return None
+        kind, target = entry["kind"], entry["target"]
+        if kind in ("lnk", "url"):
+            os.startfile(target)
+        else:
+            command = shlex.split(target) if kind == "desktop" else [target]
+            subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+        print(f"[Apps] Launched {entry['name']} ({kind})")
+        return entry
+
+    def __len__(self):
+        return len(self._index[0])
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_app_catalog():
+    """Process-wide catalog: loads the saved index at once, refreshes it in the background."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            apps_cfg = settings.get('apps', {})
+            _catalog = AppCatalog(
+                path=apps_cfg.get('catalog_path', "data/app_catalog.json"),
+                aliases=apps_cfg.get('aliases', {}),
+                min_score=apps_cfg.get('min_score', 0.5),
+                rescan_seconds=apps_cfg.get('rescan_seconds', 30)
+            )
+            _catalog.refresh_async()
+        return _catalog
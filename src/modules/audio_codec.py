@@ -0,0 +1,96 @@
+import numpy as np
+
+FORMATS = ("pcm", "opus")
+
+def pcm16(samples):
+    """Float samples -> 16-bit big-endian PCM bytes (the byte order audio/L16 specifies)."""
+    samples = np.clip(np.asarray(samples, dtype=np.float32).reshape(-1), -1.0, 1.0)
+    return (samples * 32767.0).astype('>i2').tobytes()
+
+def resample_linear(samples, src_rate, dst_rate):
+    """Cheap linear resampler (cue tones, alerts, streamed mic frames; not for music)."""
+    n_out = int(round(len(samples) * dst_rate / src_rate))
+    if n_out == 0:
+        return np.zeros(0, dtype=np.float32)
+    x_out = np.linspace(0, len(samples) - 1, n_out)
+    return np.interp(x_out, np.arange(len(samples)), samples).astype(np.float32)
+
+def mimetype(fmt, sample_rate):
+    if fmt == "opus":
+        return "audio/ogg; codecs=opus"
+    return f"audio/L16; rate={sample_rate}; channels=1"
+
+class _ChunkSink:
+    """Write-only file object for the muxer; take() hands back what was written so far."""
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class OggOpusEncoder:
+    """
+    Incremental Ogg/Opus encoder (PyAV). encode() returns whatever pages
+    are complete so far, so sentences can be sent as soon as they exist.
+    """
+    def __init__(self, sample_rate=24000, bitrate=32000):
+        import av # Optional; only needed for the Opus format
+        self._av = av
+        self.sample_rate = sample_rate
+        self._sink = _ChunkSink()
+        self._container = av.open(self._sink, mode="w", format="ogg")
+        self._stream = self._container.add_stream("libopus", rate=sample_rate)
+        self._stream.bit_rate = bitrate
+        self._stream.layout = "mono"
+        self._pts = 0
+
+    def encode(self, samples, sample_rate=None):
+        samples = np.asarray(samples, dtype=np.float32).reshape(1, -1)
+        frame = self._av.AudioFrame.from_ndarray(samples, format="flt", layout="mono")
+        frame.sample_rate = sample_rate or self.sample_rate
+        frame.pts = self._pts
+        self._pts += samples.shape[1]
+        for packet in self._stream.encode(frame):
+            self._container.mux(packet)
+        return self._sink.take()
+
+    def close(self):
+        for packet in self._stream.encode(None):
+            self._container.mux(packet)
+        self._container.close()
+        return self._sink.take()
+
+class AudioStreamEncoder:
+    """Turns a stream of float sentences into bytes in the requested format."""
+    def __init__(self, fmt="pcm", sample_rate=24000):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported audio format '{fmt}' (use one of {', '.join(FORMATS)})")
+        self.format = fmt
+        self.sample_rate = sample_rate
+        self._opus = OggOpusEncoder(sample_rate) if fmt == "opus" else None
+
+    @property
+    def mimetype(self):
+        return mimetype(self.format, self.sample_rate)
+
+    def encode(self, samples):
+        if self._opus:
+            return self._opus.encode(samples)
+        return pcm16(samples)
+
+    def close(self):
+        return self._opus.close() if self._opus else b""
@@ -0,0 +1,119 @@
+import io
+from math import gcd
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+STT_RATE = 16000 # What Whisper expects
+
+# Raw PCM mimetypes -> byte order. audio/L16 is big-endian by definition (RFC 2586).
+_RAW_PCM = {"audio/l16": ">i2", "audio/pcm": "<i2", "audio/x-raw": "<i2"}
+
+class IngestError(ValueError):
+    """Upload rejected; `status` is the HTTP code to answer with."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def _parse_mimetype(mimetype):
+    """'audio/L16; rate=16000' -> ('audio/l16', {'rate': '16000'})"""
+    parts = [p.strip() for p in (mimetype or "").split(";")]
+    params = dict(p.split("=", 1) for p in parts[1:] if "=" in p)
+    return parts[0].lower(), {k.strip().lower(): v.strip() for k, v in params.items()}
+
+def sniff(data, mimetype=""):
+    """Container from the first bytes (browsers and clients mislabel uploads)."""
+    head = data[:12]
+    if head.startswith(b"RIFF") or head.startswith(b"fLaC"):
+        return "soundfile"
+    if head.startswith(b"OggS") or head.startswith(b"\x1aE\xdf\xa3") or head[4:8] == b"ftyp":
+        return "av" # Ogg/Opus, WebM/Matroska, MP4/AAC (Safari)
+    if _parse_mimetype(mimetype)[0] in _RAW_PCM:
+        return "pcm"
+    return "av" # Let FFmpeg probe anything else
+
+class AudioIngest:
+    """
+    Turns an uploaded recording (int16 PCM, WAV/FLAC, Opus/WebM/Ogg, MP4)
+    into 16 kHz mono float32 for STT.
+
+    The output buffer is allocated once at max_seconds; decoders write
+    (and resample) straight into it and stop as soon as the limit is
+    passed, so an oversized upload is never fully decoded.
+    """
+    def __init__(self, max_seconds=30, min_seconds=0.2):
+        self.max_seconds = max_seconds
+        self.min_seconds = min_seconds
+
+    def decode(self, data, mimetype="", sample_rate=None):
+        """Returns float32 samples at STT_RATE. Raises IngestError (400/413/415)."""
+        if not data:
+            raise IngestError("Empty audio upload")
+        out = np.empty(int(self.max_seconds * STT_RATE), dtype=np.float32)
+        kind = sniff(data, mimetype)
+        try:
+            if kind == "pcm":
+                n = self._decode_pcm(data, mimetype, sample_rate, out)
+            elif kind == "soundfile":
+                n = self._decode_soundfile(data, out)
+            else:
+                n = self._decode_av(data, out)
+        except IngestError:
+            raise
+        except Exception as e:
+            raise IngestError(f"Could not decode audio ({kind}): {e}", status=415)
+
+        if n < self.min_seconds * STT_RATE:
+            raise IngestError(f"Audio too short ({n / STT_RATE:.2f}s)")
+        return out[:n]
+
+    def _too_long(self):
+        return IngestError(f"Audio longer than {self.max_seconds}s", status=413)
+
+    def _write(self, out, n, samples, rate):
+        """Resamples one block into out[n:] and returns the new length."""
+        if rate != STT_RATE:
+            g = gcd(int(rate), STT_RATE)
+            samples = resample_poly(samples, STT_RATE // g, int(rate) // g)
+        if n + len(samples) > len(out):
+            raise self._too_long()
+        out[n:n + len(samples)] = samples
+        return n + len(samples)
+
+    def _decode_pcm(self, data, mimetype, sample_rate, out):
+        base, params = _parse_mimetype(mimetype)
+        rate = int(sample_rate or params.get("rate", STT_RATE))
+        channels = int(params.get("channels", 1))
+        pcm = np.frombuffer(data, dtype=_RAW_PCM[base], count=len(data) // 2) # No copy
+        if channels > 1:
+            pcm = pcm[:len(pcm) - len(pcm) % channels].reshape(-1, channels).mean(axis=1)
+        if len(pcm) > rate * self.max_seconds:
+            raise self._too_long()
+        if rate == STT_RATE:
+            np.multiply(pcm, 1 / 32768, out=out[:len(pcm)], casting="unsafe")
+            return len(pcm)
+        return self._write(out, 0, pcm.astype(np.float32) / 32768, rate)
+
+    def _decode_soundfile(self, data, out):
+        with sf.SoundFile(io.BytesIO(data)) as f:
+            if f.frames > f.samplerate * self.max_seconds:
+                raise self._too_long() # Known from the header, before decoding
+            if f.samplerate == STT_RATE and f.channels == 1:
+                return f.read(dtype="float32", out=out[:f.frames]).shape[0]
+            samples = f.read(dtype="float32", always_2d=True).mean(axis=1)
+            return self._write(out, 0, samples, f.samplerate)
+
+    def _decode_av(self, data, out):
+        import av # Optional; only needed for compressed uploads
+        n = 0
+        with av.open(io.BytesIO(data)) as container:
+            if not container.streams.audio:
+                raise IngestError("No audio stream in upload", status=415)
+            # FFmpeg's resampler is streaming, so frames go straight into out
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=STT_RATE)
+            for frame in container.decode(container.streams.audio[0]):
+                for resampled in resampler.resample(frame):
+                    n = self._write(out, n, resampled.to_ndarray().reshape(-1), STT_RATE)
+            for resampled in resampler.resample(None):
+                n = self._write(out, n, resampled.to_ndarray().reshape(-1), STT_RATE)
+        return n
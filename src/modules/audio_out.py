@@ -0,0 +1,201 @@
+import threading
+import queue
+import time
+from collections import deque
+import numpy as np
+import sounddevice as sd
+from scipy.signal import resample_poly
+from config import settings
+from modules.audio_codec import resample_linear
+
+# Higher number wins; lower-priority channels are ducked while it plays
+PRIORITIES = {"speech": 0, "alert": 1, "cue": 2}
+
+class Voice:
+    """One buffer queued on a channel. Callbacks run on the engine's notifier thread."""
+    def __init__(self, samples, channel, on_start=None, on_done=None):
+        self.samples = samples
+        self.channel = channel
+        self.on_start = on_start
+        self.on_done = on_done
+        self.pos = 0
+
+class AudioEngine:
+    """
+    Single long-lived output stream with a small mixer.
+
+    Each channel (speech, alert, cue) plays its voices back to back; channels
+    are mixed together, and while a higher-priority channel is active the
+    lower ones are ducked. Producers hand voices over through deques
+    (append/popleft are atomic), so the audio callback never takes a lock.
+    Start/finish events carry the DAC time of the first/last sample and are
+    delivered by a notifier thread when that sample is actually heard.
+
+    The mixed output is also kept in a short ring buffer stamped with DAC
+    times, so the echo canceller can ask what was playing at any instant.
+    """
+    def __init__(self, sample_rate=24000, blocksize=480, duck_gain=0.25, device=None,
+                 reference_seconds=2.0):
+        self.sample_rate = sample_rate
+        self.duck_gain = duck_gain
+
+        self._ring = np.zeros(int(sample_rate * reference_seconds), dtype=np.float32)
+        self._written = 0            # Total samples written to the ring
+        self._anchor = (0, 0.0)      # (sample index, DAC time) of the latest block
+
+        self._incoming = deque()   # Voice objects from producers
+        self._commands = deque()   # channel names to stop
+        self._queues = {name: deque() for name in PRIORITIES} # Callback thread only
+        self._gains = {name: 1.0 for name in PRIORITIES}      # Callback thread only
+        self._events = queue.SimpleQueue()                    # (kind, voice, dac_time)
+
+        self._pending = {name: 0 for name in PRIORITIES}
+        self._pending_lock = threading.Lock()
+
+        self._notifier = threading.Thread(target=self._notify_loop, daemon=True)
+        self._notifier.start()
+
+        self.stream = sd.OutputStream(samplerate=sample_rate, blocksize=blocksize, channels=1,
+                                      dtype='float32', device=device, callback=self._callback)
+        self.stream.start()
+        print(f"[Audio] Output engine running @ {sample_rate}Hz (block {blocksize}).")
+
+    def play(self, samples, sample_rate=None, channel="speech", on_start=None, on_done=None):
+        """Queues samples on a channel. Returns immediately."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if sample_rate and sample_rate != self.sample_rate:
+            samples = resample_linear(samples, sample_rate, self.sample_rate)
+        voice = Voice(samples, channel, on_start, on_done)
+        with self._pending_lock:
+            self._pending[channel] += 1
+        self._incoming.append(voice)
+        return voice
+
+    def stop(self, channel=None):
+        """Drops everything playing or queued on a channel (all channels if None)."""
+        for name in ([channel] if channel else PRIORITIES):
+            self._commands.append(name)
+
+    def is_active(self, channel=None):
+        with self._pending_lock:
+            if channel:
+                return self._pending[channel] > 0
+            return any(self._pending.values())
+
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        out.fill(0.0)
+
+        while self._incoming:
+            voice = self._incoming.popleft()
+            self._queues[voice.channel].append(voice)
+        while self._commands:
+            name = self._commands.popleft()
+            for voice in self._queues[name]:
+                self._events.put(("cancel", voice, None))
+            self._queues[name].clear()
+
+        active = [PRIORITIES[name] for name, q in self._queues.items() if q]
+        top = max(active) if active else 0
+        block_start = time_info.outputBufferDacTime
+
+        for name, q in self._queues.items():
+            target = 1.0 if PRIORITIES[name] >= top else self.duck_gain
+            start_gain = self._gains[name]
+            self._gains[name] = target
+            if not q:
+                continue
+            # Ramp the gain across the block so ducking doesn't click
+            gain = np.linspace(start_gain, target, frames, dtype=np.float32) if start_gain != target else target
+
+            pos = 0
+            while pos < frames and q:
+                voice = q[0]
+                if voice.pos == 0:
+                    self._events.put(("start", voice, block_start + pos / self.sample_rate))
+                n = min(frames - pos, len(voice.samples) - voice.pos)
+                chunk = voice.samples[voice.pos:voice.pos + n]
+                out[pos:pos + n] += chunk * (gain[pos:pos + n] if isinstance(gain, np.ndarray) else gain)
+                voice.pos += n
+                pos += n
+                if voice.pos >= len(voice.samples):
+                    q.popleft()
+                    self._events.put(("done", voice, block_start + pos / self.sample_rate))
+
+        np.clip(out, -1.0, 1.0, out=out)
+        self._record(out, block_start)
+
+    def _record(self, out, block_start):
+        ring_len = len(self._ring)
+        pos = self._written % ring_len
+        first = min(len(out), ring_len - pos)
+        self._ring[pos:pos + first] = out[:first]
+        self._ring[:len(out) - first] = out[first:]
+        self._anchor = (self._written, block_start)
+        self._written += len(out)
+
+    def reference(self, start_time, n_samples, rate):
+        """
+        What the speaker played from `start_time` (stream clock) for
+        n_samples at `rate`. Silence where nothing was (or is not yet) known.
+        """
+        anchor_index, anchor_time = self._anchor
+        written = self._written
+        ring_len = len(self._ring)
+
+        src_n = int(np.ceil(n_samples * self.sample_rate / rate)) + 1
+        start = anchor_index + int(round((start_time - anchor_time) * self.sample_rate))
+        ref = np.zeros(src_n, dtype=np.float32)
+        lo = max(start, written - ring_len)
+        hi = min(start + src_n, written)
+        if hi > lo:
+            idx = np.arange(lo, hi) % ring_len
+            ref[lo - start:hi - start] = self._ring[idx]
+
+        if rate != self.sample_rate:
+            ref = resample_poly(ref, rate, self.sample_rate).astype(np.float32)
+        if len(ref) < n_samples:
+            ref = np.pad(ref, (0, n_samples - len(ref)))
+        return ref[:n_samples]
+
+    def time(self):
+        """Current time on the output stream's clock."""
+        return self.stream.time
+
+    def _notify_loop(self):
+        while True:
+            kind, voice, dac_time = self._events.get()
+            try:
+                if dac_time is not None:
+                    # Wait until the sample is actually coming out of the speaker
+                    delay = dac_time - self.stream.time
+                    if delay > 0:
+                        time.sleep(min(delay, 2.0))
+
+                if kind == "start":
+                    if voice.on_start:
+                        voice.on_start()
+                    continue
+
+                with self._pending_lock:
+                    self._pending[voice.channel] -= 1
+                if voice.on_done:
+                    voice.on_done()
+            except Exception as e:
+                print(f"[Audio] Callback error: {e}")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_audio_engine():
+    """Process-wide output engine, opened on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            audio_cfg = settings.get('audio', {})
+            _engine = AudioEngine(
+                sample_rate=audio_cfg.get('output_rate', 24000),
+                blocksize=audio_cfg.get('output_blocksize', 480),
+                duck_gain=audio_cfg.get('duck_gain', 0.25)
+            )
+        return _engine
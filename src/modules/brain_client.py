@@ -0,0 +1,257 @@
+import io
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from modules.local_ipc import ReplyLost
+
+class CircuitOpen(Exception):
+    """The server failed repeatedly; calls fail fast until the breaker resets."""
+
+class CircuitBreaker:
+    """
+    closed -> (N consecutive failures) -> open -> (reset_seconds) -> half-open.
+    In half-open one trial call goes through; success closes, failure re-opens.
+    """
+    def __init__(self, failures=3, reset_seconds=15.0):
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic() # Half-open: one trial per period
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print("[Brain] Server reachable again.")
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.max_failures and self.opened_at is None:
+                print(f"[Brain] {self.failures} failures in a row; pausing requests for {self.reset_seconds}s.")
+            if self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+
+class BrainClient:
+    """
+    The desktop client's link to the server. Requests run on one
+    background dispatcher thread over a pooled keep-alive session, so the
+    capture loop never blocks on the network. Requests that never reached
+    the server and 429/503 answers are retried with backoff; a circuit breaker makes an
+    offline server fail fast instead of stalling every command.
+
+    With `ipc` (a local_ipc.IPCClient, for a server on this machine)
+    utterances go over the local socket/pipe as raw int16 and HTTP is
+    only the fallback.
+    """
+    # The server answers 503 only for jobs that never started; 502/504 may
+    # come after the command already ran, so they are not retried
+    RETRY_STATUSES = (429, 503)
+
+    def __init__(self, server_url, session_id, connect_timeout=3.05, read_timeout=60,
+                 retries=2, backoff=0.5, breaker_failures=3, breaker_reset=15.0, ipc=None):
+        self.server_url = server_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self.session_id = session_id
+        self.ipc = ipc
+        self._ipc_up = None # Last known IPC state, so the fallback is only logged on change
+
+        self.session = requests.Session()
+        self.session.headers["X-Session-Id"] = session_id
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="brain")
+
+    def request(self, method, path, **kwargs):
+        """
+        One HTTP call with retries. Only failures where the server can't
+        have acted (connection refused, 429/503) are retried, so a command
+        is never executed twice. Raises CircuitOpen or requests exceptions.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen("Server offline")
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, self.server_url + path, **kwargs)
+            except requests.ConnectionError as e:
+                self.breaker.failure()
+                # A dropped connection after the body went out may have run the command
+                if not self._never_sent(e) or attempt >= self.retries or not self.breaker.allow():
+                    raise
+                delay = self.backoff * (2 ** attempt)
+            except requests.RequestException:
+                self.breaker.failure()
+                raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    self.breaker.success()
+                    return response
+                if attempt >= self.retries:
+                    self.breaker.failure()
+                    return response
+                delay = self._retry_after(response, self.backoff * (2 ** attempt))
+
+            attempt += 1
+            print(f"[Brain] Retrying {path} in {delay:.1f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+            # Any files being uploaded must be re-read from the start
+            for _, value in (kwargs.get("files") or {}).items():
+                value[1].seek(0)
+
+    @staticmethod
+    def _never_sent(error):
+        """True if the request can't have reached the server (refused, DNS, connect timeout)."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        cause = error.args[0] if error.args else None
+        cause = getattr(cause, "reason", cause) # urllib3's MaxRetryError wraps the real cause
+        return isinstance(cause, NewConnectionError)
+
+    @staticmethod
+    def _retry_after(response, default):
+        try:
+            return min(float(response.headers.get("Retry-After", default)), 10.0)
+        except ValueError:
+            return default
+
+    def status(self, timeout=2):
+        """True if /api/status answers (never raises)."""
+        try:
+            return self.request("GET", "/api/status", timeout=timeout).ok
+        except Exception:
+            return False
+
+    def wait_ready(self, timeout=120, poll=0.1, max_poll=1.0):
+        """
+        Polls /api/ready until the server reports its models loaded.
+        Starts fast and backs off, so the wait ends within ~poll of the
+        server becoming ready. Returns False on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                # Straight to the session: a booting server must not trip the breaker
+                if self.session.get(self.server_url + "/api/ready", timeout=(1, 2)).ok:
+                    self.breaker.success()
+                    return True
+            except requests.RequestException:
+                pass
+            time.sleep(poll)
+            poll = min(poll * 1.5, max_poll)
+        return False
+
+    def submit_voice(self, audio, sample_rate, on_reply, on_error):
+        """
+        Queues an utterance for the server and returns at once.
+        on_reply(transcription, reply) or on_error(kind, message) is called
+        on the dispatcher thread; kind is "not_understood", "offline" or "server".
+        """
+        self._dispatcher.submit(self._dispatch, audio, sample_rate, on_reply, on_error)
+
+    def _dispatch(self, audio, sample_rate, on_reply, on_error):
+        # Nobody waits on the future, so anything raised here would vanish
+        # and leave the HUD stuck in THINKING
+        try:
+            self._send_voice(audio, sample_rate, on_reply, on_error)
+        except Exception as e:
+            traceback.print_exc()
+            try:
+                on_error("server", str(e))
+            except Exception:
+                traceback.print_exc()
+
+    def _send_voice(self, audio, sample_rate, on_reply, on_error):
+        if self.ipc is not None and self._send_voice_ipc(audio, sample_rate, on_reply, on_error):
+            return
+
+        import soundfile as sf
+
+        # FLAC in memory: lossless and about half the size of WAV
+        mem_file = io.BytesIO()
+        sf.write(mem_file, audio, sample_rate, format='FLAC', subtype='PCM_16')
+        mem_file.seek(0)
+
+        try:
+            print("Sending audio to Brain...")
+            response = self.request("POST", "/api/voice",
+                                    files={'audio': ('command.flac', mem_file, 'audio/flac')})
+        except CircuitOpen as e:
+            on_error("offline", str(e))
+            return
+        except requests.RequestException as e:
+            print(f"Network Error: {e}")
+            on_error("offline" if isinstance(e, requests.ConnectionError) else "server", str(e))
+            return
+
+        body = response.json() if response.status_code == 200 else response.text
+        self._deliver(response.status_code, body, on_reply, on_error)
+
+    def _send_voice_ipc(self, audio, sample_rate, on_reply, on_error):
+        """
+        Local transport. Returns False when HTTP should take over: the
+        socket/pipe isn't there, or the server answered busy (it didn't act).
+        """
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+        header = {"op": "voice", "session_id": self.session_id, "sample_rate": sample_rate}
+        try:
+            reply = self.ipc.call(header, pcm)
+        except ConnectionError as e:
+            if self._ipc_up is not False:
+                print(f"[Brain] Local IPC unavailable, using HTTP: {e}")
+            self._ipc_up = False
+            return False
+        except ReplyLost as e:
+            # The server may have run the command already; don't send it twice
+            print(f"[Brain] {e}")
+            on_error("server", str(e))
+            return True
+
+        if self._ipc_up is not True:
+            print("[Brain] Using local IPC.")
+        self._ipc_up = True
+        if reply["status"] in self.RETRY_STATUSES:
+            return False # HTTP retries with backoff
+        self.breaker.success()
+        self._deliver(reply["status"], reply if reply["status"] == 200 else reply.get("error", ""),
+                      on_reply, on_error)
+        return True
+
+    def _deliver(self, status, body, on_reply, on_error):
+        """body is the reply dict on 200, else the error text."""
+        if status == 200:
+            on_reply(body.get('transcription', '(Unknown)'), body.get('response', ''))
+        elif status == 400:
+            print(f"Server (400): {body}")
+            on_error("not_understood", body)
+        else:
+            print(f"Server Error ({status}): {body}")
+            on_error("server", body)
+
+    def close(self):
+        self._dispatcher.shutdown(wait=False, cancel_futures=True)
+        if self.ipc is not None:
+            self.ipc.close()
+        self.session.close()
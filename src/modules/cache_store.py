@@ -0,0 +1,174 @@
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+
+def collapse_whitespace(text):
+    """Trimmed and single-spaced: the key normalization every cache shares."""
+    return _WHITESPACE.sub(" ", text.strip())
+
+def hash_key(text, namespace=""):
+    """sha1 of the text, scoped to a namespace (model, voice...) if one is given."""
+    key = f"{namespace}\x00{text}" if namespace else text
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+class CacheStore:
+    """
+    Key -> value cache: a bounded in-memory LRU in front of an optional
+    SQLite table (used by the embedding and TTS phrase caches).
+
+    The table is bounded too. Rows carry their last use and the least
+    recently used are evicted past max_disk_entries; rows written under
+    another namespace (old model, voice or speed) are purged on open.
+    Writes and last-use updates are batched and committed every
+    flush_every changes (and at exit), not once per put.
+    """
+    COLUMNS = ["key", "namespace", "value", "last_used"]
+
+    def __init__(self, table, namespace, encode, decode, max_entries=128, path=None,
+                 max_disk_entries=1024, flush_every=32, tag="Cache"):
+        self.table = table
+        self.namespace = namespace
+        self.encode = encode # value -> bytes
+        self.decode = decode # bytes -> value
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.flush_every = flush_every
+        self.tag = tag
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = {} # key -> (bytes, or None for a last-use update only, last_used)
+        self.hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            try:
+                self._db = self._open(path)
+                atexit.register(self.flush)
+            except Exception as e:
+                print(f"[{tag}] {table} disk store disabled: {e}")
+                self._db = None
+
+    def _open(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in db.execute(f"PRAGMA table_info({self.table})")]
+        if columns and columns != self.COLUMNS:
+            db.execute(f"DROP TABLE {self.table}") # Older layout; it's only a cache
+        db.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                   "(key TEXT PRIMARY KEY, namespace TEXT, value BLOB, last_used REAL)")
+        db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        purged = db.execute(f"DELETE FROM {self.table} WHERE namespace != ?", (self.namespace,)).rowcount
+        db.commit()
+        if purged:
+            print(f"[{self.tag}] Dropped {purged} cached {self.table} from an older model/voice.")
+        return db
+
+    def get(self, key):
+        """The cached value or None (counts a hit or miss)."""
+        with self._lock:
+            value = self._lru.get(key)
+            if value is None and self._pending.get(key, (None,))[0] is not None:
+                value = self.decode(self._pending[key][0]) # Written, not flushed yet
+                self._remember(key, value)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                self._touch(key)
+        if value is None and self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None:
+                value = self.decode(row[0])
+            with self._lock:
+                if value is not None:
+                    self._remember(key, value)
+                    self.hits += 1
+                    self._touch(key)
+                else:
+                    self.misses += 1
+        elif value is None:
+            with self._lock:
+                self.misses += 1
+        self._maybe_flush()
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._pending[key] = (self.encode(value), time.time())
+        self._maybe_flush()
+
+    def contains(self, key):
+        """Checks for an entry without touching the counters or its last use."""
+        with self._lock:
+            if key in self._lru or (self._pending.get(key, (None,))[0] is not None):
+                return True
+        if self._db is None:
+            return False
+        with self._db_lock:
+            return self._db.execute(
+                f"SELECT 1 FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone() is not None
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _touch(self, key):
+        if self._db is not None:
+            self._pending[key] = (self._pending.get(key, (None,))[0], time.time())
+
+    def _maybe_flush(self):
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Writes batched puts and last-use updates, then evicts past max_disk_entries."""
+        if self._db is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        writes = [(key, self.namespace, blob, used) for key, (blob, used) in pending.items() if blob is not None]
+        touches = [(used, key) for key, (blob, used) in pending.items() if blob is None]
+        with self._db_lock:
+            try:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, namespace, value, last_used) VALUES (?, ?, ?, ?)",
+                    writes
+                )
+                self._db.executemany(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", touches)
+                count = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+                if count > self.max_disk_entries:
+                    self._db.execute(
+                        f"DELETE FROM {self.table} WHERE key IN "
+                        f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                        (count - self.max_disk_entries,)
+                    )
+                self._db.commit()
+            except Exception as e:
+                print(f"[{self.tag}] {self.table} cache write failed: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 2) if total else 0.0
+        }
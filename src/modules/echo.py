@@ -0,0 +1,70 @@
+import numpy as np
+
+class EchoCanceller:
+    """
+    Acoustic echo canceller: partitioned-block frequency-domain NLMS
+    (overlap-save), so the filter can span a room-sized echo tail
+    (partitions * block samples) at a few FFTs per block.
+
+    process(mic, ref) returns the mic signal with the estimated echo of
+    `ref` (what the speaker was playing at the same instants) removed.
+    Adaptation pauses while the near end is much louder than the far end
+    (Geigel double-talk check) so the user's own voice doesn't detune it.
+    """
+    def __init__(self, block=256, partitions=8, mu=0.4, double_talk=1.5, eps=1e-8):
+        self.block = block
+        self.partitions = partitions
+        self.mu = mu
+        self.double_talk = double_talk
+        self.eps = eps
+        self.reset()
+
+    def reset(self):
+        n_bins = self.block + 1
+        self._weights = np.zeros((self.partitions, n_bins), dtype=np.complex64)
+        self._spectra = np.zeros((self.partitions, n_bins), dtype=np.complex64) # Newest first
+        self._power = np.full(n_bins, self.eps, dtype=np.float32)
+        self._prev_ref = np.zeros(self.block, dtype=np.float32)
+        self._ref_history = np.zeros(self.block * self.partitions, dtype=np.float32)
+
+    def process(self, mic, ref):
+        mic = np.asarray(mic, dtype=np.float32)
+        ref = np.asarray(ref, dtype=np.float32)
+        out = mic.copy()
+        usable = min(len(mic), len(ref)) // self.block * self.block
+        for start in range(0, usable, self.block):
+            end = start + self.block
+            out[start:end] = self._process_block(mic[start:end], ref[start:end])
+        return out # A trailing partial block passes through unchanged
+
+    def _process_block(self, mic, ref):
+        N = self.block
+
+        # Far-end spectrum of [previous block, this block]
+        ref_spec = np.fft.rfft(np.concatenate((self._prev_ref, ref)))
+        self._prev_ref = ref
+        self._spectra = np.roll(self._spectra, 1, axis=0)
+        self._spectra[0] = ref_spec
+        self._ref_history = np.concatenate((self._ref_history[N:], ref))
+
+        # Echo estimate: last N samples of the circular convolution are the linear part
+        echo = np.fft.irfft((self._spectra * self._weights).sum(axis=0), n=2 * N)[N:]
+        error = mic - echo
+
+        far_peak = np.abs(self._ref_history).max()
+        if far_peak < 1e-4:
+            return error # Nothing playing; nothing to learn
+        if np.abs(mic).max() > self.double_talk * far_peak:
+            return error # Near-end speech; hold the filter
+
+        # Per-bin far-end power (averaged over the filter span) normalizes the step
+        power = (np.abs(self._spectra) ** 2).mean(axis=0)
+        self._power = np.maximum(0.9 * self._power + 0.1 * power, power)
+        err_spec = np.fft.rfft(np.concatenate((np.zeros(N, dtype=np.float32), error)))
+        gradient = np.conj(self._spectra) * err_spec / (self._power + self.eps)
+
+        # Gradient constraint: keep each partition a causal N-tap filter
+        taps = np.fft.irfft(gradient, n=2 * N, axis=1)
+        taps[:, N:] = 0.0
+        self._weights += self.mu * np.fft.rfft(taps, axis=1).astype(np.complex64)
+        return error
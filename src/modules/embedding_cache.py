@@ -0,0 +1,39 @@
+import numpy as np
+
+from modules.cache_store import CacheStore, collapse_whitespace, hash_key
+
+def normalize_text(text):
+    """Canonical form used for hashing: lowercase, trimmed, single-spaced."""
+    return collapse_whitespace(text.lower())
+
+def content_hash(text, namespace=""):
+    """Stable hash of the normalized text (optionally scoped to a model name)."""
+    return hash_key(normalize_text(text), namespace)
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for sentence embeddings.
+    Hot entries live in an in-memory LRU; if a path is given, entries are
+    also persisted to a small SQLite file so restarts don't re-encode
+    (capped at max_disk_entries, vectors of other models purged).
+    """
+    def __init__(self, namespace, max_entries=2048, path=None, max_disk_entries=20000):
+        self.namespace = namespace
+        self.store = CacheStore("embeddings", namespace, lambda vec: vec.tobytes(),
+                                lambda blob: np.frombuffer(blob, dtype=np.float32),
+                                max_entries=max_entries, path=path,
+                                max_disk_entries=max_disk_entries, tag="Memory")
+
+    def key(self, text):
+        return content_hash(text, self.namespace)
+
+    def get(self, text):
+        return self.store.get(self.key(text))
+
+    def put(self, text, vec):
+        vec = np.asarray(vec, dtype=np.float32)
+        self.store.put(self.key(text), vec)
+        return vec
+
+    def stats(self):
+        return self.store.stats()
@@ -0,0 +1,130 @@
+import os
+import threading
+import numpy as np
+
+class SentenceTransformerBackend:
+    """
+    Reference backend: the full sentence-transformers + PyTorch stack.
+    torch and the model load on the first encode, not at construction.
+    """
+    def __init__(self, model_name="all-MiniLM-L6-v2", batch_size=32):
+        self.name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.name)
+        return self._model
+
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        """Encodes a list of strings into an (n, dim) float32 matrix."""
+        vecs = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+        return np.asarray(vecs, dtype=np.float32)
+
+class OnnxEmbeddingBackend:
+    """
+    MiniLM exported to ONNX (optionally int8-quantized), run with ONNX Runtime.
+    Reproduces the sentence-transformers pipeline (mean pooling over the
+    attention mask + L2 normalization) so vectors stay compatible with the
+    ones already stored in Chroma. Export with scripts/export_minilm_onnx.py.
+    """
+    def __init__(self, model_path, tokenizer_path, model_name="all-MiniLM-L6-v2",
+                 threads=None, batch_size=32, max_length=256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if not os.path.exists(model_path) or not os.path.exists(tokenizer_path):
+            raise FileNotFoundError(
+                f"ONNX embedding model not found at {model_path} "
+                f"(run scripts/export_minilm_onnx.py first)"
+            )
+
+        self.name = f"{model_name}:onnx:{os.path.basename(model_path)}"
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opts.intra_op_num_threads = threads
+            opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=opts,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts):
+        """Encodes a list of strings into an (n, dim) float32 matrix."""
+        out = []
+        for start in range(0, len(texts), self.batch_size):
+            out.append(self._encode_batch(texts[start:start + self.batch_size]))
+        return np.concatenate(out) if out else np.zeros((0, self.dim), dtype=np.float32)
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then unit length (matches MiniLM's Normalize layer)
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def create_embedding_backend(mem_cfg):
+    """
+    Builds the backend selected by the 'memory' settings section.
+    Instances are shared per configuration, so the LLM and the Actions
+    module don't each load their own copy of the model.
+    """
+    kind = mem_cfg.get('embedding_backend', 'sentence_transformers')
+    model_name = mem_cfg.get('embedding_model', 'all-MiniLM-L6-v2')
+    onnx_cfg = mem_cfg.get('onnx', {})
+    key = (kind, model_name, tuple(sorted(onnx_cfg.items())))
+
+    with _backends_lock:
+        if key in _backends:
+            return _backends[key]
+
+        if kind == "onnx":
+            try:
+                backend = OnnxEmbeddingBackend(
+                    model_path=onnx_cfg.get('model_path', "assets/models/minilm/model_int8.onnx"),
+                    tokenizer_path=onnx_cfg.get('tokenizer_path', "assets/models/minilm/tokenizer.json"),
+                    model_name=model_name,
+                    threads=onnx_cfg.get('threads'),
+                    batch_size=onnx_cfg.get('batch_size', 32)
+                )
+                print(f"[Memory] Embedding backend: ONNX Runtime ({backend.name})")
+            except Exception as e:
+                print(f"[Memory] ONNX embedding backend unavailable ({e}). Falling back to sentence-transformers.")
+                backend = SentenceTransformerBackend(model_name)
+        else:
+            backend = SentenceTransformerBackend(model_name)
+            print(f"[Memory] Embedding backend: sentence-transformers ({backend.name})")
+
+        _backends[key] = backend
+        return backend
@@ -0,0 +1,218 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+
+# Lower runs first
+PRIORITY_VOICE = 0      # Someone is waiting with the mic open
+PRIORITY_CHAT = 1       # Typed chat / TTS requests
+PRIORITY_BACKGROUND = 2 # Summaries, prewarming, anything nobody is waiting on
+
+DEFAULT_MODELS = {
+    "stt": {"concurrency": 1, "max_queue": 8, "timeout_seconds": 30},
+    "llm": {"concurrency": 1, "max_queue": 8, "timeout_seconds": 120},
+    "tts": {"concurrency": 1, "max_queue": 16, "timeout_seconds": 30},
+}
+
+class SchedulerBusy(Exception):
+    """The model's queue is full. retry_after is a guess in whole seconds."""
+    def __init__(self, model, retry_after):
+        super().__init__(f"{model} is busy, retry in {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+
+class SchedulerTimeout(TimeoutError):
+    """
+    The job didn't finish (or start) within its timeout. started is True
+    if it was already running: it can't be stopped, so it still finishes
+    (and has its side effects) in the background.
+    """
+    def __init__(self, message, started=False):
+        super().__init__(message)
+        self.started = started
+
+class _Job:
+    def __init__(self, priority, seq, func, args, kwargs, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = Future()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class ModelQueue:
+    """
+    Bounded priority queue in front of one shared model, drained by
+    `concurrency` worker threads. Jobs still queued past their deadline
+    are dropped instead of run.
+    """
+    def __init__(self, name, concurrency=1, max_queue=8, timeout_seconds=60):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.timeout = timeout_seconds
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waits = deque(maxlen=256)  # Seconds spent queued
+        self._runs = deque(maxlen=64)    # Seconds spent running
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0,
+                        "rejected": 0, "evicted": 0, "expired": 0}
+        for i in range(self.concurrency):
+            threading.Thread(target=self._worker, name=f"infer-{name}-{i}", daemon=True).start()
+
+    def submit(self, func, *args, priority=PRIORITY_CHAT, timeout=None, **kwargs):
+        """Queues a job and returns its Future. Raises SchedulerBusy when full."""
+        timeout = self.timeout if timeout is None else timeout
+        worst = None
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                # Jobs cancelled by their caller (e.g. a closed TTS stream) don't count
+                self._heap = [job for job in self._heap if not job.future.cancelled()]
+                heapq.heapify(self._heap)
+            if len(self._heap) >= self.max_queue:
+                # Full: an interactive job may bump the newest lower-priority one
+                worst = max(self._heap) if self._heap else None
+                if worst is None or worst.priority <= priority:
+                    self._counts["rejected"] += 1
+                    raise SchedulerBusy(self.name, self._retry_after())
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self._counts["evicted"] += 1
+
+            job = _Job(priority, next(self._seq), func, args, kwargs, time.monotonic() + timeout)
+            heapq.heappush(self._heap, job)
+            self._counts["submitted"] += 1
+            self._cond.notify()
+
+        if worst is not None:
+            try:
+                worst.future.set_exception(SchedulerBusy(self.name, self._retry_after()))
+            except InvalidStateError:
+                pass # Cancelled meanwhile
+        return job.future
+
+    def run(self, func, *args, priority=PRIORITY_CHAT, timeout=None, **kwargs):
+        """Submits and waits. Raises SchedulerBusy or SchedulerTimeout."""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(func, *args, priority=priority, timeout=timeout, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # concurrent.futures.TimeoutError is TimeoutError since 3.11
+            started = not self._discard(future)
+            raise SchedulerTimeout(f"{self.name} job timed out after {timeout}s", started=started) from None
+
+    def _discard(self, future):
+        """
+        Drops a still-queued job whose caller gave up (a running one can't
+        be stopped). Returns True if the job will never run.
+        """
+        with self._cond:
+            for job in self._heap:
+                if job.future is future:
+                    self._heap.remove(job)
+                    heapq.heapify(self._heap)
+                    break
+        return future.cancel()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._heap)
+                job = heapq.heappop(self._heap)
+                now = time.monotonic()
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                if now > job.deadline:
+                    self._counts["expired"] += 1
+                    expired = True
+                else:
+                    expired = False
+                    self._running += 1
+                self._waits.append(now - job.enqueued)
+
+            if expired:
+                job.future.set_exception(SchedulerTimeout(f"{self.name} job expired in the queue"))
+                continue
+
+            started = time.monotonic()
+            try:
+                result = job.func(*job.args, **job.kwargs)
+            except BaseException as e:
+                with self._cond:
+                    self._running -= 1
+                    self._counts["failed"] += 1
+                job.future.set_exception(e)
+                continue
+            with self._cond:
+                self._running -= 1
+                self._counts["completed"] += 1
+                self._runs.append(time.monotonic() - started)
+            job.future.set_result(result)
+
+    def _retry_after(self):
+        # Time for the current backlog to drain, from recent run times
+        avg_run = sum(self._runs) / len(self._runs) if self._runs else 1.0
+        backlog = len(self._heap) + self._running
+        return max(1, math.ceil(avg_run * backlog / self.concurrency))
+
+    def metrics(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            runs = list(self._runs)
+            stats = dict(self._counts)
+            stats.update({
+                "queued": len(self._heap),
+                "running": self._running,
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "retry_after": self._retry_after(),
+            })
+        stats["wait_ms_avg"] = round(1000 * sum(waits) / len(waits), 1) if waits else 0.0
+        stats["wait_ms_p95"] = round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0
+        stats["run_ms_avg"] = round(1000 * sum(runs) / len(runs), 1) if runs else 0.0
+        return stats
+
+class InferenceScheduler:
+    """
+    One ModelQueue per shared model (stt, llm, tts). Request threads go
+    through here instead of calling the models directly, so a burst of
+    requests queues (voice first) or gets a 429 instead of piling onto
+    the GPU.
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.queues = {}
+        for name in set(DEFAULT_MODELS) | set(config):
+            cfg = dict(DEFAULT_MODELS.get(name, {}), **(config.get(name) or {}))
+            self.queues[name] = ModelQueue(
+                name,
+                concurrency=cfg.get('concurrency', 1),
+                max_queue=cfg.get('max_queue', 8),
+                timeout_seconds=cfg.get('timeout_seconds', 60)
+            )
+        print("[Scheduler] " + ", ".join(f"{q.name}: {q.concurrency} worker(s), queue {q.max_queue}"
+                                         for q in self.queues.values()))
+
+    def submit(self, model, func, *args, **kwargs):
+        return self.queues[model].submit(func, *args, **kwargs)
+
+    def run(self, model, func, *args, **kwargs):
+        return self.queues[model].run(func, *args, **kwargs)
+
+    def submitter(self, model, priority=PRIORITY_CHAT):
+        """A pool.submit-style callable bound to one model and priority."""
+        return lambda func, *args: self.submit(model, func, *args, priority=priority)
+
+    def metrics(self):
+        return {name: queue.metrics() for name, queue in self.queues.items()}
@@ -0,0 +1,76 @@
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+# Seconds spent in each deferred import, filled in as they happen
+# (scripts/profile_startup.py reports these)
+import_times = {}
+
+class LazyModule:
+    """
+    Stands in for a heavy module until one of its attributes is used, so
+    `pyautogui = lazy_import("pyautogui")` costs nothing at startup and
+    the real import happens (once, thread-safely) on the first call.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    import_times[self._name] = time.perf_counter() - start
+                    print(f"[Lazy] Imported {self._name} in {import_times[self._name]:.2f}s")
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def lazy_import(name):
+    """The module itself if it's already imported, else a LazyModule."""
+    return sys.modules.get(name) or LazyModule(name)
+
+def is_available(name):
+    """True if a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Packages that ship CUDA DLLs ctranslate2 (faster-whisper) needs on Windows
+_CUDA_DLL_DIRS = (("torch", "lib"), ("nvidia.cublas", "bin"), ("nvidia.cudnn", "bin"))
+_dll_dirs_added = None
+
+def add_cuda_dll_dirs():
+    """
+    Windows only: registers the CUDA DLL folders of installed wheels.
+    Locates them with find_spec so torch is never imported just for this.
+    """
+    global _dll_dirs_added
+    if _dll_dirs_added is not None or os.name != "nt":
+        return _dll_dirs_added or []
+    _dll_dirs_added = []
+    for package, subdir in _CUDA_DLL_DIRS:
+        try:
+            spec = importlib.util.find_spec(package)
+        except (ImportError, ValueError):
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        path = os.path.join(list(spec.submodule_search_locations)[0], subdir)
+        if os.path.isdir(path):
+            os.add_dll_directory(path)
+            _dll_dirs_added.append(path)
+    return _dll_dirs_added
@@ -2,19 +2,37 @@ import ollama
 from config import settings
 from modules.memory_manager import MemoryManager
 from modules.memory_vector import MemoryVector
-from modules.tools_schema import TOOLS_SCHEMA
+from modules.memory_retention import extractive_summary
+from modules.recall_policy import RecallPolicy
+from modules.tools_schema import get_tools_schema
 import json
 
 class LLM:
-    def __init__(self, model_name=None, vision_model="llava:7b"):
+    def __init__(self, model_name=None, vision_model="llava:7b", background_submit=None):
         self.model_name = model_name if model_name else settings['llm']['model']
         self.vision_model = vision_model
+        # pool.submit-style callable for work nobody waits on (retention summaries);
+        # the server passes its inference scheduler's background queue
+        self.background_submit = background_submit
         
         # Sliding Window Memory (Short-term)
         self.memory = MemoryManager()
         
         # Vector Memory (Long-term)
         self.vector_db = MemoryVector()
+        # Keep the interactions collection bounded; old turns get merged into summaries
+        use_llm = self.vector_db.retention_cfg.get('summarizer', 'llm') == "llm"
+        self.vector_db.start_retention(summarizer=self.summarize_turns if use_llm else None)
+
+        # Decides when memory lookups are worth it and how much gets injected
+        recall_cfg = settings.get('memory', {}).get('recall', {})
+        self.recall_policy = RecallPolicy(
+            enabled=recall_cfg.get('enabled', True),
+            max_distance=recall_cfg.get('max_distance', 1.2),
+            interaction_max_distance=recall_cfg.get('interaction_max_distance', 1.1),
+            token_budget=recall_cfg.get('token_budget', 200),
+            log_every=recall_cfg.get('log_every', 20)
+        )
         
         self.base_system_prompt = """You are Cherry, a sentient digital entity living in the user's PC. 
         You are not just a tool; you have a personality. You are professional but witty.
@@ -32,61 +50,81 @@ class LLM:
         
         print(f"Brain initialized as Cherry with Core: {self.model_name} and Vision: {self.vision_model}")
 
-    def chat(self, prompt, image_data=None):
+    def chat(self, prompt, image_data=None, context=None):
         """
         Sends a prompt to the LLM and gets a response (or tool calls).
+        `context` is the conversation to continue (a ConversationContext);
+        defaults to the single local conversation.
         """
-        # 1. Recall Long-Term Memory
-        relevant_facts = self.vector_db.recall(prompt)
+        context = context or self.memory.context
+
+        # 1. Recall Long-Term Memory (skipped for commands like "pause" or "volume up")
+        relevant_facts, past_turns = self.recall_policy.gather(prompt, self.vector_db)
         context_str = "\n".join([f"- {fact}" for fact in relevant_facts])
+        history_str = "\n".join([f"- {turn}" for turn in past_turns])
         
         # 2. Construct System Prompt with Context
         current_system_prompt = self.base_system_prompt
         if context_str:
             current_system_prompt += f"\n\n**Relevant Memories:**\n{context_str}"
+        if history_str:
+            current_system_prompt += f"\n\n**Relevant Past Conversations:**\n{history_str}"
 
-        # 3. Update Memory Context
-        # We perform a trick: update the system message in the sliding window dynamically
-        if not self.memory.conversation_history:
-            self.memory.add_message("system", current_system_prompt)
-        else:
-            # Update the existing system prompt at index 0
-            self.memory.conversation_history[0]['content'] = current_system_prompt
-
-        self.memory.add_message("user", prompt)
-        messages = self.memory.get_context()
-        
-        # 4. Handle Vision
-        current_model = self.model_name
-        if image_data:
-            print(">> Engaging Vision Systems...")
-            current_model = self.vision_model
-            if messages[-1]['role'] == 'user':
-                messages[-1]['images'] = [image_data]
-            # Vision models usually don't support tools well yet, so we skip tools for vision requests
-            response = ollama.chat(model=current_model, messages=messages)
-        else:
-            # Standard Chat with Tools
-            response = ollama.chat(model=current_model, messages=messages, tools=TOOLS_SCHEMA)
+        # One turn at a time per conversation; other sessions proceed in parallel
+        with context.lock:
+            # 3. Update Memory Context
+            # We perform a trick: update the system message in the sliding window dynamically
+            context.set_system_prompt(current_system_prompt)
+            context.add_message("user", prompt)
+            messages = context.get_context()
+            
+            # 4. Handle Vision
+            current_model = self.model_name
+            if image_data:
+                print(">> Engaging Vision Systems...")
+                current_model = self.vision_model
+                if messages[-1]['role'] == 'user':
+                    messages[-1]['images'] = [image_data]
+                # Vision models usually don't support tools well yet, so we skip tools for vision requests
+                response = ollama.chat(model=current_model, messages=messages)
+            else:
+                # Standard Chat with Tools
+                response = ollama.chat(model=current_model, messages=messages, tools=get_tools_schema())
 
-        # 5. Process Response
-        message = response['message']
-        
-        # Check for Tool Calls
-        if message.get('tool_calls'):
-            print(f">> Agent decided to use tools: {len(message['tool_calls'])}")
-            # Return the tool calls directly to the controller
-            return {"type": "tool", "calls": message['tool_calls']}
-        
-        # Normal Text Response
-        reply = message['content']
-        self.memory.add_message("assistant", reply)
+            # 5. Process Response
+            message = response['message']
+            
+            # Check for Tool Calls
+            if message.get('tool_calls'):
+                print(f">> Agent decided to use tools: {len(message['tool_calls'])}")
+                # Return the tool calls directly to the controller
+                return {"type": "tool", "calls": message['tool_calls']}
+            
+            # Normal Text Response
+            reply = message['content']
+            context.add_message("assistant", reply)
         
         # Save interaction to long-term memory
         self.vector_db.store_interaction(prompt, reply)
         
         return {"type": "text", "content": reply}
 
+    def summarize_turns(self, turns):
+        """Condenses old conversation turns for the memory retention pass."""
+        transcript = "\n".join(turns)
+        try:
+            prompt = ("Summarize these past conversation turns between the user and Cherry "
+                      "in 2-3 sentences. Keep any facts or preferences about the user.\n\n"
+                      f"{transcript}")
+            generate = lambda: ollama.generate(model=self.model_name, prompt=prompt)
+            response = self.background_submit(generate).result() if self.background_submit else generate()
+            summary = response['response'].strip()
+            if summary:
+                return summary
+        except Exception as e:
+            print(f"[Memory] LLM summary failed ({e}). Using extractive summary.")
+        return extractive_summary(turns)
+
 if __name__ == "__main__":
     brain = LLM()
     print("Brain is ready.")
@@ -0,0 +1,162 @@
+import json
+import os
+import secrets
+import socket
+import tempfile
+import threading
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from urllib.parse import urlparse
+
+# Each request/response is two length-prefixed messages on the connection:
+# a JSON header, then a raw payload (int16 PCM for "voice", empty otherwise).
+# Only send_bytes/recv_bytes are used, never pickle.
+
+class ReplyLost(Exception):
+    """The request went out but the connection died (or timed out) before the reply."""
+
+def default_address():
+    """A named pipe on Windows, a Unix domain socket elsewhere."""
+    if os.name == "nt":
+        return r"\\.\pipe\cherry-brain"
+    return os.path.join(tempfile.gettempdir(), "cherry-brain.sock")
+
+def load_key(path, create=False):
+    """
+    Shared secret for the connection handshake. The server creates it;
+    a client on the same machine can read it, a remote one can't.
+    Returns None if it doesn't exist (and create is False).
+    """
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    if not create:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    key = secrets.token_bytes(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+def is_local_url(url):
+    """True if the server URL points at this machine."""
+    host = urlparse(url).hostname or ""
+    if host in ("localhost", "127.0.0.1", "::1"):
+        return True
+    try:
+        return host in (socket.gethostname(), socket.getfqdn()) or \
+            socket.gethostbyname(host).startswith("127.")
+    except OSError:
+        return False
+
+def send_message(conn, header, payload=b""):
+    conn.send_bytes(json.dumps(header).encode("utf-8"))
+    conn.send_bytes(payload)
+
+def recv_message(conn):
+    header = json.loads(conn.recv_bytes().decode("utf-8"))
+    return header, conn.recv_bytes()
+
+class IPCServer:
+    """
+    Serves handler(header, payload) -> header dict on a local socket/pipe.
+    One thread accepts, one thread per client connection (the desktop
+    client keeps a single connection open, so this stays at two).
+    """
+    def __init__(self, handler, address, authkey):
+        self.handler = handler
+        self.address = address
+        self.authkey = authkey
+        self.listener = None
+
+    def start(self):
+        if os.name != "nt" and os.path.exists(self.address):
+            os.remove(self.address) # Stale socket from a server that didn't exit cleanly
+        self.listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"[IPC] Listening on {self.address}")
+        return self
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return # Listener closed
+            except Exception as e:
+                print(f"[IPC] Rejected connection: {e}") # Wrong key, client hung up mid-handshake
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    header, payload = recv_message(conn)
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handler(header, payload)
+                except Exception as e:
+                    traceback.print_exc()
+                    reply = {"status": 500, "error": str(e)}
+                try:
+                    send_message(conn, reply)
+                except OSError:
+                    return
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+
+class IPCClient:
+    """
+    One persistent connection to an IPCServer, opened on first use and
+    reopened once if the server restarted in between. Not thread-safe;
+    BrainClient only calls it from its dispatcher thread.
+    """
+    def __init__(self, address, key_path, timeout=60):
+        self.address = address
+        self.key_path = key_path
+        self.timeout = timeout
+        self.conn = None
+
+    def call(self, header, payload=b""):
+        """
+        Returns the reply header. Raises ConnectionError if the request
+        couldn't be sent (safe to retry elsewhere), ReplyLost if it was
+        sent but no reply came back (the server may have acted on it).
+        """
+        for attempt in (0, 1):
+            try:
+                if self.conn is None:
+                    self.conn = self._connect()
+                send_message(self.conn, header, payload)
+                break
+            except (EOFError, OSError, AuthenticationError) as e:
+                self.close() # Stale connection from before a server restart: reconnect once
+                if attempt:
+                    raise ConnectionError(f"IPC unavailable: {e}") from e
+        try:
+            if not self.conn.poll(self.timeout):
+                raise TimeoutError(f"no reply within {self.timeout}s")
+            return recv_message(self.conn)[0]
+        except (EOFError, OSError) as e:
+            self.close() # A late reply would arrive out of step
+            raise ReplyLost(f"IPC reply lost: {e}") from e
+
+    def _connect(self):
+        key = load_key(self.key_path)
+        if key is None:
+            raise FileNotFoundError(f"No IPC key at {self.key_path}")
+        return Client(self.address, authkey=key)
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
@@ -1,54 +1,213 @@
+import atexit
 import json
 import os
+import threading
+
+try:
+    import orjson # Optional: much faster parsing of large snapshots
+except ImportError:
+    orjson = None
+
+def _loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _dumps(obj):
+    """Compact JSON as bytes."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class ConversationContext:
+    """
+    One conversation's sliding window of messages.
+    Hold `lock` for the duration of a turn so concurrent requests on the
+    same conversation don't interleave.
+    """
+    def __init__(self, context_limit=10):
+        self.context_limit = context_limit
+        self.history = []
+        self.lock = threading.RLock()
+
+    def add_message(self, role, content):
+        """Adds a message to the sliding window history."""
+        with self.lock:
+            self.history.append({"role": role, "content": content})
+            # Keep only the system prompt + last N messages
+            if len(self.history) > self.context_limit:
+                # Assuming index 0 is system prompt, we pop from index 1
+                if self.history[0]["role"] == "system":
+                    # Keep system prompt (index 0), remove oldest user/assistant message (index 1)
+                    self.history.pop(1)
+                else:
+                    self.history.pop(0)
+
+    def set_system_prompt(self, content):
+        """Inserts or refreshes the system message at index 0."""
+        with self.lock:
+            if self.history and self.history[0]["role"] == "system":
+                self.history[0]["content"] = content
+            else:
+                self.history.insert(0, {"role": "system", "content": content})
+
+    def get_context(self):
+        """Returns the formatted messages list for Ollama."""
+        # Inject long-term memory into the system prompt if needed
+        # For now, we just return the sliding window
+        return self.history
 
 class MemoryManager:
-    def __init__(self, memory_file="data/memory.json", context_limit=10):
+    """
+    Short-term conversation window plus a small key/value fact store.
+
+    Facts are persisted as a snapshot (memory.json) plus an append-only
+    journal (memory.journal.jsonl). Each write appends one line, fsyncs are
+    batched, and the journal is periodically folded into a new snapshot
+    with an atomic replace.
+    """
+    def __init__(self, memory_file="data/memory.json", context_limit=10,
+                 fsync_every=8, fsync_interval=2.0, compact_every=500):
         self.memory_file = memory_file
+        self.journal_file = os.path.splitext(memory_file)[0] + ".journal.jsonl"
         self.context_limit = context_limit
-        self.conversation_history = []
+        # Default conversation (desktop mode); the server keeps one per session
+        self.context = ConversationContext(context_limit)
         self.long_term_memory = {}
-        
+
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._journal = None
+        self._journal_entries = 0
+        self._unsynced = 0
+        self._fsync_timer = None
+
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.memory_file), exist_ok=True)
         self.load_memory()
+        atexit.register(self.flush)
 
     def load_memory(self):
+        # 1. Snapshot
         if os.path.exists(self.memory_file):
             try:
-                with open(self.memory_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.memory_file, 'rb') as f:
+                    data = _loads(f.read())
                     self.long_term_memory = data.get("facts", {})
             except Exception as e:
                 print(f"Error loading memory: {e}")
 
+        # 2. Replay journal on top of it
+        if os.path.exists(self.journal_file):
+            good_bytes = 0
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # Final record without its newline: the write never finished
+                            print(f"[Memory] Dropping torn journal record after {self._journal_entries} records.")
+                            break
+                        try:
+                            rec = _loads(line)
+                            if "d" in rec:
+                                self.long_term_memory.pop(rec["k"], None)
+                            else:
+                                self.long_term_memory[rec["k"]] = rec["v"]
+                        except (ValueError, TypeError, KeyError):
+                            # Torn or mangled record (crash mid-write, bad JSON shape):
+                            # cut the journal there so appends start clean
+                            print(f"[Memory] Dropping unreadable journal tail after {self._journal_entries} records.")
+                            break
+                        good_bytes += len(line)
+                        self._journal_entries += 1
+                if good_bytes < os.path.getsize(self.journal_file):
+                    with open(self.journal_file, 'r+b') as f:
+                        f.truncate(good_bytes)
+            except Exception as e:
+                print(f"Error replaying memory journal: {e}")
+
+        if self._journal_entries >= self.compact_every:
+            self.save_memory()
+
     def save_memory(self):
+        """Writes a full snapshot atomically and resets the journal."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        tmp_file = self.memory_file + ".tmp"
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(_dumps({"facts": self.long_term_memory}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.memory_file)
+
+            # Snapshot is durable; the journal can start over
+            if self._journal:
+                self._journal.close()
+            self._journal = open(self.journal_file, 'wb')
+            self._journal_entries = 0
+            self._unsynced = 0
+        except Exception as e:
+            print(f"Error saving memory: {e}")
+
+    def _append(self, record):
+        """Appends one journal record. Caller holds self._lock."""
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump({"facts": self.long_term_memory}, f, indent=4)
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'ab')
+            self._journal.write(_dumps(record) + b"\n")
+            self._journal.flush() # Survives a process crash; fsync covers power loss
+            self._journal_entries += 1
+            self._unsynced += 1
+
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+            elif self._unsynced >= self.fsync_every:
+                self._fsync()
+            elif self._fsync_timer is None:
+                self._fsync_timer = threading.Timer(self.fsync_interval, self.flush)
+                self._fsync_timer.daemon = True
+                self._fsync_timer.start()
         except Exception as e:
             print(f"Error saving memory: {e}")
 
+    def _fsync(self):
+        if self._journal and self._unsynced:
+            os.fsync(self._journal.fileno())
+            self._unsynced = 0
+
+    def flush(self):
+        """Forces pending journal writes to disk."""
+        with self._lock:
+            self._fsync_timer = None
+            try:
+                self._fsync()
+            except Exception as e:
+                print(f"Error flushing memory journal: {e}")
+
+    @property
+    def conversation_history(self):
+        return self.context.history
+
     def add_message(self, role, content):
         """Adds a message to the sliding window history."""
-        self.conversation_history.append({"role": role, "content": content})
-        # Keep only the system prompt + last N messages
-        if len(self.conversation_history) > self.context_limit:
-            # Assuming index 0 is system prompt, we pop from index 1
-            if self.conversation_history[0]["role"] == "system":
-                 # Keep system prompt (index 0), remove oldest user/assistant message (index 1)
-                self.conversation_history.pop(1)
-            else:
-                self.conversation_history.pop(0)
+        self.context.add_message(role, content)
 
     def get_context(self):
         """Returns the formatted messages list for Ollama."""
-        # Inject long-term memory into the system prompt if needed
-        # For now, we just return the sliding window
-        return self.conversation_history
+        return self.context.get_context()
 
     def remember_fact(self, key, value):
-        self.long_term_memory[key] = value
-        self.save_memory()
+        with self._lock:
+            self.long_term_memory[key] = value
+            self._append({"k": key, "v": value})
+
+    def forget_fact(self, key):
+        with self._lock:
+            if self.long_term_memory.pop(key, None) is not None:
+                self._append({"k": key, "d": 1})
 
     def recall_fact(self, key):
         return self.long_term_memory.get(key)
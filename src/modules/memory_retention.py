@@ -0,0 +1,113 @@
+import datetime
+import threading
+import time
+
+def record_time(meta):
+    """Epoch seconds of an interaction record (older records only carry the string timestamp)."""
+    meta = meta or {}
+    if "ts" in meta:
+        return float(meta["ts"])
+    try:
+        return datetime.datetime.fromisoformat(meta["timestamp"]).timestamp()
+    except (KeyError, ValueError, TypeError):
+        return 0.0
+
+def extractive_summary(turns):
+    """
+    Cheap fallback summarizer: keeps what the user said in each turn,
+    which is where the useful context usually is.
+    """
+    said = []
+    for turn in turns:
+        user_part = turn.split(" | Cherry:")[0].replace("User:", "").strip()
+        if user_part and user_part not in said:
+            said.append(user_part)
+    return "Earlier, the user talked about: " + "; ".join(said[:12])
+
+class InteractionRetention:
+    """
+    Keeps the 'interactions' collection bounded.
+    - Age limit: records older than max_age_days are dropped.
+    - Size limit: beyond max_interactions, the oldest records are dropped.
+    - Compaction: turns older than compact_after_hours are merged, in groups
+      of compact_group_size, into one summary record each.
+    Runs periodically on a background thread.
+    """
+    def __init__(self, memory, max_age_days=180, max_interactions=5000, compact_after_hours=24,
+                 compact_group_size=20, interval_minutes=30, summarizer=None):
+        self.memory = memory
+        self.max_age = max_age_days * 86400
+        self.max_interactions = max_interactions
+        self.compact_after = compact_after_hours * 3600
+        self.group_size = compact_group_size
+        self.interval = interval_minutes * 60
+        self.summarizer = summarizer or extractive_summary
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            print("[Memory] Interaction retention started.")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Short first delay so the initial pass doesn't compete with model loading
+        delay = min(60, self.interval)
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[Memory] Retention pass failed: {e}")
+
+    def run_once(self):
+        collection = self.memory.interactions
+        records = collection.get(include=["documents", "metadatas"])
+        items = sorted(
+            zip(records["ids"], records["documents"], records["metadatas"]),
+            key=lambda r: record_time(r[2])
+        )
+        now = time.time()
+
+        # 1. Age limit
+        expired = [r[0] for r in items if now - record_time(r[2]) > self.max_age]
+        items = [r for r in items if now - record_time(r[2]) <= self.max_age]
+
+        # 2. Compaction of old raw turns into summaries
+        old_turns = [r for r in items
+                     if (r[2] or {}).get("kind", "turn") == "turn"
+                     and now - record_time(r[2]) > self.compact_after]
+        merged = 0
+        for start in range(0, len(old_turns) - self.group_size + 1, self.group_size):
+            group = old_turns[start:start + self.group_size]
+            summary = self.summarizer([r[1] for r in group])
+            if not summary:
+                continue
+            self.memory.store_summary(
+                summary,
+                first_ts=record_time(group[0][2]),
+                last_ts=record_time(group[-1][2]),
+                turns=len(group)
+            )
+            collection.delete(ids=[r[0] for r in group])
+            merged += len(group)
+            merged_ids = {r[0] for r in group}
+            items = [r for r in items if r[0] not in merged_ids]
+
+        # 3. Size limit (oldest first)
+        overflow = len(items) - self.max_interactions
+        if overflow > 0:
+            expired.extend(r[0] for r in items[:overflow])
+
+        if expired:
+            collection.delete(ids=expired)
+
+        if expired or merged:
+            print(f"[Memory] Retention: merged {merged} turns, dropped {len(expired)} records, "
+                  f"{collection.count()} interactions kept.")
+        return {"merged": merged, "dropped": len(expired)}
@@ -1,65 +1,196 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
 import os
+import time
 import uuid
 import datetime
+from config import settings
+from modules.embedding_cache import EmbeddingCache, content_hash
+from modules.embeddings import create_embedding_backend
+from modules.vector_store import open_numpy_store
+from modules.memory_retention import InteractionRetention, record_time
 
 class MemoryVector:
-    def __init__(self, db_path="data/memory_db"):
+    def __init__(self, db_path=None):
         print("Initializing Vector Memory (The Soul)...")
-        # Initialize ChromaDB (Persistent)
-        os.makedirs(db_path, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=db_path)
-        
+        mem_cfg = settings.get('memory', {})
+
+        # Storage backend: ChromaDB (default) or the NumPy memory-mapped index
+        if mem_cfg.get('store', 'chroma') == "numpy":
+            db_path = db_path or mem_cfg.get('numpy_path', "data/memory_np")
+            self.client = open_numpy_store(db_path, dtype=mem_cfg.get('numpy_dtype', "float32"))
+        else:
+            import chromadb
+            db_path = db_path or mem_cfg.get('db_path', "data/memory_db")
+            # Initialize ChromaDB (Persistent)
+            os.makedirs(db_path, exist_ok=True)
+            self.client = chromadb.PersistentClient(path=db_path)
+
         # Initialize Embedding Model (MiniLM is fast and good enough)
-        self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
-        
+        # Backend is pluggable: sentence-transformers or ONNX Runtime (see embeddings.py)
+        self.encoder = create_embedding_backend(mem_cfg)
+
+        # Identical strings (repeated queries, re-saved facts) skip the encoder
+        self.embedding_cache = EmbeddingCache(
+            namespace=self.encoder.name,
+            max_entries=mem_cfg.get('embedding_cache_size', 2048),
+            path=mem_cfg.get('embedding_cache_path'),
+            max_disk_entries=mem_cfg.get('embedding_cache_disk_entries', 20000)
+        )
+        # Squared L2 distance under which a new fact counts as a near-duplicate
+        # (MiniLM vectors are unit length, so 0.1 ~= cosine similarity 0.95)
+        self.dedup_distance = mem_cfg.get('dedup_distance', 0.1)
+
         # Create or Get Collections
         self.facts = self.client.get_or_create_collection(name="user_facts")
         self.interactions = self.client.get_or_create_collection(name="interactions")
-        
+
+        self.retention_cfg = mem_cfg.get('retention', {})
+        self.retention = None
+
         print("Vector Memory Online.")
 
+    def embed(self, text):
+        """Returns the embedding for text, hitting the encoder only on a cache miss."""
+        vec = self.embedding_cache.get(text)
+        if vec is None:
+            vec = self.embedding_cache.put(text, self.encoder.encode([text])[0])
+        return vec
+
+    def embed_many(self, texts):
+        """Batched version of embed(); only cache misses go to the encoder."""
+        vecs = [self.embedding_cache.get(t) for t in texts]
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        if missing:
+            encoded = self.encoder.encode([texts[i] for i in missing])
+            for i, vec in zip(missing, encoded):
+                vecs[i] = self.embedding_cache.put(texts[i], vec)
+        return vecs
+
     def remember_fact(self, text, category="general"):
-        """Stores a permanent fact about the user or world."""
-        # Embed
-        embedding = self.encoder.encode(text).tolist()
-        
-        # Store
-        self.facts.add(
+        """
+        Stores a permanent fact about the user or world.
+        Facts are keyed by a hash of their normalized text, so re-saving the
+        same fact updates it in place. Near-duplicates are skipped.
+        Returns the id of the stored (or already existing) fact.
+        """
+        fact_id = f"fact-{content_hash(text)}"
+        embedding = self.embed(text).tolist()
+
+        existing = self.facts.get(ids=[fact_id])
+        if not existing['ids'] and self.facts.count() > 0:
+            nearest = self.facts.query(query_embeddings=[embedding], n_results=1)
+            if nearest['ids'] and nearest['ids'][0]:
+                distance = nearest['distances'][0][0]
+                if distance <= self.dedup_distance:
+                    print(f"[Memory] Skipped near-duplicate fact: {text} "
+                          f"(matches: {nearest['documents'][0][0]}, d={distance:.3f})")
+                    return nearest['ids'][0][0]
+
+        # Store (upsert refreshes the timestamp of an exact duplicate)
+        self.facts.upsert(
             documents=[text],
             metadatas=[{"category": category, "timestamp": str(datetime.datetime.now())}],
-            ids=[str(uuid.uuid4())],
+            ids=[fact_id],
             embeddings=[embedding]
         )
         print(f"[Memory] Stored fact: {text}")
+        return fact_id
 
     def store_interaction(self, user_text, assistant_text):
         """Stores a conversation turn for context."""
         text = f"User: {user_text} | Cherry: {assistant_text}"
-        embedding = self.encoder.encode(text).tolist()
-        
+        embedding = self.embed(text).tolist()
+        now = datetime.datetime.now()
+
         self.interactions.add(
             documents=[text],
-            metadatas=[{"timestamp": str(datetime.datetime.now())}],
+            metadatas=[{"timestamp": str(now), "ts": now.timestamp(), "kind": "turn"}],
             ids=[str(uuid.uuid4())],
             embeddings=[embedding]
         )
 
-    def recall(self, query, n_results=3):
-        """Retrieves relevant facts or past interactions."""
-        embedding = self.encoder.encode(query).tolist()
-        
+    def store_summary(self, text, first_ts, last_ts, turns):
+        """Stores a compacted summary of several old turns (written by the retention pass)."""
+        embedding = self.embed(text).tolist()
+        self.interactions.upsert(
+            documents=[text],
+            metadatas=[{
+                "timestamp": str(datetime.datetime.fromtimestamp(last_ts)),
+                "ts": last_ts,
+                "first_ts": first_ts,
+                "kind": "summary",
+                "turns": turns
+            }],
+            ids=[f"summary-{content_hash(text)}"],
+            embeddings=[embedding]
+        )
+
+    def start_retention(self, summarizer=None):
+        """Starts the background age/size limits and compaction for interactions."""
+        cfg = self.retention_cfg
+        if not cfg.get('enabled', True) or self.retention is not None:
+            return
+        self.retention = InteractionRetention(
+            self,
+            max_age_days=cfg.get('max_age_days', 180),
+            max_interactions=cfg.get('max_interactions', 5000),
+            compact_after_hours=cfg.get('compact_after_hours', 24),
+            compact_group_size=cfg.get('compact_group_size', 20),
+            interval_minutes=cfg.get('interval_minutes', 30),
+            summarizer=summarizer
+        )
+        self.retention.start()
+
+    def recall(self, query, n_results=3, max_distance=None):
+        """Retrieves relevant facts, optionally dropping matches beyond max_distance."""
+        embedding = self.embed(query).tolist()
+
         results = self.facts.query(
             query_embeddings=[embedding],
             n_results=n_results
         )
-        
+
         if results['documents'] and results['documents'][0]:
-            return results['documents'][0] # Return list of matched strings
+            docs = results['documents'][0] # Return list of matched strings
+            if max_distance is not None:
+                docs = [doc for doc, dist in zip(docs, results['distances'][0]) if dist <= max_distance]
+            return docs
         return []
 
+    def recall_interactions(self, query, n_results=2, candidates=10, max_distance=None):
+        """
+        Retrieves past conversation turns/summaries, ranked by similarity
+        decayed by age (half-life from memory.retention.half_life_days).
+        """
+        count = self.interactions.count()
+        if count == 0:
+            return []
+
+        embedding = self.embed(query).tolist()
+        results = self.interactions.query(
+            query_embeddings=[embedding],
+            n_results=min(candidates, count)
+        )
+        if not results['documents'] or not results['documents'][0]:
+            return []
+
+        half_life = self.retention_cfg.get('half_life_days', 14) * 86400
+        # Very recent turns are already in the sliding window; don't repeat them
+        min_age = self.retention_cfg.get('recall_min_age_minutes', 15) * 60
+        now = time.time()
+        scored = []
+        for doc, meta, dist in zip(results['documents'][0], results['metadatas'][0], results['distances'][0]):
+            if now - record_time(meta) < min_age:
+                continue
+            if max_distance is not None and dist > max_distance:
+                continue
+            similarity = 1.0 - dist / 2.0 # Unit vectors: squared L2 -> cosine
+            decay = 0.5 ** (max(0.0, now - record_time(meta)) / half_life)
+            scored.append((similarity * decay, doc))
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [doc for _, doc in scored[:n_results]]
+
 if __name__ == "__main__":
     mem = MemoryVector()
     mem.remember_fact("The user is a software engineer using Python.")
     print(mem.recall("What does the user do?"))
+    print(f"Embedding cache: {mem.embedding_cache.stats()}")
@@ -1,47 +1,59 @@
 import threading
 import time
-import psutil
-import datetime
 from PyQt6.QtCore import QThread, pyqtSignal
+from config import settings
+from modules.system_sampler import get_sampler
+from modules.pulse_rules import RuleEngine, DEFAULT_RULES
 
 class PulseWorker(QThread):
     """
     The 'Pulse' thread monitors system state and user inactivity.
     It gives Cherry the ability to speak proactively.
+
+    Triggers are declarative rules (settings.pulse.rules) evaluated over
+    the shared sampler. Instead of polling on a fixed beat the thread
+    sleeps until the earliest moment any rule could fire, or until
+    activity/stop wakes it.
     """
     sig_proactive_speech = pyqtSignal(str) # Emits message for TTS
-    
-    def __init__(self, idle_threshold_minutes=30):
+
+    def __init__(self, idle_threshold_minutes=None):
         super().__init__()
         self.running = True
-        self.idle_threshold = idle_threshold_minutes * 60
         self.last_activity_time = time.time()
         self.last_speech_time = time.time()
-        
+        self.sampler = get_sampler()
+        self._wake = threading.Event()
+
+        pulse_cfg = settings.get('pulse', {})
+        rules = [dict(rule) for rule in pulse_cfg.get('rules') or DEFAULT_RULES]
+        if idle_threshold_minutes is not None:
+            for rule in rules:
+                if rule.get('metric') == 'idle_minutes':
+                    rule['above'] = idle_threshold_minutes
+        self.engine = RuleEngine(rules, self.sampler, extra_metrics=self.idle_metrics,
+                                 max_sleep=pulse_cfg.get('max_sleep_seconds', 600))
+
+    def idle_metrics(self):
+        # "Idle" is time since the last voice command; real idle detection
+        # would need OS input hooks
+        return {"idle_minutes": (time.time() - self.last_activity_time) / 60}
+
     def run(self):
-        print("[Pulse] Background Monitor Started.")
+        print(f"[Pulse] Background Monitor Started ({len(self.engine.rules)} rules).")
+        # Let the first sample land so rules don't see an empty sampler
+        self.sampler.wait_for_sample(0, timeout=self.sampler.interval * 2)
         while self.running:
             try:
-                # Check System Stats
-                battery = psutil.sensors_battery()
-                
-                # Proactive Trigger 1: Low Battery
-                if battery and battery.percent < 20 and not battery.power_plugged:
-                    if time.time() - self.last_speech_time > 300: # Don't spam (5 min cooldown)
-                        self.trigger_speech("Sir, battery levels are critical. Please connect a power source.")
-
-                # Proactive Trigger 2: High CPU (Thermal Warning)
-                # (Skipped for now to avoid false positives during gaming)
-
-                # Update Idle Timer (This is a simplified idle check; 
-                # real idle check requires hooking into OS input events which is complex)
-                # For now, we simulate "idle" as "Time since last Voice Command"
-                
-                # Check Loop Speed
-                time.sleep(10) 
+                fired, sleep = self.engine.step()
+                for rule, value in fired:
+                    print(f"[Pulse] Rule '{rule.name}' fired (value={value:.1f}).")
+                    self.trigger_speech(rule.format(value))
             except Exception as e:
                 print(f"[Pulse] Error: {e}")
-                time.sleep(60)
+                sleep = 60
+            self._wake.wait(sleep)
+            self._wake.clear()
 
     def trigger_speech(self, text):
         print(f"[Pulse] Triggering Proactive Speech: {text}")
@@ -50,3 +62,8 @@ class PulseWorker(QThread):
 
     def reset_idle_timer(self):
         self.last_activity_time = time.time()
+        self._wake.set() # Re-arms the idle rule and reschedules
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
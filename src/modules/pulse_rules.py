@@ -0,0 +1,150 @@
+import math
+import time
+
+# Used when settings.pulse.rules is missing
+DEFAULT_RULES = [
+    {
+        "name": "low_battery",
+        "metric": "battery", "below": 20, "clear": 25,
+        "when": {"plugged": 0},
+        "cooldown_minutes": 5,
+        "max_rate": 2, # %/min; a laptop can't drain faster than this
+        "message": "Sir, battery levels are critical. Please connect a power source."
+    },
+    {
+        "name": "high_cpu",
+        "metric": "cpu", "above": 90, "clear": 70,
+        "window_seconds": 60, # Sustained load only, not a compile spike
+        "cooldown_minutes": 30,
+        "max_rate": 100, # A 60s mean moves at most 100 points per minute
+        "message": "CPU usage has been above {value:.0f}% for the last minute."
+    },
+    {
+        "name": "idle",
+        "metric": "idle_minutes", "above": 30, "clear": 1,
+        "cooldown_minutes": 120,
+        "max_rate": 1,
+        "message": "It's been quiet for a while. Let me know if you need anything."
+    },
+]
+
+class Rule:
+    """
+    One proactive trigger: fires when `metric` goes above/below a threshold
+    (optionally held for hold_seconds, averaged over window_seconds, and
+    only while the `when` metrics match).
+    After firing it is disarmed until the value crosses back over `clear`
+    (hysteresis), and it stays silent for cooldown_minutes either way.
+    max_rate (units per minute) bounds how fast the metric can move, which
+    lets the scheduler sleep until the rule could possibly fire.
+    """
+    def __init__(self, name, metric, above=None, below=None, clear=None, when=None,
+                 hold_seconds=0, window_seconds=0, cooldown_minutes=5, max_rate=None, message=""):
+        if (above is None) == (below is None):
+            raise ValueError(f"Rule '{name}' needs exactly one of 'above' or 'below'")
+        self.name = name
+        self.metric = metric
+        self.above = above
+        self.below = below
+        self.threshold = above if above is not None else below
+        self.clear = clear if clear is not None else self.threshold
+        self.when = when or {}
+        self.hold = hold_seconds
+        self.window = window_seconds
+        self.cooldown = cooldown_minutes * 60
+        self.max_rate = max_rate
+        self.message = message
+
+        self.armed = True
+        self.since = None # When the condition started holding
+        self.last_fired = -math.inf
+
+    def triggered(self, value):
+        return value > self.above if self.above is not None else value < self.below
+
+    def cleared(self, value):
+        return value <= self.clear if self.above is not None else value >= self.clear
+
+    def seconds_to_reach(self, value, target, min_delay):
+        """Earliest time the metric could move from value to target."""
+        if self.max_rate is None:
+            return min_delay
+        return max(min_delay, abs(target - value) / self.max_rate * 60)
+
+    def evaluate(self, value, context, now, min_delay, max_delay):
+        """Returns (fire?, seconds until this rule is worth checking again)."""
+        if value is None:
+            return False, max_delay # Metric not available (e.g. no battery)
+
+        if not self.armed:
+            if self.cleared(value):
+                self.armed = True
+            else:
+                return False, self.seconds_to_reach(value, self.clear, min_delay)
+
+        if not self.triggered(value):
+            self.since = None
+            return False, self.seconds_to_reach(value, self.threshold, min_delay)
+
+        if any(context.get(key) != expected for key, expected in self.when.items()):
+            self.since = None
+            return False, min_delay # Could change any moment (e.g. unplugged)
+
+        if self.since is None:
+            self.since = now
+        if now - self.since < self.hold:
+            return False, max(min_delay, self.since + self.hold - now)
+
+        cooldown_left = self.last_fired + self.cooldown - now
+        if cooldown_left > 0:
+            return False, max(min_delay, cooldown_left)
+
+        self.last_fired = now
+        self.armed = False
+        self.since = None
+        return True, self.seconds_to_reach(value, self.clear, min_delay)
+
+    def format(self, value):
+        try:
+            return self.message.format(value=value, name=self.name)
+        except (KeyError, IndexError, ValueError):
+            return self.message
+
+class RuleEngine:
+    """
+    Evaluates rules against the shared sampler (plus extra metrics like
+    idle time) and works out how long the caller can sleep before any
+    rule could possibly fire.
+    """
+    def __init__(self, rules, sampler, extra_metrics=None, max_sleep=600):
+        self.rules = [rule if isinstance(rule, Rule) else Rule(**rule) for rule in rules]
+        self.sampler = sampler
+        self.extra_metrics = extra_metrics or (lambda: {})
+        self.max_sleep = max_sleep
+        self.evaluations = 0
+
+    def _metrics(self, windows):
+        latest = dict(self.sampler.latest() or {})
+        latest.update(self.extra_metrics())
+        means = {w: (self.sampler.window_mean(w) or {}) for w in windows}
+        return latest, means
+
+    def step(self, now=None):
+        """Returns ([(rule, value), ...] that fired, seconds to sleep)."""
+        now = now if now is not None else time.time()
+        self.evaluations += 1
+        min_delay = self.sampler.interval
+        latest, means = self._metrics({rule.window for rule in self.rules if rule.window})
+
+        fired = []
+        sleep = self.max_sleep
+        for rule in self.rules:
+            if rule.window and rule.metric in means[rule.window]:
+                value = means[rule.window][rule.metric]
+            else:
+                value = latest.get(rule.metric)
+            fire, delay = rule.evaluate(value, latest, now, min_delay, self.max_sleep)
+            if fire:
+                fired.append((rule, value))
+            sleep = min(sleep, delay)
+        return fired, max(min_delay, sleep)
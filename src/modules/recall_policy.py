@@ -0,0 +1,105 @@
+import re
+
+# First words that mark an utterance as a device/media command, not a conversation
+COMMAND_VERBS = {
+    "pause", "play", "resume", "stop", "next", "skip", "previous", "back",
+    "volume", "mute", "unmute", "louder", "quieter", "open", "launch", "start",
+    "close", "quit", "minimize", "maximize", "screenshot", "search", "google",
+    "lights", "turn", "set", "cancel", "shut", "lock",
+}
+# Short social noise that never benefits from memory
+FILLERS = {
+    "yes", "no", "ok", "okay", "thanks", "thank you", "cool", "nice", "great",
+    "hi", "hello", "hey", "bye", "goodbye", "never mind", "nevermind",
+}
+# Anything that refers to the user, the past, or preferences should recall
+MEMORY_CUES = re.compile(
+    r"\b(my|mine|me|i|i'm|i've|we|our|remember|remind|favou?rite|prefer|like|love|hate|"
+    r"last time|before|earlier|yesterday|you said|told you|who am)\b"
+)
+CLOCK_QUERIES = re.compile(r"^(what('?s| is)? (the )?)?(time|date|day)( is it)?( today| now)?$")
+_PUNCT = re.compile(r"[^\w\s']")
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English)."""
+    return max(1, len(text) // 4)
+
+class RecallPolicy:
+    """
+    Decides whether a prompt is worth a memory lookup and trims what gets
+    injected: a cheap keyword classifier skips command-like utterances,
+    distance cutoffs drop weak matches, and a token budget caps the total.
+    Keeps hit/miss counters and logs them every log_every prompts.
+    """
+    def __init__(self, enabled=True, max_distance=1.2, interaction_max_distance=1.1,
+                 token_budget=200, max_command_words=6, log_every=20):
+        self.enabled = enabled
+        self.max_distance = max_distance
+        self.interaction_max_distance = interaction_max_distance
+        self.token_budget = token_budget
+        self.max_command_words = max_command_words
+        self.log_every = log_every
+
+        self.prompts = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self.injected_tokens = 0
+
+    def should_recall(self, prompt):
+        text = _PUNCT.sub("", prompt.lower()).strip()
+        if not text or text in FILLERS:
+            return False
+        if MEMORY_CUES.search(text):
+            return True
+        words = text.split()
+        if words[0] in COMMAND_VERBS and len(words) <= self.max_command_words:
+            return False
+        if CLOCK_QUERIES.match(text):
+            return False
+        return True
+
+    def gather(self, prompt, vector_db):
+        """Returns (facts, past_turns) to inject for this prompt."""
+        self.prompts += 1
+        facts, past = [], []
+
+        if not self.enabled or self.should_recall(prompt):
+            facts = vector_db.recall(prompt, max_distance=self.max_distance)
+            past = vector_db.recall_interactions(prompt, max_distance=self.interaction_max_distance)
+            facts, past = self._fit_budget(facts, past)
+            if facts or past:
+                self.hits += 1
+            else:
+                self.misses += 1
+        else:
+            self.skipped += 1
+
+        if self.log_every and self.prompts % self.log_every == 0:
+            print(f"[Recall] {self.stats()}")
+        return facts, past
+
+    def _fit_budget(self, facts, past):
+        """Facts first (most specific), then past conversations, until the budget runs out."""
+        budget = self.token_budget
+        kept = ([], [])
+        for bucket, docs in zip(kept, (facts, past)):
+            for doc in docs:
+                cost = estimate_tokens(doc)
+                if cost > budget:
+                    break
+                bucket.append(doc)
+                budget -= cost
+                self.injected_tokens += cost
+        return kept
+
+    def stats(self):
+        looked_up = self.hits + self.misses
+        return {
+            "prompts": self.prompts,
+            "skipped": self.skipped,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / looked_up, 2) if looked_up else 0.0,
+            "avg_injected_tokens": round(self.injected_tokens / looked_up, 1) if looked_up else 0.0
+        }
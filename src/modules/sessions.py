@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+from modules.memory_manager import ConversationContext
+
+class SessionStore:
+    """
+    Conversation contexts keyed by client/session id.
+    Held in an LRU capped at max_sessions; sessions idle for longer than
+    idle_timeout seconds are dropped. Models stay shared, only the
+    (small) message windows are per session.
+    """
+    def __init__(self, context_limit=10, max_sessions=64, idle_timeout=1800):
+        self.context_limit = context_limit
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict() # id -> (context, last_used)
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Returns the context for session_id, creating it if needed."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                context = ConversationContext(self.context_limit)
+                print(f"[Sessions] New session: {session_id} ({len(self._sessions) + 1} active)")
+            else:
+                context = entry[0]
+            self._sessions[session_id] = (context, now)
+            self._sessions.move_to_end(session_id)
+
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                print(f"[Sessions] Evicted least recently used session: {evicted}")
+            return context
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire(self, now):
+        # Oldest entries sit at the front, so stop at the first fresh one
+        while self._sessions:
+            session_id, (_, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            print(f"[Sessions] Expired idle session: {session_id}")
+
+    def __len__(self):
+        return len(self._sessions)
@@ -1,20 +1,34 @@
-import os
-import torch
-
-if os.name == 'nt' and torch.cuda.is_available():
-    libs_path = os.path.join(os.path.dirname(torch.__file__), 'lib')
-    if os.path.exists(libs_path):
-        os.add_dll_directory(libs_path)
-
-from faster_whisper import WhisperModel
+import threading
 import numpy as np
+from modules.lazy import add_cuda_dll_dirs
 
 class STT:
+    """
+    faster-whisper speech-to-text. The model (and faster_whisper/CUDA
+    themselves) load on the first transcribe() or an explicit warmup(),
+    so constructing an STT is free.
+    """
     def __init__(self, model_size="base.en"):
+        self.model_size = model_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def _load(self):
         print(f"Initializing Main Speech-to-Text (STT) Engine...")
-        
+        add_cuda_dll_dirs() # ctranslate2 needs the CUDA DLLs on Windows
+        import ctranslate2
+        from faster_whisper import WhisperModel
+
         # Use CUDA for RTX 4050 speed
-        if torch.cuda.is_available():
+        if ctranslate2.get_cuda_device_count() > 0:
             device = "cuda"
             compute_type = "float16"
             print(">> STT using GPU (CUDA) for high-speed transcription.")
@@ -22,16 +36,22 @@ class STT:
             device = "cpu"
             compute_type = "int8"
             print(">> STT using CPU (GPU not found).")
-            
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+
+        model = WhisperModel(self.model_size, device=device, compute_type=compute_type)
         print("STT initialized successfully.")
+        return model
+
+    def warmup(self):
+        """Loads the model and runs it once so the first real request isn't slow."""
+        self.transcribe(np.zeros(16000, dtype=np.float32))
+        return self
 
     def transcribe(self, audio_data):
         """
         Transcribes audio data to text.
-        
+
         Args:
-            audio_data: Can be a file path (str), a binary file-like object (BytesIO), 
+            audio_data: Can be a file path (str), a binary file-like object (BytesIO),
                         or a numpy array (np.ndarray).
         """
         # Reduced beam_size from 5 to 1 for speed
@@ -41,5 +61,5 @@ class STT:
 
 if __name__ == "__main__":
     # Quick test if run directly
-    stt = STT()
+    stt = STT().warmup()
     print("STT is ready.")
@@ -0,0 +1,137 @@
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+from modules.lazy import lazy_import
+from modules.tts_cache import PhraseCache, model_version
+
+kokoro_onnx = lazy_import("kokoro_onnx") # Imported when a Synthesizer is built
+
+SAMPLE_RATE = 24000 # Kokoro's output rate
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?;:])\s+|\n+')
+
+def split_sentences(text, min_chars=12):
+    """
+    Splits text into speakable segments at sentence boundaries.
+    Very short pieces ("Sure.", "Dr.") are merged into the next one so
+    Kokoro gets enough context for natural prosody.
+    """
+    segments = []
+    pending = ""
+    for piece in _SENTENCE_BREAK.split(text.strip()):
+        piece = piece.strip()
+        if not piece:
+            continue
+        pending = f"{pending} {piece}" if pending else piece
+        if len(pending) >= min_chars:
+            segments.append(pending)
+            pending = ""
+    if pending:
+        if segments and len(pending) < min_chars // 2:
+            segments[-1] = f"{segments[-1]} {pending}"
+        else:
+            segments.append(pending)
+    return segments
+
+class Synthesizer:
+    """
+    Kokoro text-to-speech without any playback attached: sentence
+    splitting, the phrase cache and a small synthesis pool. Used by the
+    local TTS player and by the server's streaming endpoints.
+    """
+    def __init__(self, model_path, voices_path, voice_name, speed=1.0, workers=1, cache_cfg=None):
+        if not os.path.exists(model_path) or not os.path.exists(voices_path):
+            raise FileNotFoundError(f"Kokoro model files not found at {model_path}")
+
+        self.kokoro = kokoro_onnx.Kokoro(model_path, voices_path)
+        self.voice_name = voice_name
+        self.speed = speed
+        # Segment N+1 is synthesized while segment N plays. One worker is
+        # enough to hide synthesis behind playback; more help on long answers.
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-synth")
+        self.lookahead = workers + 1
+
+        cache_cfg = cache_cfg or {}
+        self.cache = None
+        if cache_cfg.get('enabled', True):
+            self.cache = PhraseCache(
+                voice_name, speed,
+                version=model_version(model_path, voices_path),
+                max_entries=cache_cfg.get('max_entries', 128),
+                max_chars=cache_cfg.get('max_chars', 80),
+                path=cache_cfg.get('path', "data/tts_cache.sqlite3"),
+                max_disk_entries=cache_cfg.get('max_disk_entries', 512)
+            )
+        print(f"Kokoro TTS initialized with voice: {voice_name}")
+
+    def render(self, segment):
+        """Runs Kokoro on one segment (and caches it if it is short)."""
+        samples, sample_rate = self.kokoro.create(segment, voice=self.voice_name, speed=self.speed, lang="en-us")
+        if self.cache:
+            self.cache.put(segment, samples, sample_rate)
+        return samples, sample_rate
+
+    def synthesize(self, segment):
+        cached = self.cache.get(segment) if self.cache else None
+        return cached if cached is not None else self.render(segment)
+
+    def stream(self, text, submit=None):
+        """
+        Yields (samples, sample_rate, is_last) per sentence, in order, with
+        the next ones already synthesizing. Closing the generator early
+        cancels whatever hasn't started yet. `submit` replaces the internal
+        pool (the server routes synthesis through its inference scheduler).
+        """
+        submit = submit or self.pool.submit
+        pending = deque()
+        remaining = iter(split_sentences(text))
+        for segment in remaining:
+            pending.append(submit(self.synthesize, segment))
+            if len(pending) >= self.lookahead:
+                break
+
+        try:
+            while pending:
+                samples, sample_rate = pending.popleft().result()
+                next_segment = next(remaining, None)
+                if next_segment is not None:
+                    pending.append(submit(self.synthesize, next_segment))
+                yield samples, sample_rate, not pending
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def prewarm(self, phrases, submit=None):
+        """
+        Synthesizes the stock replies that aren't cached yet (only the first
+        run pays). `submit` routes each one through a pool (the server's
+        inference scheduler, at background priority), one at a time.
+        """
+        if not self.cache:
+            return
+        segments = [seg for phrase in phrases for seg in split_sentences(phrase)]
+        missing = [seg for seg in segments if self.cache.cacheable(seg) and not self.cache.contains(seg)]
+        for segment in missing:
+            try:
+                if submit:
+                    submit(self.render, segment).result()
+                else:
+                    self.render(segment)
+            except Exception as e:
+                print(f"[TTS] Prewarm failed for '{segment}': {e}")
+        self.cache.flush()
+        print(f"[TTS] Phrase cache ready ({len(segments) - len(missing)} cached, {len(missing)} synthesized).")
+
+def create_synthesizer(prewarm_submit=None):
+    """Builds a Synthesizer from settings['tts'] and prewarms its cache in the background."""
+    tts_cfg = settings['tts']
+    cache_cfg = tts_cfg.get('cache', {})
+    synth = Synthesizer(
+        tts_cfg['model_path'], tts_cfg['voices_path'], tts_cfg['voice_name'],
+        workers=tts_cfg.get('synth_workers', 1),
+        cache_cfg=cache_cfg
+    )
+    threading.Thread(target=synth.prewarm, args=(cache_cfg.get('prewarm', []), prewarm_submit), daemon=True).start()
+    return synth
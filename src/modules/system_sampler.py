@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+import numpy as np
+import psutil
+from config import settings
+
+# Columns of the history buffer; rates are per second since the previous sample
+FIELDS = ("ts", "cpu", "ram", "battery", "plugged", "disk",
+          "disk_read", "disk_write", "net_sent", "net_recv")
+_COL = {name: i for i, name in enumerate(FIELDS)}
+
+class SystemSampler:
+    """
+    Samples CPU, RAM, battery, disk and network once per interval on a
+    background thread into a fixed-size NumPy ring buffer.
+    Everyone (HUD, Pulse, tools, /api/status) reads from here instead of
+    polling psutil themselves. cpu is the average over the interval, not
+    psutil's since-last-call value. Missing sensors (no battery) are NaN.
+    """
+    def __init__(self, interval=2.0, capacity=1800, disk_path=None):
+        self.interval = interval
+        self.capacity = capacity
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self._buf = np.full((capacity, len(FIELDS)), np.nan)
+        self._count = 0 # Total samples taken; next row is _count % capacity
+        self._cond = threading.Condition()
+        self._prev_io = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self._thread is None:
+            psutil.cpu_percent(interval=None) # Prime: the next call covers one full interval
+            self._prev_io = self._io_counters()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            print(f"[Sampler] System sampler started (every {self.interval}s).")
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        next_at = time.monotonic()
+        while self._running:
+            next_at += self.interval
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"[Sampler] Error: {e}")
+
+    @staticmethod
+    def _io_counters():
+        return time.monotonic(), psutil.disk_io_counters(), psutil.net_io_counters()
+
+    def _sample(self):
+        row = np.full(len(FIELDS), np.nan)
+        row[_COL["ts"]] = time.time()
+        row[_COL["cpu"]] = psutil.cpu_percent(interval=None)
+        row[_COL["ram"]] = psutil.virtual_memory().percent
+
+        battery = psutil.sensors_battery()
+        if battery:
+            row[_COL["battery"]] = battery.percent
+            row[_COL["plugged"]] = 1.0 if battery.power_plugged else 0.0
+        try:
+            row[_COL["disk"]] = psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            pass
+
+        now, disk, net = self._io_counters()
+        prev_t, prev_disk, prev_net = self._prev_io
+        dt = max(now - prev_t, 1e-6)
+        if disk and prev_disk:
+            row[_COL["disk_read"]] = (disk.read_bytes - prev_disk.read_bytes) / dt
+            row[_COL["disk_write"]] = (disk.write_bytes - prev_disk.write_bytes) / dt
+        if net and prev_net:
+            row[_COL["net_sent"]] = (net.bytes_sent - prev_net.bytes_sent) / dt
+            row[_COL["net_recv"]] = (net.bytes_recv - prev_net.bytes_recv) / dt
+        self._prev_io = (now, disk, net)
+
+        with self._cond:
+            self._buf[self._count % self.capacity] = row
+            self._count += 1
+            self._cond.notify_all()
+
+    @property
+    def seq(self):
+        """Number of samples taken so far."""
+        return self._count
+
+    def wait_for_sample(self, after_seq, timeout=None):
+        """Blocks until a sample newer than after_seq exists (or timeout). Returns the new seq."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._count > after_seq, timeout)
+            return self._count
+
+    def history(self, seconds=None):
+        """Copy of the samples (oldest first), optionally only the last `seconds`."""
+        with self._cond:
+            n = min(self._count, self.capacity)
+            start = self._count % self.capacity if self._count > self.capacity else 0
+            rows = np.roll(self._buf, -start, axis=0)[:n] if start else self._buf[:n].copy()
+        if seconds is not None and len(rows):
+            rows = rows[rows[:, _COL["ts"]] >= time.time() - seconds]
+        return rows
+
+    def latest(self):
+        """Most recent sample as a dict (None before the first one; missing sensors are None)."""
+        with self._cond:
+            if not self._count:
+                return None
+            row = self._buf[(self._count - 1) % self.capacity].copy()
+        return _to_dict(row)
+
+    def window_mean(self, seconds):
+        """Per-field average over the last `seconds` (None if no samples in the window)."""
+        rows = self.history(seconds)
+        if not len(rows):
+            return None
+        valid = ~np.isnan(rows)
+        counts = valid.sum(axis=0)
+        sums = np.where(valid, rows, 0.0).sum(axis=0)
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return _to_dict(means)
+
+def _to_dict(row):
+    return {name: (None if np.isnan(row[i]) else float(row[i])) for i, name in enumerate(FIELDS)}
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+def get_sampler():
+    """Process-wide sampler, started on first use."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            sampler_cfg = settings.get('sampler', {})
+            interval = sampler_cfg.get('interval_seconds', 2.0)
+            _sampler = SystemSampler(
+                interval=interval,
+                capacity=max(1, int(sampler_cfg.get('history_minutes', 60) * 60 / interval))
+            ).start()
+        return _sampler
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, CancelledError
+
+class _Call:
+    """One submitted tool call. `settled` flips once a result (or timeout/cancel) has been reported."""
+    def __init__(self, name, on_result):
+        self.name = name
+        self.on_result = on_result
+        self.future = None
+        self.timer = None
+        self.settled = False
+        self.lock = threading.Lock()
+
+    def settle(self):
+        """Returns True for the first caller only."""
+        with self.lock:
+            if self.settled:
+                return False
+            self.settled = True
+        if self.timer:
+            self.timer.cancel()
+        return True
+
+class ToolExecutor:
+    """
+    Runs tool calls on a worker pool so a slow tool (YouTube search, app
+    launch keystrokes) never blocks the voice loop or a request thread.
+
+    Fast tools are waited on up to their timeout. Tools marked slow return
+    an acknowledgement straight away and report through on_result(name,
+    result) when done. A running thread can't be killed, so a timed-out or
+    cancelled call is abandoned and its late result discarded.
+    """
+    def __init__(self, actions, max_workers=4, ack="Working on it."):
+        self.actions = actions
+        self.ack = ack
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._calls = set()
+        self._lock = threading.Lock()
+
+    def run(self, name, args, on_result=None):
+        """Executes a tool call. Returns the result, or an acknowledgement for slow tools."""
+        spec = self.actions.tools.spec(name)
+        if spec is None:
+            return self.actions.execute_tool_call(name, args) # Reports the unknown tool
+
+        deferred = spec.slow and on_result is not None
+        call = self._submit(name, self.actions.execute_tool_call, (name, args),
+                            spec.timeout, on_result if deferred else None)
+        if deferred:
+            return self.ack
+
+        try:
+            return call.future.result(timeout=spec.timeout)
+        except TimeoutError:
+            call.settle()
+            call.future.cancel()
+            print(f"[Tools] {name} timed out after {spec.timeout}s.")
+            return f"Sorry, {name.replace('_', ' ')} is taking too long."
+        except CancelledError:
+            return "Cancelled."
+        finally:
+            self._forget(call)
+
+    def spawn(self, func, *args, name=None):
+        """Fire-and-forget work (e.g. legacy action tags whose result isn't spoken)."""
+        self._submit(name or func.__name__, func, args, None, None)
+
+    def _submit(self, name, func, args, timeout, on_result):
+        call = _Call(name, on_result)
+        with self._lock:
+            self._calls.add(call)
+        call.future = self._pool.submit(func, *args)
+        call.future.add_done_callback(lambda future: self._done(call, future))
+        if on_result is not None:
+            call.timer = threading.Timer(timeout, self._timed_out, args=(call, timeout))
+            call.timer.daemon = True
+            call.timer.start()
+        return call
+
+    def _done(self, call, future):
+        self._forget(call)
+        if call.on_result is None or future.cancelled() or not call.settle():
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            result = f"Error executing {call.name}: {e}"
+        self._deliver(call, result)
+
+    def _timed_out(self, call, timeout):
+        if call.settle():
+            call.future.cancel()
+            print(f"[Tools] {call.name} timed out after {timeout}s.")
+            self._deliver(call, f"Sorry, {call.name.replace('_', ' ')} took too long.")
+
+    def _deliver(self, call, result):
+        try:
+            call.on_result(call.name, result)
+        except Exception as e:
+            print(f"[Tools] Result callback for {call.name} failed: {e}")
+
+    def _forget(self, call):
+        with self._lock:
+            self._calls.discard(call)
+
+    def cancel_all(self):
+        """Drops every outstanding call: queued ones never run, running ones are ignored."""
+        with self._lock:
+            calls = list(self._calls)
+            self._calls.clear()
+        for call in calls:
+            call.settle()
+            call.future.cancel()
+        if calls:
+            print(f"[Tools] Cancelled {len(calls)} pending tool call(s).")
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
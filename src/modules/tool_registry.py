@@ -0,0 +1,91 @@
+import inspect
+
+# JSON schema types for annotated tool parameters (unannotated = string)
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+class ToolSpec:
+    """What the @tool decorator records about one function."""
+    def __init__(self, name, description, params, enums, timeout, slow, func):
+        self.name = name
+        self.description = description
+        self.params = params or {}
+        self.enums = enums or {}
+        self.timeout = timeout
+        self.slow = slow
+        self.func = func
+        self.signature = inspect.signature(func)
+        self.arg_names = list(self.signature.parameters)[1:] # Methods: skip self
+
+    def schema(self):
+        """Ollama/OpenAI function-calling schema, generated from the signature."""
+        properties = {}
+        required = []
+        for arg in self.arg_names:
+            param = self.signature.parameters[arg]
+            prop = {"type": _JSON_TYPES.get(param.annotation, "string")}
+            if arg in self.enums:
+                prop["enum"] = list(self.enums[arg])
+            if arg in self.params:
+                prop["description"] = self.params[arg]
+            properties[arg] = prop
+            if param.default is inspect.Parameter.empty:
+                required.append(arg)
+
+        parameters = {"type": "object", "properties": properties}
+        if required:
+            parameters["required"] = required
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": parameters
+            }
+        }
+
+def tool(description, params=None, enums=None, timeout=10.0, slow=False, name=None):
+    """
+    Marks a method as an LLM tool.
+    params: {arg: description}; enums: {arg: [allowed values]};
+    timeout: seconds before the call is abandoned; slow: worth an
+    immediate acknowledgement before the result is ready.
+    """
+    def decorate(func):
+        func._tool_spec = ToolSpec(name or func.__name__, description, params, enums, timeout, slow, func)
+        return func
+    return decorate
+
+def tool_specs(cls):
+    """All @tool methods of a class, in definition order."""
+    return [member._tool_spec for member in vars(cls).values() if hasattr(member, "_tool_spec")]
+
+def build_schema(cls):
+    return [spec.schema() for spec in tool_specs(cls)]
+
+class ToolRegistry:
+    """Name -> bound method lookup for one instance, so dispatch is a dict hit."""
+    def __init__(self, instance):
+        self._tools = {}
+        for spec in tool_specs(type(instance)):
+            self._tools[spec.name] = (spec, getattr(instance, spec.func.__name__))
+
+    def __contains__(self, name):
+        return name in self._tools
+
+    def spec(self, name):
+        entry = self._tools.get(name)
+        return entry[0] if entry else None
+
+    def call(self, name, args):
+        """Calls a tool with the LLM's arguments; unknown arguments are dropped."""
+        entry = self._tools.get(name)
+        if entry is None:
+            raise KeyError(name)
+        spec, method = entry
+        args = args or {}
+        kwargs = {arg: args[arg] for arg in spec.arg_names if arg in args}
+        missing = [arg for arg in spec.arg_names
+                   if arg not in kwargs and spec.signature.parameters[arg].default is inspect.Parameter.empty]
+        if missing:
+            raise ValueError(f"missing argument(s): {', '.join(missing)}")
+        return method(**kwargs)
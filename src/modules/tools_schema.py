@@ -1,100 +1,13 @@
-# Define the Tool Schema for Ollama (Llama 3.1/3.2 format)
-TOOLS_SCHEMA = [
-    {
-        "type": "function",
-        "function": {
-            "name": "open_app",
-            "description": "Opens a desktop application on the user's PC.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "app_name": {
-                        "type": "string",
-                        "description": "The name of the application (e.g., 'Chrome', 'Calculator', 'Discord')."
-                    }
-                },
-                "required": ["app_name"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "search_web",
-            "description": "Performs a Google search in the default browser.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "The search query."
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "play_youtube",
-            "description": "Searches and plays a video on YouTube.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "The video title or search term."
-                    }
-                },
-                "required": ["query"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "control_media",
-            "description": "Controls system media playback (Play, Pause, Next, Previous).",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "enum": ["play", "pause", "next", "previous", "stop"],
-                        "description": "The media control command."
-                    }
-                },
-                "required": ["command"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_system_stats",
-            "description": "Checks current CPU, RAM, and Battery levels.",
-            "parameters": {
-                "type": "object",
-                "properties": {}
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "save_memory",
-            "description": "Saves a new fact about the user to long-term memory.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "fact": {
-                        "type": "string",
-                        "description": "The fact to remember (e.g., 'User likes sushi')."
-                    }
-                },
-                "required": ["fact"]
-            }
-        }
-    }
-]
+import functools
+from modules.tool_registry import build_schema
+
+@functools.lru_cache(maxsize=None)
+def get_tools_schema():
+    """
+    Tool Schema for Ollama (Llama 3.1/3.2 format), generated from the @tool
+    methods on Actions so the two can't drift apart. Built on first use:
+    importing Actions pulls in the app catalog, sampler and memory, which
+    importing modules.llm shouldn't.
+    """
+    from modules.actions import Actions
+    return build_schema(Actions)
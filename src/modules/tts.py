@@ -1,35 +1,47 @@
 import threading
 import queue
 import time
-import os
 import numpy as np
-import sounddevice as sd
-from kokoro_onnx import Kokoro
-from config import settings
+from modules.audio_out import get_audio_engine
+from modules.synthesizer import create_synthesizer
 
 class TTS:
     _instance = None
     _queue = queue.Queue()
     _worker_thread = None
-    _is_busy = False 
+    _engine = None
+    _pending = 0 # Utterances queued or still audible
+    _generation = 0 # Bumped by stop(); older utterances are abandoned
+    _pending_lock = threading.Lock()
     _cue_audio = None # Pre-generated buffer
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(TTS, cls).__new__(cls)
+            cls._engine = get_audio_engine()
             cls._start_worker()
             cls._generate_cue()
         return cls._instance
 
     @classmethod
     def is_busy(cls):
-        return cls._is_busy
+        """True from speak() until the last sample of the utterance has been played."""
+        with cls._pending_lock:
+            return cls._pending > 0
+
+    @classmethod
+    def _finished(cls, on_done, generation):
+        with cls._pending_lock:
+            if generation == cls._generation:
+                cls._pending -= 1
+        if on_done:
+            on_done()
 
     @classmethod
     def _generate_cue(cls):
-        """Pre-generates the 'ding' sound."""
+        """Pre-generates the 'ding' sound at the output engine's rate."""
         try:
-            fs = 44100
+            fs = cls._engine.sample_rate
             duration = 0.2
             t = np.linspace(0, duration, int(fs * duration), endpoint=False)
             
@@ -55,56 +67,94 @@ class TTS:
         """
         Runs in a dedicated thread. Initializes Kokoro-ONNX locally.
         """
-        model_path = settings['tts']['model_path']
-        voices_path = settings['tts']['voices_path']
-        
-        if not os.path.exists(model_path) or not os.path.exists(voices_path):
-            print(f"ERROR: Kokoro model files not found at {model_path}")
-            return
-
         try:
-            kokoro = Kokoro(model_path, voices_path)
-            # Default voice
-            voice_name = settings['tts']['voice_name']
-            print(f"Kokoro TTS initialized with voice: {voice_name}")
+            synth = create_synthesizer()
         except Exception as e:
             print(f"Failed to initialize Kokoro: {e}")
-            return
-        
+            return cls._drain()
+
         while True:
+            text, channel, on_done, generation = cls._queue.get()
+            queued = False
             try:
-                text = cls._queue.get()
-                if text is None: break 
-                
-                cls._is_busy = True 
-                
-                # Generate audio with Kokoro
-                samples, sample_rate = kokoro.create(text, voice=voice_name, speed=1.0, lang="en-us")
-                
-                # Play audio
-                sd.play(samples, sample_rate)
-                sd.wait() # Wait for playback to finish
-                
-                cls._is_busy = False 
-                cls._queue.task_done()
+                if generation == cls._generation:
+                    queued = cls._play_stream(synth.stream(text), channel, on_done, generation)
             except Exception as e:
-                cls._is_busy = False
                 print(f"TTS Error: {e}")
+            finally:
+                if not queued:
+                    cls._finished(on_done, generation) # Nothing (more) will reach the speaker
+                cls._queue.task_done()
 
-    def speak(self, text):
+    @classmethod
+    def _drain(cls):
+        """No voice available: complete requests right away so nobody waits on is_busy()."""
+        while True:
+            _, _, on_done, generation = cls._queue.get()
+            cls._finished(on_done, generation)
+            cls._queue.task_done()
+
+    @classmethod
+    def _play_stream(cls, segments, channel, on_done, generation):
+        """
+        Hands synthesized sentences to the output engine as they arrive.
+        The last one carries the utterance's completion callback.
+        Returns True once that callback is owned by the engine, False if
+        the utterance was stopped (or empty) first.
+        """
+        try:
+            for samples, sample_rate, is_last in segments:
+                # Checked under the lock so stop() can't slip between check and play
+                with cls._pending_lock:
+                    if generation != cls._generation:
+                        return False
+                    if not is_last:
+                        cls._engine.play(samples, sample_rate, channel=channel)
+                    else:
+                        cls._engine.play(samples, sample_rate, channel=channel,
+                                         on_done=lambda: cls._finished(on_done, generation))
+                        return True
+            return False
+        finally:
+            segments.close() # Cancels lookahead synthesis
+
+    def speak(self, text, channel="speech", on_done=None):
         """
         Queues the text to be spoken. Non-blocking.
+        `on_done` runs once the last sample has actually been played.
         """
         print(f"Cherry: {text}")
-        self._queue.put(text)
+        with self._pending_lock:
+            TTS._pending += 1
+            generation = TTS._generation
+        self._queue.put((text, channel, on_done, generation))
+
+    def stop(self):
+        """
+        Cuts off the current answer and drops anything queued (barge-in).
+        is_busy() turns False right away; synthesis in flight is discarded.
+        """
+        with self._pending_lock:
+            TTS._generation += 1
+            TTS._pending = 0
+            self._engine.stop("speech")
+            self._engine.stop("alert")
+        print("[TTS] Playback stopped.")
+
+    def reference(self, start_time, n_samples, rate):
+        """What the speaker was playing at start_time (for echo cancellation)."""
+        return self._engine.reference(start_time, n_samples, rate)
+
+    def output_time(self):
+        return self._engine.time()
 
     def play_listening_cue(self):
         """
-        Plays the pre-generated 'ding' sound instantly.
+        Plays the pre-generated 'ding' on the cue channel (speech is ducked, not cut).
         """
         if self._cue_audio is not None:
             try:
-                sd.play(self._cue_audio, 44100)
+                self._engine.play(self._cue_audio, channel="cue")
             except Exception as e:
                 print(f"Error playing cue: {e}")
 
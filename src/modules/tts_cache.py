@@ -0,0 +1,82 @@
+import os
+import struct
+
+import numpy as np
+
+from modules.cache_store import CacheStore, collapse_whitespace, hash_key
+
+def model_version(*paths):
+    """Cheap fingerprint of the model files (name, size, mtime); changes when they are replaced."""
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            parts.append(f"{os.path.basename(path)}:{st.st_size}:{int(st.st_mtime)}")
+        except OSError:
+            parts.append(f"{os.path.basename(path)}:missing")
+    return "|".join(parts)
+
+class PhraseCache:
+    """
+    Synthesized audio for short, frequently repeated phrases ("Yes?",
+    "Toggling playback.").
+    Keyed by (text, voice, speed, model version). Hot entries live in an
+    in-memory LRU; if a path is given they are also kept as int16 PCM in a
+    SQLite file, so the common replies survive restarts. The file holds
+    at most max_disk_entries phrases (least recently used go first) and
+    only those of the current voice/speed/model.
+    """
+    def __init__(self, voice, speed=1.0, version="", max_entries=128, max_chars=80,
+                 path=None, max_disk_entries=512, log_every=50):
+        self.max_chars = max_chars
+        self.log_every = log_every
+        self.store = CacheStore("phrases", f"{voice}|{speed}|{version}", _encode, _decode,
+                                max_entries=max_entries, path=path,
+                                max_disk_entries=max_disk_entries, tag="TTS")
+
+    def cacheable(self, text):
+        return len(text) <= self.max_chars
+
+    def key(self, text):
+        # Case and punctuation change the prosody, so only whitespace is normalized
+        return hash_key(collapse_whitespace(text), self.store.namespace)
+
+    def get(self, text):
+        """Returns (float32 samples, sample_rate) or None."""
+        if not self.cacheable(text):
+            return None
+        entry = self.store.get(self.key(text))
+        self._maybe_log()
+        if entry is None:
+            return None
+        pcm, sample_rate = entry
+        return pcm.astype(np.float32) / 32767.0, sample_rate
+
+    def put(self, text, samples, sample_rate):
+        if not self.cacheable(text):
+            return
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+        self.store.put(self.key(text), (pcm, int(sample_rate)))
+
+    def contains(self, text):
+        """Checks for an entry without touching the hit counters."""
+        return self.store.contains(self.key(text))
+
+    def flush(self):
+        self.store.flush()
+
+    def _maybe_log(self):
+        total = self.store.hits + self.store.misses
+        if self.log_every and total % self.log_every == 0:
+            print(f"[TTS] Phrase cache: {self.stats()}")
+
+    def stats(self):
+        return self.store.stats()
+
+def _encode(entry):
+    pcm, sample_rate = entry
+    return struct.pack("<I", sample_rate) + pcm.tobytes()
+
+def _decode(blob):
+    return np.frombuffer(blob, dtype=np.int16, offset=4), struct.unpack_from("<I", blob)[0]
@@ -0,0 +1,378 @@
+import json
+import os
+import threading
+import numpy as np
+
+class NumpyCollection:
+    """
+    A minimal stand-in for a Chroma collection, sized for a personal assistant.
+
+    Layout on disk (one directory per collection):
+        header.json  - vector dimension and dtype
+        vectors.bin  - contiguous row-major matrix, append-only
+        log.jsonl    - append log of put/delete records (documents + metadata)
+
+    Queries are exact: one matrix-vector product over the memory-mapped
+    matrix, then argpartition for the top-k. Distances are squared L2 like
+    Chroma's default space, so thresholds carry over unchanged.
+    """
+    COMPACT_MIN_DEAD = 64
+    COMPACT_DEAD_RATIO = 0.25
+
+    def __init__(self, path, name, dtype="float32"):
+        self.name = name
+        self.path = path
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        self._header_file = os.path.join(path, "header.json")
+        self._vectors_file = os.path.join(path, "vectors.bin")
+        self._log_file = os.path.join(path, "log.jsonl")
+
+        self.dim = None
+        self.dtype = np.dtype(dtype)
+        if os.path.exists(self._header_file):
+            with open(self._header_file, 'r') as f:
+                header = json.load(f)
+            self.dim = header["dim"]
+            self.dtype = np.dtype(header["dtype"])
+
+        # Row-indexed state (rebuilt from the log on load)
+        self._ids = []
+        self._docs = []
+        self._metas = []
+        self._live = np.zeros(0, dtype=bool)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._row_of = {}
+        self._matrix = None
+        self._n_rows = 0
+        self._dead = 0
+
+        self._load()
+
+    # --- Persistence ---
+
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _load(self):
+        if self.dim is None or not os.path.exists(self._log_file):
+            return
+
+        self._repair_log_tail()
+        max_row = -1
+        with open(self._log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec["op"] == "put":
+                    row = rec["row"]
+                    self._set_row(row, rec["id"], rec.get("doc"), rec.get("meta"))
+                    max_row = max(max_row, row)
+                elif rec["op"] == "del":
+                    self._kill(rec["id"])
+
+        # Drop vector rows that were written but never logged
+        self._n_rows = max_row + 1
+        expected = self._n_rows * self._row_bytes()
+        if os.path.exists(self._vectors_file) and os.path.getsize(self._vectors_file) > expected:
+            with open(self._vectors_file, 'r+b') as f:
+                f.truncate(expected)
+
+        self._resize(self._n_rows)
+        mat = self._mapped()
+        if mat is not None:
+            for start in range(0, self._n_rows, 65536):
+                block = np.asarray(mat[start:start + 65536], dtype=np.float32)
+                self._sq_norms[start:start + len(block)] = np.einsum('ij,ij->i', block, block)
+        self._live[:] = False
+        for row in self._row_of.values():
+            self._live[row] = True
+        self._dead = self._n_rows - len(self._row_of)
+
+    def _repair_log_tail(self):
+        """Cuts a torn final record (crash mid-append) so new appends start on a clean line."""
+        with open(self._log_file, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            cut = tail.rfind(b"\n")
+            f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+    def _set_row(self, row, id_, doc, meta):
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._docs.append(None)
+            self._metas.append(None)
+        old = self._row_of.get(id_)
+        if old is not None:
+            self._ids[old] = self._docs[old] = self._metas[old] = None
+        self._ids[row] = id_
+        self._docs[row] = doc
+        self._metas[row] = meta
+        self._row_of[id_] = row
+        return old
+
+    def _kill(self, id_):
+        row = self._row_of.pop(id_, None)
+        if row is not None:
+            self._ids[row] = None
+            self._docs[row] = None
+            self._metas[row] = None
+        return row
+
+    def _resize(self, n):
+        if len(self._live) < n:
+            grow = max(n, 2 * len(self._live), 1024)
+            live = np.zeros(grow, dtype=bool)
+            live[:len(self._live)] = self._live
+            norms = np.zeros(grow, dtype=np.float32)
+            norms[:len(self._sq_norms)] = self._sq_norms
+            self._live, self._sq_norms = live, norms
+
+    def _mapped(self):
+        """Read-only memory map of the vector file, reopened after appends."""
+        if self._n_rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self._n_rows:
+            self._matrix = np.memmap(self._vectors_file, dtype=self.dtype, mode='r',
+                                     shape=(self._n_rows, self.dim))
+        return self._matrix
+
+    def _ensure_header(self, dim):
+        if self.dim is None:
+            self.dim = dim
+            with open(self._header_file, 'w') as f:
+                json.dump({"dim": dim, "dtype": self.dtype.name}, f)
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match collection ({self.dim})")
+
+    # --- Chroma-compatible API (the subset MemoryVector uses) ---
+
+    def count(self):
+        return len(self._row_of)
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            dupes = [i for i in ids if i in self._row_of]
+            if dupes:
+                print(f"[Memory] {self.name}: skipping existing ids {dupes}")
+            self._append(ids, embeddings, documents, metadatas, skip_existing=True)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        with self._lock:
+            self._append(ids, embeddings, documents, metadatas, skip_existing=False)
+
+    def _append(self, ids, embeddings, documents, metadatas, skip_existing):
+        vecs = np.asarray(embeddings, dtype=np.float32)
+        if vecs.ndim == 1:
+            vecs = vecs[None, :]
+        self._ensure_header(vecs.shape[1])
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        keep = [k for k, id_ in enumerate(ids) if not (skip_existing and id_ in self._row_of)]
+        if not keep:
+            return
+
+        first_row = self._n_rows
+        rows = vecs[keep].astype(self.dtype)
+        lines = [
+            json.dumps({"op": "put", "id": ids[k], "row": first_row + offset,
+                        "doc": documents[k], "meta": metadatas[k]})
+            for offset, k in enumerate(keep)
+        ]
+        # Vectors first, then the log: a row only exists once it is logged
+        with open(self._vectors_file, 'ab') as f:
+            f.write(rows.tobytes())
+        with open(self._log_file, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        self._n_rows = first_row + len(keep)
+        self._resize(self._n_rows)
+        stored = rows.astype(np.float32)
+        self._sq_norms[first_row:self._n_rows] = np.einsum('ij,ij->i', stored, stored)
+        for offset, k in enumerate(keep):
+            row = first_row + offset
+            old = self._set_row(row, ids[k], documents[k], metadatas[k])
+            if old is not None:
+                self._live[old] = False
+                self._dead += 1
+            self._live[row] = True
+
+    def delete(self, ids):
+        with self._lock:
+            lines = []
+            for id_ in ids:
+                row = self._kill(id_)
+                if row is not None:
+                    self._live[row] = False
+                    self._dead += 1
+                    lines.append(json.dumps({"op": "del", "id": id_}))
+            if lines:
+                with open(self._log_file, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+            if self._dead >= self.COMPACT_MIN_DEAD and self._dead > self.COMPACT_DEAD_RATIO * self._n_rows:
+                self.compact()
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas")):
+        with self._lock:
+            if ids is None:
+                rows = sorted(self._row_of.values())
+            else:
+                rows = [self._row_of[i] for i in ids if i in self._row_of]
+            if where:
+                rows = [r for r in rows if _match(self._metas[r], where)]
+            result = {"ids": [self._ids[r] for r in rows]}
+            if "documents" in include:
+                result["documents"] = [self._docs[r] for r in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metas[r] for r in rows]
+            if "embeddings" in include:
+                mat = self._mapped()
+                result["embeddings"] = (np.asarray(mat[rows], dtype=np.float32)
+                                        if rows else np.zeros((0, self.dim or 0), dtype=np.float32))
+            return result
+
+    def query(self, query_embeddings, n_results=10, where=None,
+              include=("documents", "metadatas", "distances")):
+        with self._lock:
+            out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            mat = self._mapped()
+            live = self._live[:self._n_rows]
+            if where and mat is not None:
+                live = live.copy()
+                for r in np.flatnonzero(live):
+                    if not _match(self._metas[r], where):
+                        live[r] = False
+
+            queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+            if self.dim is not None and queries.shape[1] != self.dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match collection ({self.dim})")
+
+            for q in queries: # One result row per query, even on an empty collection
+                if mat is None or not live.any():
+                    for key in out:
+                        out[key].append([])
+                    continue
+
+                # ||x - q||^2 = ||x||^2 + ||q||^2 - 2 x.q  (one matvec over the whole matrix)
+                dist = self._sq_norms[:self._n_rows] + float(q @ q) - 2.0 * self._dot(mat, q)
+                dist[~live] = np.inf
+
+                k = min(n_results, int(live.sum()))
+                top = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+                top = top[np.argsort(dist[top])][:k]
+
+                out["ids"].append([self._ids[r] for r in top])
+                out["documents"].append([self._docs[r] for r in top])
+                out["metadatas"].append([self._metas[r] for r in top])
+                out["distances"].append([max(float(dist[r]), 0.0) for r in top])
+
+            for key in ("documents", "metadatas", "distances"):
+                if key not in include:
+                    out[key] = None
+            return out
+
+    def _dot(self, mat, q):
+        if self.dtype == np.float32:
+            return mat @ q
+        # Half-precision storage: upcast block by block instead of copying the whole matrix
+        out = np.empty(mat.shape[0], dtype=np.float32)
+        for start in range(0, mat.shape[0], 8192):
+            out[start:start + 8192] = np.asarray(mat[start:start + 8192], dtype=np.float32) @ q
+        return out
+
+    def compact(self):
+        """Rewrites the matrix and log without dead rows (atomic replace)."""
+        with self._lock:
+            rows = sorted(self._row_of.values())
+            mat = self._mapped()
+            tmp_vectors = self._vectors_file + ".tmp"
+            tmp_log = self._log_file + ".tmp"
+
+            with open(tmp_vectors, 'wb') as f:
+                for start in range(0, len(rows), 65536):
+                    f.write(np.asarray(mat[rows[start:start + 65536]], dtype=self.dtype).tobytes())
+            with open(tmp_log, 'w', encoding='utf-8') as f:
+                for new_row, r in enumerate(rows):
+                    f.write(json.dumps({"op": "put", "id": self._ids[r], "row": new_row,
+                                        "doc": self._docs[r], "meta": self._metas[r]}) + "\n")
+
+            # Windows can't replace a file that is still mapped: drop every
+            # reference to the memmap (the local too) so it unmaps first
+            del mat
+            self._matrix = None
+            os.replace(tmp_vectors, self._vectors_file)
+            os.replace(tmp_log, self._log_file)
+
+            dropped = self._n_rows - len(rows)
+            self._ids, self._docs, self._metas = [], [], []
+            self._row_of = {}
+            self._live = np.zeros(0, dtype=bool)
+            self._sq_norms = np.zeros(0, dtype=np.float32)
+            self._n_rows = 0
+            self._dead = 0
+            self._load()
+            print(f"[Memory] Compacted '{self.name}': dropped {dropped} dead rows, {self.count()} live.")
+
+def _match(meta, where):
+    """Evaluates a Chroma-style metadata filter ($and/$or and comparison operators)."""
+    meta = meta or {}
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_match(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(_match(meta, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = meta.get(key)
+            for op, target in cond.items():
+                if value is None and op != "$ne":
+                    return False
+                if op == "$eq" and not value == target: return False
+                if op == "$ne" and not value != target: return False
+                if op == "$lt" and not value < target: return False
+                if op == "$lte" and not value <= target: return False
+                if op == "$gt" and not value > target: return False
+                if op == "$gte" and not value >= target: return False
+                if op == "$in" and value not in target: return False
+                if op == "$nin" and value in target: return False
+        elif meta.get(key) != cond:
+            return False
+    return True
+
+class NumpyStore:
+    """Directory of NumpyCollections; mirrors chromadb.PersistentClient's entry point."""
+    def __init__(self, path, dtype="float32"):
+        self.path = path
+        self.dtype = dtype
+        self._collections = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def get_or_create_collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = NumpyCollection(os.path.join(self.path, name), name, self.dtype)
+            return self._collections[name]
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def open_numpy_store(path, dtype="float32"):
+    """Returns the process-wide store for path (one in-memory index per directory)."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = NumpyStore(path, dtype)
+        return _stores[key]
@@ -1,7 +1,9 @@
-import pyautogui
 import base64
 import io
 import time
+from modules.lazy import lazy_import
+
+pyautogui = lazy_import("pyautogui")
 
 class Vision:
     def __init__(self):
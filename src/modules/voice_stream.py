@@ -0,0 +1,86 @@
+import threading
+import numpy as np
+from modules.vad import VAD
+from modules.audio_codec import resample_linear
+
+STT_RATE = 16000
+VAD_BLOCK = 1024 # VAD's silence counter is tuned for 1024-sample chunks
+
+class VoiceStream:
+    """
+    One utterance streamed over the socket as raw PCM frames.
+
+    Frames are appended to a preallocated 16 kHz buffer as they arrive and
+    the server-side VAD decides when the speaker has finished, so by the
+    time they stop talking all the audio is already decoded and in place.
+    """
+    def __init__(self, stream_id, sample_rate=STT_RATE, vad_threshold=0.01, silence_seconds=0.6,
+                 max_seconds=30, partial_seconds=1.0, speak=False, fmt="pcm", session_id=None):
+        self.id = stream_id
+        self.sample_rate = sample_rate
+        self.speak = speak
+        self.format = fmt
+        self.session_id = session_id
+        self.vad = VAD(threshold=vad_threshold, silence_duration=silence_seconds, sample_rate=STT_RATE)
+        self.audio = np.zeros(int(max_seconds * STT_RATE), dtype=np.float32)
+        self.length = 0
+        self.vad_pos = 0 # Samples already run through the VAD
+        self.heard_speech = False
+        self.ended = False
+        self.partial_every = int(partial_seconds * STT_RATE)
+        self.partial_at = 0 # Buffer length at the last partial transcript
+        self.partial_busy = False
+        self.lock = threading.Lock()
+
+    def feed(self, pcm):
+        """
+        Appends int16 little-endian mono PCM. Returns "speech" the first
+        time speech is heard, "end" once the VAD (or the length limit) ends
+        the utterance, else None.
+        """
+        samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+        if self.sample_rate != STT_RATE and len(samples):
+            samples = resample_linear(samples, self.sample_rate, STT_RATE)
+
+        with self.lock:
+            if self.ended:
+                return None
+            room = len(self.audio) - self.length
+            self.audio[self.length:self.length + min(room, len(samples))] = samples[:room]
+            self.length += min(room, len(samples))
+
+            event = None
+            while self.vad_pos + VAD_BLOCK <= self.length:
+                status = self.vad.process_chunk(self.audio[self.vad_pos:self.vad_pos + VAD_BLOCK])
+                self.vad_pos += VAD_BLOCK
+                if status == 0 and not self.heard_speech:
+                    self.heard_speech = True
+                    event = "speech"
+                elif status == 1:
+                    return "end"
+            if room <= len(samples):
+                return "end" # Hit max_seconds
+            return event
+
+    def wants_partial(self):
+        """True when enough new speech arrived for another partial transcript."""
+        with self.lock:
+            if self.ended or self.partial_busy or not self.heard_speech:
+                return False
+            if self.length - self.partial_at < self.partial_every:
+                return False
+            self.partial_busy = True
+            self.partial_at = self.length
+            return True
+
+    def finish(self):
+        """Marks the utterance complete; returns False if it already was."""
+        with self.lock:
+            if self.ended:
+                return False
+            self.ended = True
+            return True
+
+    def samples(self):
+        """View of the audio received so far (no copy)."""
+        return self.audio[:self.length]
@@ -1,6 +1,8 @@
 import os
 import numpy as np
-from openwakeword.model import Model
+from modules.lazy import lazy_import
+
+openwakeword_model = lazy_import("openwakeword.model") # Pulls in onnxruntime; only when constructed
 
 class WakeWord:
     def __init__(self, keyword="hey jarvis"):
@@ -10,7 +12,7 @@ class WakeWord:
         # Load pre-trained models
         # We can load multiple models at once
         # Explicitly use 'onnx' inference framework since tflite-runtime is not available on Python 3.13
-        self.model = Model(
+        self.model = openwakeword_model.Model(
             wakeword_models=["hey_jarvis", "alexa"],
             inference_framework="onnx"
         )
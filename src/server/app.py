@@ -1,17 +1,28 @@
 import sys
 import os
+import threading
+import time
 import traceback
-from flask import Flask, request, jsonify, render_template
+from urllib.parse import quote
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 
 # Add the src directory to sys.path to allow importing modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from modules.llm import LLM
 from modules.actions import Actions
+from modules.tool_executor import ToolExecutor
 from modules.stt import STT
+from modules.sessions import SessionStore
+from modules.synthesizer import create_synthesizer, SAMPLE_RATE
+from modules.audio_codec import AudioStreamEncoder
+from modules.voice_stream import VoiceStream
+from modules.audio_ingest import AudioIngest, IngestError
+from modules.local_ipc import IPCServer, default_address, load_key
+from modules.inference_scheduler import (InferenceScheduler, SchedulerBusy, SchedulerTimeout,
+                                         PRIORITY_VOICE, PRIORITY_CHAT, PRIORITY_BACKGROUND)
+from config import settings
 from flask_socketio import SocketIO, emit
-from io import BytesIO
-import soundfile as sf
 
 app = Flask(__name__)
 # Enable WebSockets
@@ -19,11 +30,146 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 
 print("--- Initializing Server Core ---")
 
+# STT/LLM/TTS share one GPU: every call is queued here (voice first) with
+# bounded queues, so overload means a 429 instead of a pile-up
+scheduler = InferenceScheduler(settings.get('scheduler', {}))
+
 # Initialize Core Modules
-brain = LLM()
+brain = LLM(background_submit=scheduler.submitter("llm", PRIORITY_BACKGROUND))
 hands = Actions()
 ears = STT()
 
+# Tools run on their own pool so a slow one doesn't hold the request thread
+tools_cfg = settings.get('tools', {})
+tools = ToolExecutor(hands, max_workers=tools_cfg.get('workers', 4),
+                     ack=tools_cfg.get('ack', "Working on it."))
+
+# Per-client conversation windows (models above are shared)
+server_cfg = settings.get('server', {})
+sessions = SessionStore(
+    context_limit=server_cfg.get('context_limit', 10),
+    max_sessions=server_cfg.get('max_sessions', 64),
+    idle_timeout=server_cfg.get('session_idle_minutes', 30) * 60
+)
+
+# Uploaded recordings -> 16 kHz float32 with duration limits
+ingest_cfg = server_cfg.get('ingest', {})
+ingest = AudioIngest(max_seconds=ingest_cfg.get('max_seconds', 30),
+                     min_seconds=ingest_cfg.get('min_seconds', 0.2))
+
+def get_session_id():
+    """Identifies the calling client: an explicit session id if sent, else its address."""
+    session_id = request.headers.get('X-Session-Id') or request.values.get('session_id')
+    if not session_id and request.is_json:
+        session_id = (request.get_json(silent=True) or {}).get('session_id')
+    return session_id or f"addr-{request.remote_addr}"
+
+# Server-side voice for thin clients (phones, dashboard); loaded on first use
+_voice = None
+_voice_lock = threading.Lock()
+
+def get_voice():
+    global _voice
+    with _voice_lock:
+        if _voice is None:
+            _voice = create_synthesizer(prewarm_submit=scheduler.submitter("tts", PRIORITY_BACKGROUND))
+        return _voice
+
+def synthesize_stream(text, encoder, priority=PRIORITY_CHAT):
+    """Yields encoded audio as each sentence is synthesized."""
+    for samples, _, _ in get_voice().stream(text, submit=scheduler.submitter("tts", priority)):
+        chunk = encoder.encode(samples)
+        if chunk:
+            yield chunk
+    tail = encoder.close()
+    if tail:
+        yield tail
+
+def audio_response(text, fmt="pcm", headers=None, priority=PRIORITY_CHAT):
+    """Chunked audio response; the first sentence goes out while the rest is synthesized."""
+    encoder = AudioStreamEncoder(fmt, SAMPLE_RATE)
+    chunks = synthesize_stream(text, encoder, priority)
+    # Pull the first chunk now so a missing model or a full TTS queue is a
+    # proper error response, not a stream that breaks halfway through
+    first = next(chunks, b"")
+
+    def body():
+        if first:
+            yield first
+        yield from chunks
+
+    headers = dict(headers or {})
+    headers["X-Sample-Rate"] = str(SAMPLE_RATE)
+    return Response(stream_with_context(body()), content_type=encoder.mimetype, headers=headers)
+
+# Warmup progress for /api/ready:
+#   name -> pending | loading | retrying: <why> | ready | lazy | degraded: <why>
+model_state = {"stt": "pending", "embeddings": "pending", "tts": "pending"}
+REQUIRED_MODELS = ("stt", "embeddings") # TTS is optional: desktop clients speak locally
+
+def warmup():
+    """Loads the models now instead of on the first request (models import lazily)."""
+    start = time.time()
+    retries = server_cfg.get('warmup_retries', 2)
+    for name, load in (("stt", ears.warmup),
+                       ("embeddings", lambda: brain.vector_db.encoder.encode(["warmup"])),
+                       ("tts", get_voice)):
+        for attempt in range(retries + 1):
+            model_state[name] = "loading"
+            try:
+                load()
+                model_state[name] = "ready"
+                break
+            except Exception as e:
+                print(f"[Server] Warmup of {name} failed (attempt {attempt + 1}/{retries + 1}): {e}")
+                if attempt < retries:
+                    model_state[name] = f"retrying: {e}"
+                    time.sleep(2 ** attempt)
+                else:
+                    # Requests still load it lazily and may succeed, so readiness
+                    # isn't held hostage by a warmup that keeps failing
+                    model_state[name] = f"degraded: {e}"
+    print(f"[Server] Models warm after {time.time() - start:.1f}s")
+
+def is_ready():
+    return all(model_state[name] in ("ready", "lazy") or model_state[name].startswith("degraded")
+               for name in REQUIRED_MODELS)
+
+def wants_speech():
+    return request.args.get('speak', request.values.get('speak', '0')) in ('1', 'true')
+
+def get_socket_sid():
+    """The caller's live socket (dashboard tabs send theirs), or None for plain HTTP."""
+    sid = request.headers.get('X-Socket-Id')
+    if sid and socketio.server.manager.is_connected(sid, '/'):
+        return sid
+    return None
+
+def run_actions(response, session_id, sid=None):
+    """
+    Executes the tool calls (or legacy tags) in an LLM response and returns
+    the text to show/speak. With a socket (sid), slow tools answer with an
+    acknowledgement and push their result to that socket as 'tool_result'
+    when ready; without one there's nowhere to push it, so they're waited on.
+    """
+    on_result = None
+    if sid is not None:
+        def on_result(name, result):
+            socketio.emit('tool_result', {"session_id": session_id, "tool": name, "result": str(result)}, to=sid)
+
+    if isinstance(response, dict) and response.get("type") == "tool":
+        clean_response = ""
+        for tool in response.get("calls", []):
+            result = tools.run(tool.function.name, tool.function.arguments, on_result=on_result)
+            if result == tools.ack and result in clean_response:
+                continue
+            clean_response += str(result) + " "
+        return clean_response
+
+    # Legacy Text
+    raw = response.get("content", "") if isinstance(response, dict) else str(response)
+    return hands.parse_and_execute(raw, background=tools.spawn)
+
 def serialize_llm_response(response):
     """
     Converts internal LLM response (which may contain ToolCall objects) 
@@ -44,6 +190,21 @@ def serialize_llm_response(response):
         }
     return response
 
+@app.errorhandler(SchedulerBusy)
+def handle_busy(e):
+    return jsonify({"error": str(e)}), 429, {"Retry-After": str(e.retry_after)}
+
+def timeout_status(e):
+    """
+    503 only if the job never started, so a client may retry it; a job
+    that started keeps running (and writes its turn to memory), so 504.
+    """
+    return 504 if e.started else 503
+
+@app.errorhandler(SchedulerTimeout)
+def handle_inference_timeout(e):
+    return jsonify({"error": str(e)}), timeout_status(e)
+
 @app.route('/')
 def home():
     """Serves the Web Dashboard."""
@@ -56,11 +217,57 @@ def get_status():
         stats = hands.get_system_stats()
         return jsonify({
             "status": "online",
-            "system_stats": stats
+            "system_stats": stats,
+            "metrics": hands.sampler.latest()
         })
     except Exception:
         return jsonify({"status": "error", "message": "Health check failed"}), 500
 
+@app.route('/api/ready', methods=['GET'])
+def get_ready():
+    """
+    Readiness (vs. /api/status liveness): 200 once the required models are
+    loaded (or their warmup gave up and they'll load on first use, listed
+    as degraded), 503 with per-model progress while they are still warming up.
+    """
+    ready = is_ready()
+    degraded = [name for name, state in model_state.items() if state.startswith("degraded")]
+    body = {"ready": ready, "degraded": degraded, "models": dict(model_state)}
+    if ready:
+        return jsonify(body)
+    return jsonify(body), 503, {"Retry-After": "1"}
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Inference queue depth, wait/run times and rejections per model."""
+    return jsonify({"scheduler": scheduler.metrics()})
+
+def answer_voice(data, session_id, sid=None):
+    """
+    STT -> LLM -> actions for one decoded utterance (shared by /api/voice
+    and the local IPC transport). Returns (user_text, response_text,
+    clean_response); user_text is empty if nothing was understood.
+    """
+    # 1. Transcribe (Server-side STT)
+    t0 = time.time()
+    user_text = scheduler.run("stt", ears.transcribe, data, priority=PRIORITY_VOICE)
+    t1 = time.time()
+    print(f"[Timing] STT took: {t1 - t0:.2f}s")
+    print(f"[API] Transcribed: {user_text}")
+
+    if not user_text:
+        return "", None, ""
+
+    # 2. Ask Brain
+    t2 = time.time()
+    response_text = scheduler.run("llm", brain.chat, user_text,
+                                  context=sessions.get(session_id), priority=PRIORITY_VOICE)
+    t3 = time.time()
+    print(f"[Timing] LLM took: {t3 - t2:.2f}s")
+
+    # 3. Execute Actions
+    return user_text, response_text, run_actions(response_text, session_id, sid)
+
 @app.route('/api/voice', methods=['POST'])
 def voice_command():
     """
@@ -75,51 +282,29 @@ def voice_command():
         if audio_file.filename == '':
             return jsonify({"error": "No selected file"}), 400
 
-        import time
         start_time = time.time()
         
-        # Read file into memory (No Disk I/O)
-        audio_bytes = BytesIO(audio_file.read())
-        
-        # Decode WAV to Numpy Array using SoundFile
-        # This ensures Whisper gets exactly what it expects (float32 array)
-        data, samplerate = sf.read(audio_bytes)
-        data = data.astype('float32')
-        
-        # 1. Transcribe (Server-side STT)
-        t0 = time.time()
-        user_text = ears.transcribe(data)
-        t1 = time.time()
-        print(f"[Timing] STT took: {t1 - t0:.2f}s")
-        print(f"[API] Transcribed: {user_text}")
+        # Read file into memory (No Disk I/O) and decode to 16 kHz float32,
+        # whatever the client sent (PCM, WAV, FLAC, Opus/WebM)
+        try:
+            data = ingest.decode(audio_file.read(), audio_file.content_type,
+                                 sample_rate=request.values.get('sample_rate'))
+        except IngestError as e:
+            return jsonify({"error": str(e)}), e.status
         
+        user_text, response_text, clean_response = answer_voice(data, get_session_id(), get_socket_sid())
         if not user_text:
             return jsonify({"error": "Could not understand audio"}), 400
-            
-        # 2. Ask Brain
-        t2 = time.time()
-        response_text = brain.chat(user_text)
-        t3 = time.time()
-        print(f"[Timing] LLM took: {t3 - t2:.2f}s")
-        
-        # 3. Execute Actions
-        clean_response = ""
-        
-        if isinstance(response_text, dict) and response_text.get("type") == "tool":
-            tool_calls = response_text.get("calls", [])
-            for tool in tool_calls:
-                result = hands.execute_tool_call(tool.function.name, tool.function.arguments)
-                clean_response += str(result) + " "
-        else:
-            # Legacy Text
-            if isinstance(response_text, dict):
-                raw = response_text.get("content", "")
-            else:
-                raw = str(response_text)
-            clean_response = hands.parse_and_execute(raw)
-        
+
         total_time = time.time() - start_time
         print(f"[Timing] TOTAL Request time: {total_time:.2f}s")
+
+        # Combined mode: answer with speech, text goes along in headers
+        if wants_speech():
+            return audio_response(clean_response, request.args.get('format', 'pcm'), headers={
+                "X-Transcription": quote(user_text),
+                "X-Response": quote(clean_response)
+            }, priority=PRIORITY_VOICE)
         
         return jsonify({
             "transcription": user_text,
@@ -127,6 +312,8 @@ def voice_command():
             "original_response": serialize_llm_response(response_text)
         })
                 
+    except (SchedulerBusy, SchedulerTimeout):
+        raise # 429 / 503 / 504 via the error handlers
     except Exception as e:
         print("!!! SERVER ERROR !!!")
         traceback.print_exc() # Print full error to console
@@ -136,7 +323,7 @@ def voice_command():
 def chat():
     """
     The main endpoint for communicating with the assistant remotely.
-    Input: JSON { "text": "Open calculator" }
+    Input: JSON { "text": "Open calculator", "session_id": "optional" }
     Output: JSON { "response": "Opening Calculator...", "command": "[OPEN: calculator]" }
     """
     data = request.json
@@ -148,27 +335,40 @@ def chat():
     print(f"[API] User: {user_text}")
     
     # Ask the Brain
-    response_text = brain.chat(user_text)
+    session_id = get_session_id()
+    response_text = scheduler.run("llm", brain.chat, user_text,
+                                  context=sessions.get(session_id), priority=PRIORITY_CHAT)
     
     # Process Actions (Server-side execution)
-    clean_response = ""
-    if isinstance(response_text, dict) and response_text.get("type") == "tool":
-        tool_calls = response_text.get("calls", [])
-        for tool in tool_calls:
-            result = hands.execute_tool_call(tool.function.name, tool.function.arguments)
-            clean_response += str(result) + " "
-    else:
-        if isinstance(response_text, dict):
-            raw = response_text.get("content", "")
-        else:
-            raw = str(response_text)
-        clean_response = hands.parse_and_execute(raw)
+    clean_response = run_actions(response_text, session_id, get_socket_sid())
     
     return jsonify({
         "original_response": serialize_llm_response(response_text),
         "clean_response": clean_response
     })
 
+@app.route('/api/tts', methods=['GET', 'POST'])
+def tts():
+    """
+    Speaks text with the server's Kokoro voice, streamed sentence by sentence.
+    Input: JSON { "text": "Hello", "format": "pcm" | "opus" } (or query parameters)
+    Output: audio/L16 (16-bit big-endian, rate in X-Sample-Rate) or Ogg/Opus
+    """
+    data = request.get_json(silent=True) or request.values
+    text = (data.get('text') or '').strip()
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    try:
+        return audio_response(text, data.get('format', 'pcm'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except (SchedulerBusy, SchedulerTimeout):
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
 # WebSocket Events
 @socketio.on('connect')
 def handle_connect():
@@ -176,9 +376,189 @@ def handle_connect():
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    voice_streams.pop(request.sid, None)
     print('[Socket] Client disconnected')
 
+def emit_speech(text, fmt, request_id, to, priority=PRIORITY_CHAT):
+    """Sends speech to one client: a 'tts_chunk' per sentence, then 'tts_end'."""
+    try:
+        encoder = AudioStreamEncoder(fmt, SAMPLE_RATE)
+        seq = 0
+        for chunk in synthesize_stream(text, encoder, priority):
+            socketio.emit('tts_chunk', {
+                "id": request_id,
+                "seq": seq,
+                "format": encoder.format,
+                "sample_rate": SAMPLE_RATE,
+                "audio": chunk
+            }, to=to)
+            seq += 1
+        socketio.emit('tts_end', {"id": request_id, "chunks": seq}, to=to)
+    except SchedulerBusy as e:
+        socketio.emit('tts_end', {"id": request_id, "error": str(e), "retry_after": e.retry_after}, to=to)
+    except Exception as e:
+        print(f"[Socket] TTS failed: {e}")
+        socketio.emit('tts_end', {"id": request_id, "error": str(e)}, to=to)
+
+@socketio.on('tts_request')
+def handle_tts_request(data):
+    """
+    Streams speech over the socket: one 'tts_chunk' per sentence, then 'tts_end'.
+    Input: { "text": "...", "format": "pcm" | "opus", "id": "optional request id" }
+    """
+    data = data or {}
+    request_id = data.get('id')
+    text = (data.get('text') or '').strip()
+    if not text:
+        emit('tts_end', {"id": request_id, "error": "No text provided"})
+        return
+    emit_speech(text, data.get('format', 'pcm'), request_id, request.sid)
+
+# Streaming voice: the client pushes PCM frames while the user talks, the
+# server runs VAD and partial STT as they arrive and answers when they stop.
+#   voice_start {id, sample_rate, speak, format, session_id}
+#   voice_frame {id, audio: int16 LE mono PCM}
+#   voice_end   {id}  (optional: push-to-talk release; otherwise VAD ends it)
+# Server -> client: voice_status {id, state: listening|speech|processing|done|error},
+#   partial_transcript {id, text}, voice_response {id, transcription, response},
+#   then tts_chunk/tts_end if speak was set.
+voice_streams = {}  # socket sid -> VoiceStream
+stream_cfg = server_cfg.get('stream', {})
+
+def voice_status(stream, sid, state, **extra):
+    socketio.emit('voice_status', dict(extra, id=stream.id, state=state), to=sid)
+
+@socketio.on('voice_start')
+def handle_voice_start(data):
+    data = data or {}
+    stream = VoiceStream(
+        data.get('id'),
+        sample_rate=int(data.get('sample_rate', 16000)),
+        vad_threshold=stream_cfg.get('vad_threshold', 0.01),
+        silence_seconds=stream_cfg.get('silence_seconds', 0.6),
+        max_seconds=stream_cfg.get('max_seconds', 30),
+        partial_seconds=stream_cfg.get('partial_seconds', 1.0),
+        speak=bool(data.get('speak')),
+        fmt=data.get('format', 'pcm'),
+        session_id=data.get('session_id') or f"sock-{request.sid}"
+    )
+    voice_streams[request.sid] = stream
+    voice_status(stream, request.sid, "listening")
+
+@socketio.on('voice_frame')
+def handle_voice_frame(data):
+    sid = request.sid
+    stream = voice_streams.get(sid)
+    if stream is None or not data or data.get('id') != stream.id:
+        return
+    event = stream.feed(data.get('audio') or b"")
+    if event == "end":
+        finish_voice_stream(sid, stream)
+    elif event == "speech":
+        voice_status(stream, sid, "speech")
+    if stream.wants_partial():
+        socketio.start_background_task(send_partial_transcript, sid, stream, stream.length)
+
+@socketio.on('voice_end')
+def handle_voice_end(data):
+    stream = voice_streams.get(request.sid)
+    if stream is not None and (data or {}).get('id') == stream.id:
+        finish_voice_stream(request.sid, stream)
+
+def send_partial_transcript(sid, stream, length):
+    """Best effort: skipped whenever STT is busy with real work."""
+    try:
+        text = scheduler.run("stt", ears.transcribe, stream.audio[:length],
+                             priority=PRIORITY_CHAT, timeout=stream_cfg.get('partial_timeout_seconds', 2))
+        if text and not stream.ended:
+            socketio.emit('partial_transcript', {"id": stream.id, "text": text}, to=sid)
+    except (SchedulerBusy, SchedulerTimeout):
+        pass
+    except Exception as e:
+        print(f"[Socket] Partial STT failed: {e}")
+    finally:
+        stream.partial_busy = False
+
+def finish_voice_stream(sid, stream):
+    if not stream.finish():
+        return
+    if voice_streams.get(sid) is stream:
+        del voice_streams[sid]
+    voice_status(stream, sid, "processing")
+    socketio.start_background_task(answer_voice_stream, sid, stream)
+
+def answer_voice_stream(sid, stream):
+    """Final STT -> LLM -> actions for a finished stream, answered on the socket."""
+    try:
+        user_text = scheduler.run("stt", ears.transcribe, stream.samples(), priority=PRIORITY_VOICE)
+        print(f"[Socket] Transcribed: {user_text}")
+        if not user_text:
+            voice_status(stream, sid, "error", error="Could not understand audio")
+            return
+        response_text = scheduler.run("llm", brain.chat, user_text,
+                                      context=sessions.get(stream.session_id), priority=PRIORITY_VOICE)
+        clean_response = run_actions(response_text, stream.session_id, sid)
+        socketio.emit('voice_response', {
+            "id": stream.id,
+            "transcription": user_text,
+            "response": clean_response
+        }, to=sid)
+        if stream.speak and clean_response.strip():
+            emit_speech(clean_response, stream.format, stream.id, sid, PRIORITY_VOICE)
+        voice_status(stream, sid, "done")
+    except SchedulerBusy as e:
+        voice_status(stream, sid, "error", error=str(e), retry_after=e.retry_after)
+    except Exception as e:
+        traceback.print_exc()
+        voice_status(stream, sid, "error", error=str(e))
+
+def ipc_request(header, payload):
+    """
+    Local transport (modules.local_ipc): the same answers as /api/voice
+    and /api/ready, but the audio arrives as raw int16 PCM with no
+    multipart, WAV container or HTTP in between.
+    """
+    op = header.get("op")
+    if op == "ready":
+        return {"status": 200, "ready": is_ready()}
+    if op != "voice":
+        return {"status": 400, "error": f"Unknown op: {op}"}
+
+    start_time = time.time()
+    try:
+        data = ingest.decode(payload, "audio/pcm", sample_rate=header.get("sample_rate", 16000))
+        user_text, response_text, clean_response = answer_voice(
+            data, header.get("session_id") or "ipc-local")
+    except IngestError as e:
+        return {"status": e.status, "error": str(e)}
+    except SchedulerBusy as e:
+        return {"status": 429, "error": str(e), "retry_after": e.retry_after}
+    except SchedulerTimeout as e:
+        return {"status": timeout_status(e), "error": str(e)}
+    if not user_text:
+        return {"status": 400, "error": "Could not understand audio"}
+
+    print(f"[Timing] TOTAL IPC request time: {time.time() - start_time:.2f}s")
+    return {
+        "status": 200,
+        "transcription": user_text,
+        "response": clean_response,
+        "original_response": serialize_llm_response(response_text)
+    }
+
 if __name__ == '__main__':
+    if server_cfg.get('warmup', True):
+        threading.Thread(target=warmup, daemon=True).start()
+    else:
+        model_state.update({name: "lazy" for name in model_state}) # Load on first use
+    ipc_cfg = settings.get('ipc', {})
+    if ipc_cfg.get('enabled', True):
+        # Same-machine clients skip HTTP; the key file keeps other users out
+        try:
+            IPCServer(ipc_request, ipc_cfg.get('address') or default_address(),
+                      load_key(ipc_cfg.get('key_path', "data/ipc.key"), create=True)).start()
+        except OSError as e:
+            print(f"[IPC] Local transport disabled: {e}")
     # Run using SocketIO
     # Note: Using port 5001 to avoid ghost conflicts on 5000
     socketio.run(app, host='0.0.0.0', port=5001)